@@ -0,0 +1,814 @@
+"""Asynchronous Python API to create, install packages in, list and destroy projects.
+
+The functions can run side by side in one event loop, e.g. to provision many projects at once,
+and the CLI is a thin wrapper around them. The commands of an operation (`uv`, `conda`, ...) run
+as `asyncio` subprocesses on the loop, see `process.run_async`. The project engines are
+synchronous code that also work with files directly, e.g. to hardlink a cached environment, so
+the rest of each operation runs in a worker thread that waits for its commands on the loop. As
+an operation holds its thread until it's done, at most `MAX_OPERATIONS` run at the same time, and
+the others wait for a thread to start. Cancelling an operation terminates the command it is
+running and stops it before the next one. Operations that are passed the same ``limit`` semaphore
+don't run more than its value at the same time.
+
+Operations on the same project exclude each other with its lock, also across processes, and
+raise a `ProjectLockedError` if the project is already being modified. Errors are reported with
+the `AiidaProjectError` subclasses below, instead of exiting like the CLI does.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import platform
+import shutil
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from datetime import datetime
+from pathlib import Path
+from subprocess import CalledProcessError
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, SerializeAsAny
+
+from .enums import Compression, EngineType
+from .process import Cancellation, ExecutableNotFoundError, cancellable, on_event_loop
+from .project.base import BaseProject
+from .timing import Timings
+
+__all__ = [
+    "AiidaProjectError",
+    "ArchiveError",
+    "CloneResult",
+    "CommandError",
+    "CreateResult",
+    "DestroyResult",
+    "EngineNotFoundError",
+    "EnvironmentCreationError",
+    "ExportResult",
+    "ImportResult",
+    "InstallResult",
+    "InstallationError",
+    "LockFileNotFoundError",
+    "NotInitialisedError",
+    "ProjectExistsError",
+    "ProjectInfo",
+    "ProjectLockedError",
+    "ProjectNotFoundError",
+    "PythonNotFoundError",
+    "SyncResult",
+    "add_shell_hooks",
+    "aiida_packages",
+    "clone",
+    "create",
+    "destroy",
+    "export_project",
+    "import_project",
+    "install",
+    "list_projects",
+    "resolve_python",
+    "sync",
+    "upgrade",
+]
+
+T = TypeVar("T")
+
+MAX_OPERATIONS = 64
+"""Maximum number of operations running at the same time, regardless of their ``limit``."""
+_executor = ThreadPoolExecutor(max_workers=MAX_OPERATIONS, thread_name_prefix="aiida-project")
+
+
+class AiidaProjectError(Exception):
+    """Base class of the errors raised by the API."""
+
+
+class NotInitialisedError(AiidaProjectError):
+    """The configuration has not been initialised with `aiida-project init`."""
+
+
+class ProjectExistsError(AiidaProjectError):
+    """A project with the requested name already exists."""
+
+
+class ProjectNotFoundError(AiidaProjectError):
+    """There is no project with the requested name."""
+
+
+class ProjectLockedError(AiidaProjectError):
+    """The project is being modified by another operation."""
+
+
+class PythonNotFoundError(AiidaProjectError):
+    """The requested Python interpreter could not be found or installed."""
+
+
+class EngineNotFoundError(AiidaProjectError):
+    """The executable of the engine, `uv` or a conda frontend, could not be found."""
+
+
+class LockFileNotFoundError(AiidaProjectError):
+    """The project does not have a lock file to sync its environment with."""
+
+
+class ArchiveError(AiidaProjectError):
+    """Reading or writing the archive of a project failed, e.g. because it's not an archive."""
+
+
+class CommandError(AiidaProjectError):
+    """A command run by the operation failed, which is available as the ``error``."""
+
+    def __init__(self, message: str, error: CalledProcessError) -> None:
+        super().__init__(message)
+        self.error = error
+
+
+class EnvironmentCreationError(CommandError):
+    """Creating the environment of a project failed."""
+
+
+class InstallationError(CommandError):
+    """Installing packages in the environment of a project failed."""
+
+
+class CreateResult(BaseModel):
+    project: SerializeAsAny[BaseProject]
+    from_pool: bool
+    """Whether the environment is a spare claimed from the pool."""
+    timings: dict[str, float]
+    """Duration of each phase of the creation, in seconds."""
+
+
+class CloneResult(BaseModel):
+    project: SerializeAsAny[BaseProject]
+    source: str
+    """Name of the cloned project."""
+
+
+class InstallResult(BaseModel):
+    project: SerializeAsAny[BaseProject]
+    before: dict[str, str]
+    """Versions of `aiida-core` and the plugins before the installation."""
+    after: dict[str, str]
+    """Versions of `aiida-core` and the plugins after the installation."""
+
+
+class SyncResult(BaseModel):
+    project: SerializeAsAny[BaseProject]
+
+
+class ExportResult(BaseModel):
+    archive: Path
+    compression: Compression
+    has_lock_file: bool
+    """Whether the lock file is exported, otherwise the packages are resolved again on import."""
+
+
+class ImportResult(BaseModel):
+    project: SerializeAsAny[BaseProject]
+    python_path: Path
+    """Python binary the environment was created with."""
+
+
+class DestroyResult(BaseModel):
+    name: str
+    trash_dirs: list[Path]
+    """Trash directories the project was moved into, which are emptied in the background."""
+
+
+class ProjectInfo(BaseModel):
+    name: str
+    engine: str
+    python: str | None
+    aiida_core: str | None
+    plugins: dict[str, str]
+    size: int | None
+    """Disk usage of the environment, in bytes."""
+    last_activation: datetime | None
+
+
+def resolve_python(python: str | Path | None, install: bool = False) -> Path | None:
+    """Resolve the path to the Python binary from a path, executable name or version.
+
+    Versions are looked up in the inventory of available interpreters, and installed with `uv`
+    if they are missing and ``install`` is set.
+    """
+    from .config import get_config
+    from .interpreters import InterpreterInventory, install_python, parse_request
+
+    if python is None:
+        return Path(sys.executable)
+    python_path = Path(python)
+    if python_path.exists():
+        return python_path
+    python = str(python)
+    if parse_request(python) is None:
+        python_which = shutil.which(python)
+        return None if python_which is None else Path(python_which)
+
+    config = get_config()
+    inventory = InterpreterInventory(Path(config.aiida_cache_dir, "interpreters.json"))
+    interpreter = inventory.find(python, platform.machine())
+    if interpreter is None and install:
+        try:
+            install_python(python, config.aiida_python_mirror)
+        except ExecutableNotFoundError as e:
+            raise EngineNotFoundError(str(e)) from e
+        interpreter = inventory.find(python, platform.machine())
+    return None if interpreter is None else Path(interpreter["path"])
+
+
+def aiida_packages(core_version: str, plugins: list[str]) -> list[str]:
+    """Return the packages to install for the ``core_version`` of `aiida-core` and ``plugins``."""
+    aiida_spec = "aiida-core"
+    if core_version != "latest":
+        aiida_spec += f"=={core_version}"
+    return [aiida_spec, *plugins]
+
+
+def add_shell_hooks(project: BaseProject, shell_str: str) -> None:
+    """Add the AiiDA environment variables and completion to the activate script."""
+    from .shell import load_shell
+
+    shell = load_shell(shell_str)
+    project.activation_file().parent.mkdir(parents=True, exist_ok=True)
+    project.append_activate_text(
+        shell.activate.format(
+            env_file_path=project.project_path,
+            venv_path=project.venv_path,
+            completion_file=project.completion_file(shell_str),
+            activation_file=project.activation_file(),
+        )
+    )
+    project.append_deactivate_text(shell.deactivate)
+
+
+async def create(  # noqa: PLR0913
+    name: str,
+    engine: EngineType = EngineType.venv,
+    core_version: str = "latest",
+    plugins: list[str] | None = None,
+    python: str | Path | None = None,
+    install_python: bool = False,
+    cache: bool = True,
+    wheelhouse: Path | None = None,
+    compile_bytecode: bool = True,
+    timings: Timings | None = None,
+    limit: asyncio.Semaphore | None = None,
+) -> CreateResult:
+    """Create the project ``name`` and install `aiida-core` and the ``plugins`` in it.
+
+    The duration of each phase is recorded in ``timings``, if given. If the installation fails
+    or is cancelled, the project is still created, like with the CLI, so the packages can be
+    installed again with `install`.
+    """
+    timings = timings or Timings()
+    return await _run(
+        _create,
+        name,
+        engine,
+        aiida_packages(core_version, plugins or []),
+        python,
+        install_python,
+        cache,
+        wheelhouse,
+        compile_bytecode,
+        timings,
+        limit=limit,
+    )
+
+
+async def clone(
+    source: str, name: str, include_data: bool = False, limit: asyncio.Semaphore | None = None
+) -> CloneResult:
+    """Create the project ``name`` as a copy of the project ``source``.
+
+    The environment shares the files of the one of ``source``, see `BaseProject.clone_environment`.
+    The AiiDA profiles and their data in the `.aiida` directory are only copied with
+    ``include_data``, in which case profiles with a PostgreSQL database still use the same
+    database as ``source``.
+    """
+    return await _run(_clone, source, name, include_data, limit=limit)
+
+
+async def install(  # noqa: PLR0913
+    name: str,
+    packages: list[str],
+    cache: bool = True,
+    wheelhouse: Path | None = None,
+    compile_bytecode: bool = True,
+    limit: asyncio.Semaphore | None = None,
+) -> InstallResult:
+    """Install the ``packages`` in the environment of the project ``name``."""
+    return await _run(_install, name, packages, cache, wheelhouse, compile_bytecode, limit=limit)
+
+
+async def upgrade(  # noqa: PLR0913
+    name: str,
+    packages: list[str],
+    wheelhouse: Path | None = None,
+    refresh: bool = True,
+    compile_bytecode: bool = True,
+    limit: asyncio.Semaphore | None = None,
+) -> InstallResult:
+    """Upgrade the ``packages`` in the environment of the project ``name``.
+
+    Unless ``refresh`` is set, a cached resolution of the requested packages is used, e.g. one of
+    another project with the same packages that was just upgraded, see `BaseProject.upgrade`.
+    """
+    return await _run(_upgrade, name, packages, wheelhouse, refresh, compile_bytecode, limit=limit)
+
+
+async def sync(
+    name: str,
+    wheelhouse: Path | None = None,
+    compile_bytecode: bool = True,
+    limit: asyncio.Semaphore | None = None,
+) -> SyncResult:
+    """Install exactly the packages in the lock file of the project ``name``."""
+    return await _run(_sync, name, wheelhouse, compile_bytecode, limit=limit)
+
+
+async def export_project(
+    name: str,
+    archive: Path | None = None,
+    compression: Compression = Compression.auto,
+    limit: asyncio.Semaphore | None = None,
+) -> ExportResult:
+    """Export the project ``name`` to an ``archive``, without its environment.
+
+    The archive is written to `NAME.tar.zst` (or another suffix for the ``compression``) in the
+    current directory by default.
+    """
+    return await _run(_export, name, archive, compression, limit=limit)
+
+
+async def import_project(  # noqa: PLR0913
+    archive: Path,
+    name: str | None = None,
+    python: str | Path | None = None,
+    wheelhouse: Path | None = None,
+    compile_bytecode: bool = True,
+    timings: Timings | None = None,
+    limit: asyncio.Semaphore | None = None,
+) -> ImportResult:
+    """Import a project from an ``archive`` written by `export_project`, as project ``name``.
+
+    The environment is recreated from the lock file of the project, if it has one, with the
+    exported Python version unless another ``python`` is given. The duration of each phase is
+    recorded in ``timings``, if given. If recreating the environment fails, the project is still
+    imported, so it can be fixed with `sync` or `install`.
+    """
+    timings = timings or Timings()
+    return await _run(
+        _import, archive, name, python, wheelhouse, compile_bytecode, timings, limit=limit
+    )
+
+
+async def destroy(
+    name: str, wait: bool = False, limit: asyncio.Semaphore | None = None
+) -> DestroyResult:
+    """Destroy the project ``name``.
+
+    Its files are deleted in the background, or before returning if ``wait`` is set.
+    """
+    return await _run(_destroy, name, wait, limit=limit)
+
+
+async def list_projects(limit: asyncio.Semaphore | None = None) -> list[ProjectInfo]:
+    """Return all projects, with the versions of Python, AiiDA and its plugins they use."""
+    return await _run(_list_projects, limit=limit)
+
+
+async def _run(function: Callable[..., T], *args: Any, limit: asyncio.Semaphore | None = None) -> T:
+    if limit is None:
+        return await _run_in_thread(function, *args)
+    async with limit:
+        return await _run_in_thread(function, *args)
+
+
+async def _run_in_thread(function: Callable[..., T], *args: Any) -> T:
+    """Run the ``function`` in a worker thread, stopping its commands when cancelled.
+
+    The commands are run as subprocesses of the running loop, see `on_event_loop`.
+    """
+    cancellation = Cancellation()
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    call = functools.partial(context.run, _call_cancellable, cancellation, loop, function, *args)
+    future = loop.run_in_executor(_executor, call)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancellation.cancel()
+        # Only return once the operation stopped, so it doesn't hold on to the project lock
+        with suppress(Exception):
+            await future
+        raise
+
+
+def _call_cancellable(
+    cancellation: Cancellation,
+    loop: asyncio.AbstractEventLoop,
+    function: Callable[..., T],
+    *args: Any,
+) -> T:
+    with cancellable(cancellation), on_event_loop(loop):
+        try:
+            return function(*args)
+        except ExecutableNotFoundError as e:
+            raise EngineNotFoundError(str(e)) from e
+
+
+@contextmanager
+def _locked(name: str, remove: bool = False) -> Iterator[Any]:
+    """Lock the project ``name`` and return a `ProjectDict` that is up to date for it.
+
+    Set ``remove`` to remove the lock file afterwards if the project isn't registered anymore,
+    e.g. once it's destroyed.
+    """
+    from .config import get_config
+    from .project import ProjectDict
+
+    if not get_config().initialised:
+        raise NotInitialisedError("The AiiDA project config has not been initialised.")
+    project_dict = ProjectDict()
+    lock = project_dict.lock(name)
+    try:
+        lock.acquire()
+    except BlockingIOError:
+        raise ProjectLockedError(
+            f"Project '{name}' is being modified by another process."
+        ) from None
+    try:
+        yield project_dict
+        if remove and not project_dict.registered(name):
+            lock.remove()
+    finally:
+        lock.release()
+
+
+def _create(  # noqa: PLR0913
+    name: str,
+    engine: EngineType,
+    packages: list[str],
+    python: str | Path | None,
+    install_python: bool,
+    cache: bool,
+    wheelhouse: Path | None,
+    compile_bytecode: bool,
+    timings: Timings,
+) -> CreateResult:
+    from .config import get_config
+    from .pool import EnvironmentPool, pool_dir, pool_key
+    from .project import load_project_class
+    from .project.venv import VenvProject
+
+    # Guard against an empty string (allowed by typer!)
+    if not name:
+        raise AiidaProjectError("Project name cannot be an empty string.")
+    config = get_config()
+    with _locked(name) as project_dict:
+        if project_dict.registered(name):
+            raise ProjectExistsError(f"Project named '{name}' already exists!")
+
+        with timings.span("interpreter resolution"):
+            try:
+                python_path = resolve_python(python, install_python)
+            except CalledProcessError as e:
+                raise PythonNotFoundError(f"Could not install Python {python}.") from e
+        if python_path is None:
+            raise PythonNotFoundError("Could not resolve path to Python binary.")
+
+        project = load_project_class(engine.value)(
+            name=name,
+            project_path=Path(config.aiida_project_dir, name),
+            venv_path=Path(config.aiida_venv_dir, name),
+            dir_structure=config.aiida_project_structure,
+        )
+        if cache and isinstance(project, VenvProject):
+            pool = EnvironmentPool(pool_dir(config.aiida_venv_dir))
+            key = pool_key(python_path, packages, wheelhouse, compile_bytecode)
+            with timings.span("pool claim"):
+                claimed = project.create_from_pool(pool, key)
+            if claimed:
+                with timings.span("activate-script patching"):
+                    add_shell_hooks(project, config.aiida_project_shell)
+                with timings.span("registry write"):
+                    project_dict.add_project(project)
+                # Replace the claimed spare in the background
+                pool.start_fill([key])
+                return CreateResult(project=project, from_pool=True, timings=timings.spans)
+
+        try:
+            with timings.span("venv creation"):
+                project.create(python_path=python_path, wheelhouse=wheelhouse)
+        except CalledProcessError as e:
+            raise EnvironmentCreationError("Python environment creation failed!", e) from e
+        with timings.span("activate-script patching"):
+            add_shell_hooks(project, config.aiida_project_shell)
+        with timings.span("registry write"):
+            project_dict.add_project(project)
+
+        try:
+            with timings.span("install"):
+                project.install(
+                    packages,
+                    use_cache=cache,
+                    wheelhouse=wheelhouse,
+                    compile_bytecode=compile_bytecode,
+                )
+        except CalledProcessError as e:
+            raise InstallationError("Package installation failed!", e) from e
+        # Record the requested packages and lock file
+        with timings.span("registry write"):
+            project_dict.add_project(project)
+    return CreateResult(project=project, from_pool=False, timings=timings.spans)
+
+
+def _clone(source_name: str, name: str, include_data: bool) -> CloneResult:
+    from .cache import replace_prefixes
+    from .config import get_config
+    from .disk import copy_tree
+    from .trash import move_to_trash, start_purge
+
+    if not name:
+        raise AiidaProjectError("Project name cannot be an empty string.")
+    config = get_config()
+    # The source is locked as well, so it's not modified while it's being copied
+    with _locked(source_name) as project_dict, _locked(name):
+        source = project_dict.get(source_name)
+        if source is None:
+            raise ProjectNotFoundError(f"No project named '{source_name}' found!")
+        project_path = Path(config.aiida_project_dir, name)
+        venv_path = Path(config.aiida_venv_dir, name)
+        if project_dict.registered(name) or project_path.exists() or venv_path.exists():
+            raise ProjectExistsError(f"Project named '{name}' already exists!")
+
+        lock_file = None
+        if source.lock_file is not None:
+            lock_file = Path(project_path, source.lock_file.relative_to(source.project_path))
+        project = source.model_copy(
+            update={
+                "name": name,
+                "project_path": project_path,
+                "venv_path": venv_path,
+                "lock_file": lock_file,
+            },
+            deep=True,
+        )
+        try:
+            copy_tree(source.project_path, project_path, exclude=[] if include_data else [".aiida"])
+            aiida_config = Path(project_path, ".aiida", "config.json")
+            if include_data:
+                if aiida_config.exists():
+                    replace_prefixes(aiida_config, project.relocation_prefixes(source))
+            elif lock_file is not None and source.lock_file is not None:
+                lock_file.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source.lock_file, lock_file)
+            Path(project_path, ".aiida").mkdir(exist_ok=True)
+            project.mark_project_dir()
+            project.clone_environment(source)
+        except BaseException as e:
+            # Don't leave a partial copy behind, so cloning can simply be tried again
+            for path in (project_path, venv_path):
+                if path.exists():
+                    move_to_trash(path)
+            start_purge(project.trash_dirs())
+            if isinstance(e, CalledProcessError):
+                raise EnvironmentCreationError("Cloning the environment failed!", e) from e
+            raise
+        project_dict.add_project(project)
+    return CloneResult(project=project, source=source_name)
+
+
+def _versions(project: BaseProject) -> dict[str, str]:
+    """Return the versions of `aiida-core` and the plugins installed in the ``project``."""
+    from .metadata import environment_metadata
+
+    metadata = environment_metadata(project.venv_path)
+    versions = {"aiida-core": metadata["aiida_core"], **metadata["plugins"]}
+    return {package: version for package, version in versions.items() if version is not None}
+
+
+def _install(
+    name: str,
+    packages: list[str],
+    cache: bool,
+    wheelhouse: Path | None,
+    compile_bytecode: bool,
+) -> InstallResult:
+    with _locked(name) as project_dict:
+        project = project_dict.get(name)
+        if project is None:
+            raise ProjectNotFoundError(f"No project named '{name}' found!")
+        before = _versions(project)
+        try:
+            project.install(
+                packages, use_cache=cache, wheelhouse=wheelhouse, compile_bytecode=compile_bytecode
+            )
+        except CalledProcessError as e:
+            raise InstallationError("Package installation failed!", e) from e
+        project_dict.add_project(project)
+        # Refresh the cached metadata of the environment for `list`
+        project_dict.environment_metadata([name])
+    return InstallResult(project=project, before=before, after=_versions(project))
+
+
+def _upgrade(
+    name: str,
+    packages: list[str],
+    wheelhouse: Path | None,
+    refresh: bool,
+    compile_bytecode: bool,
+) -> InstallResult:
+    with _locked(name) as project_dict:
+        project = project_dict.get(name)
+        if project is None:
+            raise ProjectNotFoundError(f"No project named '{name}' found!")
+        before = _versions(project)
+        try:
+            project.upgrade(
+                packages, wheelhouse=wheelhouse, refresh=refresh, compile_bytecode=compile_bytecode
+            )
+        except CalledProcessError as e:
+            raise InstallationError("Upgrading the packages failed!", e) from e
+        project_dict.add_project(project)
+        project_dict.environment_metadata([name])
+    return InstallResult(project=project, before=before, after=_versions(project))
+
+
+def _sync(name: str, wheelhouse: Path | None, compile_bytecode: bool) -> SyncResult:
+    with _locked(name) as project_dict:
+        project = project_dict.get(name)
+        if project is None:
+            raise ProjectNotFoundError(f"No project named '{name}' found!")
+        if project.lock_file is None or not project.lock_file.exists():
+            raise LockFileNotFoundError(f"Project '{name}' does not have a lock file.")
+        try:
+            project.sync(wheelhouse=wheelhouse, compile_bytecode=compile_bytecode)
+        except CalledProcessError as e:
+            raise InstallationError("Syncing the environment failed!", e) from e
+        project_dict.environment_metadata([name])
+    return SyncResult(project=project)
+
+
+def _export(name: str, archive: Path | None, compression: Compression) -> ExportResult:
+    import json
+
+    from . import __version__
+    from .archive import SUFFIXES, select_compression, write_archive
+    from .config import get_config
+    from .metadata import python_version
+    from .project import ProjectDict
+
+    if not get_config().initialised:
+        raise NotInitialisedError("The AiiDA project config has not been initialised.")
+    project = ProjectDict().get(name)
+    if project is None:
+        raise ProjectNotFoundError(f"No project named '{name}' found!")
+
+    compression = select_compression(compression)
+    archive = archive or Path(f"{name}{SUFFIXES[compression]}")
+    metadata = {
+        "aiida_project": __version__,
+        "engine": project.engine,
+        "python": python_version(project.venv_path),
+        "project": json.loads(project.model_dump_json()),
+    }
+    # Leave out the environment, in case it is in the project directory
+    exclude = [project.venv_path] if project.project_path in project.venv_path.parents else []
+    try:
+        write_archive(metadata, project.project_path, archive, compression, exclude)
+    except (OSError, CalledProcessError) as e:
+        raise ArchiveError(f"Exporting the project failed: {e}") from e
+    return ExportResult(
+        archive=archive,
+        compression=compression,
+        has_lock_file=project.lock_file is not None and project.lock_file.exists(),
+    )
+
+
+def _import(  # noqa: PLR0913
+    archive: Path,
+    name: str | None,
+    python: str | Path | None,
+    wheelhouse: Path | None,
+    compile_bytecode: bool,
+    timings: Timings,
+) -> ImportResult:
+    from .archive import read_archive, read_metadata
+    from .config import get_config
+    from .project import load_project_class
+
+    try:
+        metadata = read_metadata(archive)
+    except (OSError, ValueError) as e:
+        raise ArchiveError(str(e)) from e
+    data = metadata["project"]
+    name = name or data["name"]
+    config = get_config()
+    with _locked(name) as project_dict:
+        project_path = Path(config.aiida_project_dir, name)
+        if project_dict.registered(name) or project_path.exists():
+            raise ProjectExistsError(f"Project named '{name}' already exists!")
+
+        # The `conda` engine installs Python itself, but virtual environments need an interpreter
+        # with the same minor version, the patch version doesn't matter
+        version = metadata.get("python")
+        if python is None and version is not None and metadata["engine"] == EngineType.venv.value:
+            python = ".".join(version.split(".")[:2])
+        python_path = resolve_python(python)
+        if python_path is None:
+            raise PythonNotFoundError(f"Could not find Python {python}.")
+
+        with timings.span("extraction"):
+            try:
+                read_archive(archive, project_path)
+            except (OSError, CalledProcessError) as e:
+                raise ArchiveError(f"Extracting the archive failed: {e}") from e
+        lock_file = None
+        if data.get("lock_file") is not None:
+            # The lock file is stored in the project directory, which is relocated
+            lock_file = Path(
+                project_path, Path(data["lock_file"]).relative_to(data["project_path"])
+            )
+        project = load_project_class(metadata["engine"]).model_validate(
+            {
+                **data,
+                "name": name,
+                "project_path": project_path,
+                "venv_path": Path(config.aiida_venv_dir, name),
+                "lock_file": lock_file if lock_file is not None and lock_file.exists() else None,
+            }
+        )
+
+        try:
+            with timings.span("venv creation"):
+                project.create(python_path=python_path, wheelhouse=wheelhouse)
+            with timings.span("activate-script patching"):
+                add_shell_hooks(project, config.aiida_project_shell)
+            with timings.span("registry write"):
+                project_dict.add_project(project)
+            if project.lock_file is None:
+                with timings.span("install"):
+                    project.install(
+                        project.packages, wheelhouse=wheelhouse, compile_bytecode=compile_bytecode
+                    )
+            elif not project.creates_from_lock:
+                with timings.span("sync"):
+                    project.sync(wheelhouse=wheelhouse, compile_bytecode=compile_bytecode)
+        except CalledProcessError as e:
+            raise EnvironmentCreationError("Recreating the environment failed!", e) from e
+        with timings.span("registry write"):
+            project_dict.add_project(project)
+    return ImportResult(project=project, python_path=python_path)
+
+
+def _destroy(name: str, wait: bool) -> DestroyResult:
+    from .trash import purge, start_purge
+
+    with _locked(name, remove=True) as project_dict:
+        project = project_dict.get(name)
+        if project is None:
+            raise ProjectNotFoundError(f"No project named '{name}' found!")
+        project.destroy()
+        project_dict.remove_project(project)
+    if wait:
+        for trash in project.trash_dirs():
+            purge(trash)
+    else:
+        start_purge(project.trash_dirs())
+    return DestroyResult(name=name, trash_dirs=project.trash_dirs())
+
+
+def _list_projects() -> list[ProjectInfo]:
+    from .config import get_config
+    from .project import ProjectDict
+
+    if not get_config().initialised:
+        raise NotInitialisedError("The AiiDA project config has not been initialised.")
+    project_dict = ProjectDict()
+    metadata = project_dict.environment_metadata()
+    projects = []
+    for name in sorted(metadata):
+        project = project_dict.get(name)
+        if project is None:
+            continue
+        try:
+            last_activation = datetime.fromtimestamp(project.activation_file().stat().st_mtime)
+        except FileNotFoundError:
+            last_activation = None
+        projects.append(
+            ProjectInfo(
+                name=name,
+                engine=project.engine,
+                python=metadata[name].get("python"),
+                aiida_core=metadata[name].get("aiida_core"),
+                plugins=metadata[name].get("plugins", {}),
+                size=metadata[name].get("size"),
+                last_activation=last_activation,
+            )
+        )
+    return projects
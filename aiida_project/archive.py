@@ -0,0 +1,224 @@
+"""Exporting projects to compressed archives and importing them again, e.g. on another machine.
+
+Archives are streamed from `tar` through the compressor, so neither the archive nor its contents
+are kept in memory. The environment itself is not part of the archive, it is recreated from the
+lock file instead. Without a `tar` executable or compressor, Python's `tarfile` and `gzip` modules
+are used, which are considerably slower for directories with many files.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import uuid
+from pathlib import Path
+from typing import IO, Any
+
+from .enums import Compression
+
+ARCHIVE_VERSION = 1
+METADATA_NAME = "aiida-project.json"
+"""Name of the archive member with the registry entry, which is always the first member."""
+
+COMPRESSORS: dict[Compression, tuple[list[str], list[str]]] = {
+    Compression.zstd: (["zstd", "-T0", "-q", "-c"], ["zstd", "-d", "-q", "-c"]),
+    Compression.pigz: (["pigz", "-c"], ["pigz", "-d", "-c"]),
+    Compression.gzip: (["gzip", "-c"], ["gzip", "-d", "-c"]),
+}
+"""Commands to compress a stream and decompress a file, the first two are multithreaded."""
+SUFFIXES = {Compression.zstd: ".tar.zst", Compression.pigz: ".tar.gz", Compression.gzip: ".tar.gz"}
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def select_compression(compression: Compression = Compression.auto) -> Compression:
+    """Return the compression to use, preferring the available multithreaded compressors."""
+    if compression is not Compression.auto:
+        return compression
+    for candidate in (Compression.zstd, Compression.pigz):
+        if shutil.which(COMPRESSORS[candidate][0][0]) is not None:
+            return candidate
+    return Compression.gzip
+
+
+def _detect_compression(archive: Path) -> Compression:
+    with archive.open("rb") as handle:
+        magic = handle.read(len(ZSTD_MAGIC))
+    if magic.startswith(ZSTD_MAGIC):
+        return Compression.zstd
+    if magic.startswith(GZIP_MAGIC):
+        # Both compressors can decompress any gzip stream
+        return Compression.pigz if shutil.which("pigz") is not None else Compression.gzip
+    raise ValueError(f"`{archive}` is not a zstd or gzip compressed archive.")
+
+
+def _use_executables(compression: Compression) -> bool:
+    """Check if `tar` and the executable for the ``compression`` are available."""
+    compressor = COMPRESSORS[compression][0][0]
+    return shutil.which("tar") is not None and shutil.which(compressor) is not None
+
+
+def _run_pipeline(commands: list[list[str]], stdout: IO[bytes] | None = None) -> None:
+    """Run the ``commands``, with the output of each one piped into the next one.
+
+    Raises a `CalledProcessError` for the first command that fails.
+    """
+    processes = []
+    with tempfile.TemporaryFile() as stderr_file:
+        pipe: IO[bytes] | None = None
+        for index, command in enumerate(commands):
+            last = index == len(commands) - 1
+            process = subprocess.Popen(
+                command,
+                stdin=pipe,
+                stdout=stdout if last else subprocess.PIPE,
+                stderr=stderr_file,
+            )
+            # Only the next process should hold the pipe, so it is closed once that one exits
+            if pipe is not None:
+                pipe.close()
+            pipe = process.stdout
+            processes.append(process)
+        returncodes = [process.wait() for process in processes]
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+    for command, returncode in zip(commands, returncodes):
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
+
+def write_archive(
+    metadata: dict[str, Any],
+    project_path: Path,
+    archive: Path,
+    compression: Compression = Compression.auto,
+    exclude: list[Path] | None = None,
+) -> None:
+    """Write the ``metadata`` and the contents of the ``project_path`` to the ``archive``.
+
+    The ``exclude`` paths in the project directory are left out, including their contents. The
+    archive is written to a temporary file first, and only put in place once it is complete.
+    """
+    compression = select_compression(compression)
+    if compression is not Compression.gzip and not _use_executables(compression):
+        raise FileNotFoundError(f"`tar` and `{compression.value}` are needed for the compression.")
+    excluded = [path.relative_to(project_path) for path in exclude or []]
+    contents = json.dumps(
+        {"version": ARCHIVE_VERSION, "directory": project_path.name, **metadata}, indent=2
+    ).encode()
+
+    tmp_path = archive.with_name(f".{archive.name}.{uuid.uuid4().hex}")
+    try:
+        if _use_executables(compression):
+            with tempfile.TemporaryDirectory() as tmp_dir, tmp_path.open("wb") as output:
+                Path(tmp_dir, METADATA_NAME).write_bytes(contents)
+                tar_command = ["tar", "-c", "-f", "-", "-C", tmp_dir, METADATA_NAME]
+                for path in excluded:
+                    tar_command.append(f"--exclude={Path(project_path.name, path)}")
+                tar_command.extend(["-C", str(project_path.parent), project_path.name])
+                _run_pipeline([tar_command, COMPRESSORS[compression][0]], stdout=output)
+        else:
+            _write_tarfile(contents, project_path, tmp_path, excluded)
+        os.replace(tmp_path, archive)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _write_tarfile(
+    contents: bytes, project_path: Path, archive: Path, excluded: list[Path]
+) -> None:
+    def tar_filter(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo | None:
+        relative = Path(tarinfo.name).relative_to(project_path.name)
+        return None if relative in excluded else tarinfo
+
+    with gzip.open(archive, "wb") as stream:
+        tar = tarfile.open(fileobj=stream, mode="w|")
+        with tar:
+            tarinfo = tarfile.TarInfo(METADATA_NAME)
+            tarinfo.size = len(contents)
+            tar.addfile(tarinfo, io.BytesIO(contents))
+            tar.add(project_path, arcname=project_path.name, filter=tar_filter)
+
+
+def read_metadata(archive: Path) -> dict[str, Any]:
+    """Read the metadata at the start of the ``archive``, without decompressing the rest."""
+    compression = _detect_compression(archive)
+    decompress_command = [*COMPRESSORS[compression][1], str(archive)]
+    if shutil.which(decompress_command[0]) is None:
+        if compression is not Compression.gzip:
+            raise FileNotFoundError(f"`{compression.value}` is needed to decompress `{archive}`.")
+        with gzip.open(archive, "rb") as stream:
+            return _read_metadata(archive, stream)
+
+    process = subprocess.Popen(
+        decompress_command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    with process:
+        assert process.stdout is not None
+        try:
+            return _read_metadata(archive, process.stdout)
+        finally:
+            process.kill()
+
+
+def _read_metadata(archive: Path, stream: IO[bytes] | gzip.GzipFile) -> dict[str, Any]:
+    try:
+        tar = tarfile.open(fileobj=stream, mode="r|")
+        member = tar.next()
+        metadata_file = None if member is None else tar.extractfile(member)
+        if member is None or member.name != METADATA_NAME or metadata_file is None:
+            raise ValueError(f"`{archive}` is not an `aiida-project` archive.")
+        metadata: dict[str, Any] = json.loads(metadata_file.read())
+    except tarfile.TarError as e:
+        raise ValueError(f"`{archive}` is not an `aiida-project` archive.") from e
+    if metadata.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported version of the archive `{archive}`.")
+    directory = metadata.get("directory", "")
+    if Path(directory).name != directory or directory in ("", ".", ".."):
+        raise ValueError(f"Invalid project directory `{directory}` in `{archive}`.")
+    return metadata
+
+
+def read_archive(archive: Path, project_path: Path) -> dict[str, Any]:
+    """Extract the project directory in the ``archive`` to ``project_path``, return the metadata.
+
+    The project directory is extracted in a temporary directory, and only moved in place once it
+    is complete.
+    """
+    metadata = read_metadata(archive)
+    project_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(project_path.parent, f".{project_path.name}.{uuid.uuid4().hex}")
+    tmp_path.mkdir()
+    try:
+        compression = _detect_compression(archive)
+        if _use_executables(compression):
+            extract_command = ["tar", "-x", "-f", "-", "--no-same-owner", "-C", str(tmp_path)]
+            _run_pipeline([[*COMPRESSORS[compression][1], str(archive)], extract_command])
+        else:
+            _extract_tarfile(archive, tmp_path, metadata["directory"])
+        os.rename(Path(tmp_path, metadata["directory"]), project_path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return metadata
+
+
+def _extract_tarfile(archive: Path, path: Path, directory: str) -> None:
+    with gzip.open(archive, "rb") as stream:
+        tar = tarfile.open(fileobj=stream, mode="r|")
+        with tar:
+            for member in tar:
+                if member.name != directory and not member.name.startswith(f"{directory}/"):
+                    continue
+                # Only extract regular files, directories and links within the archive
+                if hasattr(tarfile, "data_filter"):
+                    tar.extract(member, path, filter="data")
+                elif Path(member.name).is_absolute() or ".." in Path(member.name).parts:
+                    raise ValueError(f"Refusing to extract `{member.name}` from `{archive}`.")
+                else:
+                    tar.extract(member, path)
@@ -0,0 +1,293 @@
+"""Content-addressed cache of fully installed environment layers."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+
+SEED_PACKAGES = {"pip", "setuptools", "wheel", "packaging"}
+"""Packages (and their dependencies) installed in every new environment by `uv venv --seed`."""
+UNPINNED_RESOLUTION_TTL_S = 24 * 3600
+"""Time after which a resolution of packages without an exact version is resolved again."""
+ARCHIVE_SUFFIXES = (".whl", ".zip", ".tar.gz", ".tgz", ".tar.bz2")
+
+
+def is_direct_reference(requirement: str) -> bool:
+    """Check if the ``requirement`` refers to a path, URL or VCS repository instead of a release.
+
+    The artifact can change while the requirement stays the same, e.g. a rebuilt local wheel, so
+    resolutions and layers with such requirements are never cached.
+    """
+    spec = requirement.split(";")[0].strip()
+    return (
+        any(character in spec for character in "/\\@")
+        or spec.startswith((".", "-", "~"))
+        or spec.endswith(ARCHIVE_SUFFIXES)
+    )
+
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Hardlink ``source`` to ``target``, falling back to a copy across filesystems."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def link_tree(source: Path, target: Path) -> None:
+    """Recreate the ``source`` tree in ``target`` by hardlinking all of its files."""
+    for root, dirnames, filenames in os.walk(source):
+        relative = Path(root).relative_to(source)
+        Path(target, relative).mkdir(parents=True, exist_ok=True)
+        for name in dirnames + filenames:
+            source_path = Path(root, name)
+            target_path = Path(target, relative, name)
+            if source_path.is_symlink():
+                target_path.unlink(missing_ok=True)
+                target_path.symlink_to(os.readlink(source_path))
+            elif name in filenames:
+                target_path.unlink(missing_ok=True)
+                link_or_copy(source_path, target_path)
+
+
+def relocate_script(source: Path, target: Path, old_prefix: str, new_prefix: str) -> None:
+    """Copy a script from ``source`` to ``target``, replacing ``old_prefix`` by ``new_prefix``.
+
+    Binary files and files that don't contain the old prefix are hardlinked instead.
+    """
+    contents = source.read_bytes()
+    if b"\0" in contents[:1024] or old_prefix.encode() not in contents:
+        link_or_copy(source, target)
+        return
+    target.write_bytes(contents.replace(old_prefix.encode(), new_prefix.encode()))
+    shutil.copymode(source, target)
+
+
+def replace_prefixes(path: Path, prefixes: dict[str, str]) -> None:
+    """Replace the old by the new ``prefixes`` in the file at ``path``, if it's a text file.
+
+    Longer prefixes are replaced first, so a prefix of another one doesn't break it. The file is
+    replaced instead of changed in place, since it can be hardlinked to other environments.
+    """
+    contents = path.read_bytes()
+    if b"\0" in contents[:1024]:
+        return
+    pattern = re.compile(
+        b"|".join(re.escape(old.encode()) for old in sorted(prefixes, key=len, reverse=True))
+    )
+    new_contents = pattern.sub(lambda match: prefixes[match.group().decode()].encode(), contents)
+    if new_contents == contents:
+        return
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp_path.write_bytes(new_contents)
+    shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def site_packages(venv_path: Path) -> Path:
+    """Return the `site-packages` directory of the environment at ``venv_path``."""
+    return next(Path(venv_path, "lib").glob("*/site-packages"))
+
+
+def read_pyvenv_cfg(venv_path: Path) -> dict[str, str]:
+    """Parse the `pyvenv.cfg` file of the environment at ``venv_path``."""
+    config = {}
+    for line in Path(venv_path, "pyvenv.cfg").read_text().splitlines():
+        key, _, value = line.partition("=")
+        config[key.strip()] = value.strip()
+    return config
+
+
+def is_pristine(venv_path: Path) -> bool:
+    """Check if only the seed packages are installed in the environment at ``venv_path``."""
+    return all(
+        dist_info.name.split("-")[0].lower() in SEED_PACKAGES
+        for dist_info in site_packages(venv_path).glob("*.dist-info")
+    )
+
+
+class EnvironmentLayer:
+    """A fully installed `site-packages` and its scripts, stored once and shared by hardlinks."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @property
+    def metadata_file(self) -> Path:
+        return Path(self.path, "layer.json")
+
+    def exists(self) -> bool:
+        return self.metadata_file.exists()
+
+    def store(
+        self,
+        venv_path: Path,
+        base_scripts: set[str],
+        requirements: list[str],
+        bytecode: bool = False,
+    ) -> None:
+        """Store the packages installed in ``venv_path`` as this layer.
+
+        Scripts in ``base_scripts`` were created with the environment itself and are not stored.
+        Set ``bytecode`` if the Python files in the environment were compiled, so the layer
+        includes their bytecode.
+        The layer is built in a temporary directory and moved in place, so concurrent stores of
+        the same layer are safe.
+        """
+        tmp_path = Path(self.path.parent, f".tmp-{uuid.uuid4().hex}")
+        link_tree(site_packages(venv_path), Path(tmp_path, "site-packages"))
+        Path(tmp_path, "bin").mkdir()
+        for script in Path(venv_path, "bin").iterdir():
+            if script.name not in base_scripts and script.is_file():
+                link_or_copy(script, Path(tmp_path, "bin", script.name))
+        Path(tmp_path, "layer.json").write_text(
+            json.dumps(
+                {"venv_path": str(venv_path), "requirements": requirements, "bytecode": bytecode}
+            )
+        )
+        try:
+            tmp_path.rename(self.path)
+        except OSError:
+            # Another process stored the same layer in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def has_bytecode(self) -> bool:
+        """Check if the layer includes the bytecode of its Python files."""
+        return bool(json.loads(self.metadata_file.read_text()).get("bytecode", False))
+
+    def add_bytecode(self, venv_path: Path) -> None:
+        """Add the bytecode compiled in the environment at ``venv_path`` to this layer.
+
+        Layers stored without bytecode are updated this way the first time they are used with
+        bytecode compilation, so later environments get the bytecode from the layer.
+        """
+        source = site_packages(venv_path)
+        for cache_dir in source.rglob("__pycache__"):
+            target_dir = Path(self.path, "site-packages", cache_dir.relative_to(source))
+            target_dir.mkdir(exist_ok=True)
+            for pyc_file in cache_dir.iterdir():
+                target = Path(target_dir, pyc_file.name)
+                if not target.exists():
+                    link_or_copy(pyc_file, target)
+        metadata = json.loads(self.metadata_file.read_text())
+        tmp_file = self.metadata_file.with_name(f".{self.metadata_file.name}.{uuid.uuid4().hex}")
+        tmp_file.write_text(json.dumps({**metadata, "bytecode": True}))
+        os.replace(tmp_file, self.metadata_file)
+
+    def link(self, alias: EnvironmentLayer) -> None:
+        """Make this layer also available as the ``alias`` layer, e.g. keyed by a lock file."""
+        if alias.path == self.path or alias.exists():
+            return
+        tmp_path = Path(alias.path.parent, f".tmp-{uuid.uuid4().hex}")
+        tmp_path.symlink_to(self.path.name)
+        try:
+            os.replace(tmp_path, alias.path)
+        except OSError:
+            # Another process stored or linked the same layer in the meantime
+            tmp_path.unlink()
+
+    def materialise(self, venv_path: Path) -> None:
+        """Install this layer into the environment at ``venv_path``."""
+        metadata = json.loads(self.metadata_file.read_text())
+        # Record the use, `gc` evicts the least recently used layers first
+        os.utime(self.metadata_file)
+        # Replace the seed packages as well, their version might differ from those in the layer
+        target_site_packages = site_packages(venv_path)
+        shutil.rmtree(target_site_packages)
+        link_tree(Path(self.path, "site-packages"), target_site_packages)
+        for script in Path(self.path, "bin").iterdir():
+            target = Path(venv_path, "bin", script.name)
+            target.unlink(missing_ok=True)
+            relocate_script(script, target, metadata["venv_path"], str(venv_path))
+
+
+class LayerCache:
+    """Cache of environment layers, keyed by the interpreter and the resolved package set."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.layers_path = Path(cache_dir, "layers")
+        self.layers_path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def interpreter_key(venv_path: Path) -> str:
+        """Identify the interpreter the environment at ``venv_path`` is based on."""
+        pyvenv_cfg = read_pyvenv_cfg(venv_path)
+        return "|".join(
+            [
+                os.path.realpath(Path(venv_path, "bin", "python")),
+                pyvenv_cfg.get("implementation", ""),
+                pyvenv_cfg.get("version_info", ""),
+                os.uname().machine,
+            ]
+        )
+
+    def layer(self, interpreter_key: str, requirements: list[str]) -> EnvironmentLayer:
+        """Return the layer for the interpreter and resolved ``requirements``."""
+        digest = hashlib.sha256(
+            "\n".join([interpreter_key, *sorted(requirements)]).encode()
+        ).hexdigest()
+        return EnvironmentLayer(Path(self.layers_path, digest))
+
+
+class ResolutionCache:
+    """Cache of resolved requirements, keyed by the Python version and the requested packages."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.locks_path = Path(cache_dir, "locks")
+        self.locks_path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def python_key(venv_path: Path) -> str:
+        """Identify the Python version and platform of the environment at ``venv_path``."""
+        pyvenv_cfg = read_pyvenv_cfg(venv_path)
+        return "|".join(
+            [
+                pyvenv_cfg.get("implementation", ""),
+                pyvenv_cfg.get("version_info", ""),
+                sys.platform,
+                os.uname().machine,
+            ]
+        )
+
+    def lock_path(self, python_key: str, packages: list[str]) -> Path:
+        digest = hashlib.sha256("\n".join([python_key, *sorted(packages)]).encode()).hexdigest()
+        return Path(self.locks_path, f"{digest}.txt")
+
+    @staticmethod
+    def is_pinned(requirement: str) -> bool:
+        """Check if the ``requirement`` asks for an exact version, e.g. `aiida-core==2.7.0`.
+
+        The Python version is part of the key, so a requirement on `python` counts as pinned.
+        """
+        if re.match(r"\s*python\s*[=<>~!]", requirement):
+            return True
+        return "==" in requirement and "*" not in requirement
+
+    def get(self, python_key: str, packages: list[str]) -> list[str] | None:
+        """Return the cached requirements for the ``packages``, or `None` if not resolved yet.
+
+        If any of the ``packages`` is not pinned to an exact version, the resolution expires after
+        `UNPINNED_RESOLUTION_TTL_S`, so new releases are picked up.
+        """
+        lock_path = self.lock_path(python_key, packages)
+        try:
+            if not all(self.is_pinned(package) for package in packages):
+                if time.time() - lock_path.stat().st_mtime > UNPINNED_RESOLUTION_TTL_S:
+                    return None
+            return lock_path.read_text().splitlines()
+        except FileNotFoundError:
+            return None
+
+    def put(self, python_key: str, packages: list[str], requirements: list[str]) -> None:
+        """Store the resolved ``requirements`` for the ``packages``."""
+        lock_path = self.lock_path(python_key, packages)
+        tmp_path = lock_path.with_name(f".{lock_path.name}.{uuid.uuid4().hex}")
+        tmp_path.write_text("\n".join(requirements) + "\n")
+        os.replace(tmp_path, lock_path)
@@ -1,18 +1,94 @@
 import os
-import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
 from subprocess import CalledProcessError
 from typing import Annotated, Optional
 
+import click
 import typer
-from rich import print, prompt
+from typer.core import TyperCommand, TyperGroup
 
-from ..project import EngineType, load_project_class
-from ..shell import ShellType, load_shell
+from ..enums import Compression, EngineType, LogFormat, ShellType
 
-app = typer.Typer(pretty_exceptions_show_locals=False)
+
+class _ExitOnMissingExecutable(TyperGroup):
+    """Group that exits with an error if `uv` or a conda frontend is needed but not found."""
+
+    def invoke(self, ctx: click.Context) -> object:
+        from ..process import ExecutableNotFoundError
+
+        try:
+            return super().invoke(ctx)
+        except ExecutableNotFoundError as e:
+            from rich import print
+
+            print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(os.EX_UNAVAILABLE)
+
+
+app = typer.Typer(cls=_ExitOnMissingExecutable, pretty_exceptions_show_locals=False)
+wheelhouse_app = typer.Typer(help="Manage the local wheelhouse used for offline installs.")
+app.add_typer(wheelhouse_app, name="wheelhouse")
+trash_app = typer.Typer(help="Check on or resume the deletion of destroyed projects.")
+app.add_typer(trash_app, name="trash")
+pool_app = typer.Typer(help="Prepare spare environments so `create` only has to claim one.")
+app.add_typer(pool_app, name="pool")
+python_app = typer.Typer(help="Find the Python interpreters to create environments with.")
+app.add_typer(python_app, name="python")
+
+OfflineOption = Annotated[
+    bool,
+    typer.Option(
+        "--offline",
+        help="Only install packages from the configured wheelhouse, without any index lookups.",
+    ),
+]
+WheelhouseOption = Annotated[
+    Optional[Path],
+    typer.Option(
+        "--wheelhouse",
+        help="Only install packages from this wheelhouse. Implies `--offline`.",
+    ),
+]
+CompileBytecodeOption = Annotated[
+    bool,
+    typer.Option(
+        help="Compile the installed Python files to bytecode, so the first run is faster.",
+    ),
+]
+InstallPythonOption = Annotated[
+    bool,
+    typer.Option(
+        "--install-python",
+        help="Install the requested Python version with `uv` if it is not available.",
+    ),
+]
+
+
+def _offline_wheelhouse(
+    offline: bool, wheelhouse: Optional[Path], engines: list[EngineType]
+) -> Optional[Path]:
+    """Return the wheelhouse to install from, or `None` to use the package index.
+
+    The `conda` engine doesn't use the wheelhouse, but only installs packages that are already in
+    its package cache or in local channels when offline.
+    """
+    from rich import print
+
+    from ..config import get_config
+
+    if wheelhouse is None:
+        if not offline:
+            return None
+        wheelhouse = get_config().aiida_wheelhouse_dir
+    if EngineType.venv in engines and not wheelhouse.is_dir():
+        print(
+            f"[bold red]Error:[/bold red] Wheelhouse '{wheelhouse}' does not exist. Use "
+            "`aiida-project wheelhouse build` to create it."
+        )
+        sys.exit(os.EX_USAGE)
+    return wheelhouse
 
 
 @app.callback()
@@ -26,9 +102,12 @@ def callback() -> None:
 @app.command()
 def init(shell: Optional[ShellType] = None) -> None:
     """Initialisation of the `aiida-project` setup."""
-    from ..config import ProjectConfig
+    from rich import print, prompt
+
+    from ..config import get_config
+    from ..shell import load_shell
 
-    config = ProjectConfig()
+    config = get_config()
 
     shell_str = shell.value if shell else ""
 
@@ -70,7 +149,9 @@ def init(shell: Optional[ShellType] = None) -> None:
                 f"\n# Created by `aiida-project init` on "
                 f"{datetime.now().strftime('%d/%m/%y %H:%M')}\n"
             )
-            handle.write(shellz.init_lines.format(env_file_path=config.model_config["env_file"]))
+            handle.write(
+                shellz.init_lines.format(env_snippet_path=config.env_snippet_path(shell_str))
+            )
 
     config.set_key(
         "aiida_venv_dir",
@@ -84,7 +165,7 @@ def init(shell: Optional[ShellType] = None) -> None:
 
 
 @app.command()
-def create(  # noqa: PLR0915
+def create(  # noqa: PLR0913, PLR0915
     name: str,
     engine: EngineType = EngineType.venv,
     core_version: str = "latest",
@@ -95,93 +176,1118 @@ def create(  # noqa: PLR0915
         Optional[str],
         typer.Option(
             "--python",
-            help="Path to the Python interpreter to use for the environment.",
+            help="Path, name or version (e.g. `3.11`) of the Python interpreter to use.",
         ),
     ] = None,
+    install_python: InstallPythonOption = False,
+    cache: Annotated[
+        bool,
+        typer.Option(
+            help="Reuse environments previously built with the same Python and packages. "
+            "Resolutions of packages without an exact version are reused for a day.",
+        ),
+    ] = True,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+    timings: Annotated[
+        bool, typer.Option("--timings", help="Show the time taken by each phase.")
+    ] = False,
+    log_format: Annotated[
+        LogFormat,
+        typer.Option(
+            help="Use `json` to print the timings as JSON, with all other output sent to stderr."
+        ),
+    ] = LogFormat.text,
 ) -> None:
     """Create a new AiiDA project named NAME."""
-    from ..config import ProjectConfig
+    import asyncio
+    import json
+    from collections.abc import Iterator
+    from contextlib import contextmanager
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from .. import api
+    from ..config import get_config
+    from ..process import stream_output
+    from ..timing import Timings
+
+    json_output = log_format is LogFormat.json
+    console = Console(stderr=json_output)
+    print = console.print
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    packages = api.aiida_packages(core_version, plugins)
+    wheelhouse = _offline_wheelhouse(offline, wheelhouse, [engine])
+
+    @contextmanager
+    def show_phase(phase: str) -> Iterator[None]:
+        if phase == "venv creation":
+            assert python_path is not None
+            print(
+                "✨ Creating the project directory and environment using the Python binary:\n"
+                f"   [purple]{python_path.resolve()}[/]"
+            )
+            with console.status("Creating the environment"):
+                yield
+        elif phase == "activate-script patching":
+            typer.echo(
+                "🔧 Adding the AiiDA environment variables to the activate script.", err=json_output
+            )
+            yield
+        elif phase == "install":
+            print("✅ [bold green]Success:[/bold green] Project created.")
+            typer.echo(f"💾 Installing `{' '.join(packages)}`", err=json_output)
+            with console.status("Installing packages"):
+                yield
+        else:
+            yield
+
+    phases = Timings(on_span=show_phase)
+
+    def report_timings(success: bool) -> None:
+        if json_output:
+            typer.echo(
+                json.dumps(
+                    {
+                        "project": name,
+                        "success": success,
+                        "timings": {
+                            phase: round(duration, 4) for phase, duration in phases.spans.items()
+                        },
+                        "total": round(phases.total, 4),
+                    }
+                )
+            )
+        elif timings:
+            table = Table("Phase", "Time (s)")
+            for phase, duration in phases.spans.items():
+                table.add_row(phase, f"{duration:.2f}")
+            table.add_row("[bold]total[/]", f"[bold]{phases.total:.2f}[/]")
+            print(table)
+
+    def show_output(line: str) -> None:
+        print(f"   {line}", style="dim", markup=False, highlight=False, soft_wrap=True)
+
+    # The interpreter is resolved here, so its path can be shown before creating the environment
+    python_path: Optional[Path] = None
+    with phases.span("interpreter resolution"), stream_output(show_output):
+        try:
+            python_path = api.resolve_python(python, install_python)
+        except CalledProcessError as e:
+            print(f"[bold red]Error:[/bold red] Could not install Python: {_error_summary(e)}")
+            sys.exit(os.EX_UNAVAILABLE)
+    if python_path is None:
+        print("[bold red]Error:[/bold red] Could not resolve path to Python binary.")
+        sys.exit(os.EX_USAGE)
+
+    try:
+        with stream_output(show_output):
+            result = asyncio.run(
+                api.create(
+                    name,
+                    engine=engine,
+                    core_version=core_version,
+                    plugins=plugins,
+                    python=python_path,
+                    cache=cache,
+                    wheelhouse=wheelhouse,
+                    compile_bytecode=compile_bytecode,
+                    timings=phases,
+                )
+            )
+    except api.ProjectLockedError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_TEMPFAIL)
+    except api.CommandError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        typer.echo(e.error, err=json_output)
+        report_timings(success=False)
+        sys.exit(1)
+    except api.EngineNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_UNAVAILABLE)
+    except api.AiidaProjectError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
+
+    if result.from_pool:
+        typer.echo("⚡ Claimed a spare environment from the pool.", err=json_output)
+        print("✅ [bold green]Success:[/bold green] Project created.")
+    report_timings(success=True)
+
+
+@app.command()
+def create_many(  # noqa: PLR0913, PLR0915
+    manifest: Path,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs", "-j", min=1, help="Maximum number of projects to create at the same time."
+        ),
+    ] = 4,
+    cache: Annotated[
+        bool,
+        typer.Option(
+            help="Reuse environments previously built with the same Python and packages. "
+            "Resolutions of packages without an exact version are reused for a day.",
+        ),
+    ] = True,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+    install_python: InstallPythonOption = False,
+) -> None:
+    """Create all projects defined in the YAML MANIFEST concurrently."""
+    import asyncio
+    import time
+
+    from pydantic import ValidationError
+    from rich import print
+    from rich.table import Table
+
+    from .. import api
+    from ..config import get_config
+    from ..manifest import ProjectSpec, load_manifest
     from ..project import ProjectDict
 
-    config = ProjectConfig()
+    config = get_config()
     if config.is_not_initialised():
         sys.exit(os.EX_CONFIG)
 
-    # Guard against user putting an empty string (allowed by typer!)
-    if not name:
-        print("[bold red]Error:[/bold red] Project name cannot be an empty string.'")
+    try:
+        specs = load_manifest(manifest).projects
+    except (OSError, ValidationError) as exception:
+        print(f"[bold red]Error:[/bold red] Could not load the manifest: {exception}")
+        sys.exit(os.EX_DATAERR)
+
+    wheelhouse = _offline_wheelhouse(offline, wheelhouse, [spec.engine for spec in specs])
+    project_dict = ProjectDict()
+    results: dict[str, tuple[bool, float, str]] = {}
+
+    async def provision(spec: ProjectSpec, python_path: Path, limit: asyncio.Semaphore) -> None:
+        async with limit:
+            start = time.perf_counter()
+            try:
+                await api.create(
+                    spec.name,
+                    engine=spec.engine,
+                    core_version=spec.core_version,
+                    plugins=spec.plugins,
+                    python=python_path,
+                    cache=cache,
+                    wheelhouse=wheelhouse,
+                    compile_bytecode=compile_bytecode,
+                )
+            except api.CommandError as e:
+                # Only show the line with the actual error in the summary
+                results[spec.name] = (False, time.perf_counter() - start, _error_summary(e.error))
+                print(f"❌ [bold red]Failed:[/bold red] {spec.name}")
+                typer.echo((e.error.stderr or b"").decode())
+            except api.AiidaProjectError as e:
+                results[spec.name] = (False, time.perf_counter() - start, str(e))
+                print(f"❌ [bold red]Failed:[/bold red] {spec.name}")
+            else:
+                results[spec.name] = (True, time.perf_counter() - start, "")
+                print(f"✅ [bold green]Created:[/bold green] {spec.name}")
+
+    # Projects with the same engine, interpreter and packages are grouped, and only the first
+    # project of each group is created at first. The others then reuse its resolved dependencies
+    # and cached environment.
+    groups: dict[tuple[str, Path, tuple[str, ...]], list[tuple[ProjectSpec, Path]]] = {}
+    for spec in specs:
+        try:
+            python_path = api.resolve_python(spec.python, install_python)
+        except CalledProcessError:
+            python_path = None
+        if spec.name in project_dict:
+            results[spec.name] = (False, 0.0, "Project already exists.")
+        elif python_path is None:
+            results[spec.name] = (False, 0.0, "Could not resolve path to Python binary.")
+        else:
+            packages = tuple(sorted(api.aiida_packages(spec.core_version, spec.plugins)))
+            key = (spec.engine.value, python_path.resolve(), packages)
+            groups.setdefault(key, []).append((spec, python_path))
+            # Keep the order of the manifest in the summary
+            results[spec.name] = (False, 0.0, "Not created.")
+
+    async def provision_all() -> None:
+        limit = asyncio.Semaphore(jobs)
+        for group_items in (
+            [group[0] for group in groups.values()],
+            [item for group in groups.values() for item in group[1:]],
+        ):
+            await asyncio.gather(*(provision(*item, limit) for item in group_items))
+
+    print(f"✨ Creating {sum(len(group) for group in groups.values())} projects.")
+    asyncio.run(provision_all())
+
+    table = Table("Project", "Status", "Time (s)", "Details")
+    for name, (success, duration, details) in results.items():
+        status = "[green]created[/]" if success else "[red]failed[/]"
+        table.add_row(name, status, f"{duration:.1f}", details)
+    print(table)
+
+    if not all(success for success, _, _ in results.values()):
+        sys.exit(1)
+
+
+def _error_summary(error: CalledProcessError) -> str:
+    """Return the (first) line with the actual error in the output of a failed command."""
+    stderr = (error.stderr or b"").decode()
+    error_lines = [line.strip() for line in stderr.splitlines() if line.strip()] or [str(error)]
+    error_markers = ("error:", "\N{MULTIPLICATION SIGN}")
+
+    def is_error(line: str) -> bool:
+        # `conda` reports errors by the name of the exception, e.g. `PackagesNotFoundError: ...`
+        return line.startswith(error_markers) or line.partition(":")[0].endswith("Error")
+
+    return next((line for line in error_lines if is_error(line)), error_lines[-1])
+
+
+@app.command()
+def clone(
+    source: str,
+    name: str,
+    data: Annotated[
+        bool,
+        typer.Option(
+            "--data",
+            help="Also copy the AiiDA profiles and their data. Profiles with a PostgreSQL "
+            "database keep using the same database.",
+        ),
+    ] = False,
+) -> None:
+    """Create project NAME as a copy of project SOURCE, sharing the files of its environment."""
+    import asyncio
+    import time
+
+    from rich import print
+
+    from .. import api
+    from ..config import get_config
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(api.clone(source, name, include_data=data))
+    except api.ProjectLockedError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_TEMPFAIL)
+    except api.CommandError as e:
+        print(f"[bold red]Error:[/bold red] {e} {_error_summary(e.error)}")
+        sys.exit(1)
+    except api.EngineNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_UNAVAILABLE)
+    except api.AiidaProjectError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
+    print(
+        f"✅ [bold green]Success:[/bold green] Project '{name}' cloned from '{source}' in "
+        f"{time.perf_counter() - start:.1f} s."
+    )
+
+
+@app.command()
+def upgrade(  # noqa: PLR0913, PLR0915
+    names: Annotated[Optional[list[str]], typer.Argument(help="Projects to upgrade.")] = None,
+    all_projects: Annotated[bool, typer.Option("--all", help="Upgrade all projects.")] = False,
+    core: Annotated[bool, typer.Option(help="Upgrade `aiida-core`.")] = True,
+    core_version: str = "latest",
+    plugins: Annotated[list[str], typer.Option("--plugin", "-p", help="Plugins to upgrade.")] = [],
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Maximum number of concurrent upgrades."),
+    ] = 4,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+) -> None:
+    """Upgrade `aiida-core` and/or plugins in the projects NAMES, or all projects."""
+    import asyncio
+    import time
+
+    from rich import print
+    from rich.progress import Progress
+    from rich.table import Table
+
+    from .. import api
+    from ..config import get_config
+    from ..metadata import python_version
+    from ..project import ProjectDict
+    from ..project.base import merge_requirements
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    if bool(names) == all_projects:
+        print("[bold red]Error:[/bold red] Specify either the projects to upgrade or `--all`.")
+        sys.exit(os.EX_USAGE)
+
+    packages = api.aiida_packages(core_version, plugins) if core else plugins
+    if not packages:
+        print("[bold red]Error:[/bold red] Nothing to upgrade, specify plugins with `--plugin`.")
         sys.exit(os.EX_USAGE)
 
     project_dict = ProjectDict()
-    if name in project_dict.projects:
-        print(f"[bold red]Error:[/bold red] Project named '{name}' already exists!")
+    results: dict[str, tuple[bool, float, str]] = {}
+
+    # Projects with the same interpreter and requested packages are grouped, and only the first
+    # project of each group resolves the packages again. The others then use that resolution.
+    groups: dict[tuple[str, str, tuple[str, ...]], list[str]] = {}
+    for name in names or project_dict.names():
+        project = project_dict.get(name)
+        if project is None:
+            results[name] = (False, 0.0, "Project not found.")
+            continue
+        version = python_version(project.venv_path)
+        if version is None:
+            results[name] = (False, 0.0, "Environment not found.")
+            continue
+        requested = tuple(sorted(merge_requirements(project.requested_packages(), packages)))
+        groups.setdefault((project.engine, version, requested), []).append(name)
+        results[name] = (False, 0.0, "Not upgraded.")
+    wheelhouse = _offline_wheelhouse(
+        offline, wheelhouse, [EngineType(engine) for engine, _, _ in groups]
+    )
+
+    async def upgrade_project(name: str, refresh: bool, limit: asyncio.Semaphore) -> None:
+        async with limit:
+            start = time.perf_counter()
+            try:
+                result = await api.upgrade(
+                    name,
+                    packages,
+                    wheelhouse=wheelhouse,
+                    refresh=refresh,
+                    compile_bytecode=compile_bytecode,
+                )
+            except api.CommandError as e:
+                results[name] = (False, time.perf_counter() - start, _error_summary(e.error))
+                print(f"❌ [bold red]Failed:[/bold red] {name}")
+                return
+            except api.AiidaProjectError as e:
+                results[name] = (False, time.perf_counter() - start, str(e))
+                print(f"❌ [bold red]Failed:[/bold red] {name}")
+                return
+        changes = [
+            f"{package} {result.before.get(package) or '-'} → {version}"
+            for package, version in result.after.items()
+            if result.before.get(package) != version
+        ]
+        results[name] = (True, time.perf_counter() - start, "\n".join(changes))
+        print(f"✅ [bold green]Upgraded:[/bold green] {name}")
+
+    async def upgrade_all(progress: Progress) -> None:
+        task = progress.add_task("Upgrading projects", total=n_projects)
+        limit = asyncio.Semaphore(jobs)
+        for refresh, group_names in (
+            (True, [group[0] for group in groups.values()]),
+            (False, [name for group in groups.values() for name in group[1:]]),
+        ):
+            upgrades = [upgrade_project(name, refresh, limit) for name in group_names]
+            for upgrade in asyncio.as_completed(upgrades):
+                await upgrade
+                progress.advance(task)
+
+    n_projects = sum(len(group) for group in groups.values())
+    typer.echo(f"⬆️  Upgrading `{' '.join(packages)}` in {n_projects} projects.")
+    with Progress(transient=True) as progress:
+        asyncio.run(upgrade_all(progress))
+
+    table = Table("Project", "Status", "Time (s)", "Details")
+    for name, (success, duration, details) in results.items():
+        if not success:
+            status = "[red]failed[/]"
+        else:
+            status = "[green]upgraded[/]" if details else "[green]up to date[/]"
+        table.add_row(name, status, f"{duration:.1f}", details)
+    print(table)
+
+    if not all(success for success, _, _ in results.values()):
+        sys.exit(1)
+
+
+@app.command()
+def sync(
+    name: str,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+) -> None:
+    """Install exactly the locked packages in the environment of project NAME."""
+    import asyncio
+
+    from rich import print
+
+    from .. import api
+    from ..config import get_config
+    from ..project import ProjectDict
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    project = ProjectDict().get(name)
+    if project is None:
+        print(f"[bold red]Error:[/bold red] No project named '{name}' found!")
         sys.exit(os.EX_USAGE)
 
-    venv_path = config.aiida_venv_dir / Path(name)
-    project_path = config.aiida_project_dir / Path(name)
+    wheelhouse = _offline_wheelhouse(offline, wheelhouse, [EngineType(project.engine)])
+    if project.lock_file is not None:
+        typer.echo(f"💾 Syncing the environment with `{project.lock_file}`")
+    try:
+        asyncio.run(api.sync(name, wheelhouse=wheelhouse, compile_bytecode=compile_bytecode))
+    except api.ProjectLockedError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_TEMPFAIL)
+    except api.CommandError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        typer.echo(e.error)
+        typer.echo((e.error.stderr or b"").decode())
+        sys.exit(1)
+    except api.EngineNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_UNAVAILABLE)
+    except api.AiidaProjectError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
+    print(f"✅ [bold green]Success:[/bold green] Project '{name}' is in sync with its lock file.")
+
 
-    # Temporarily block `conda` engines until we provide support again
-    if engine is EngineType.conda:
+@app.command("export")
+def export_project(
+    name: str,
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output", "-o", help="Path of the archive, by default `NAME.tar.zst` or `.tar.gz`."
+        ),
+    ] = None,
+    compression: Annotated[
+        Compression,
+        typer.Option(help="Compression of the archive, the fastest available by default."),
+    ] = Compression.auto,
+) -> None:
+    """Export project NAME to an archive, without its environment, e.g. to move it elsewhere."""
+    import asyncio
+    import time
+
+    from rich import print
+
+    from .. import api
+    from ..archive import SUFFIXES, select_compression
+    from ..config import get_config
+    from ..disk import format_size
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    compression = select_compression(compression)
+    archive = output or Path(f"{name}{SUFFIXES[compression]}")
+    typer.echo(f"📦 Exporting project '{name}' to {archive} ({compression.value})")
+    start = time.perf_counter()
+    try:
+        result = asyncio.run(api.export_project(name, archive, compression))
+    except api.ArchiveError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        if isinstance(e.__cause__, CalledProcessError):
+            typer.echo((e.__cause__.stderr or b"").decode())
+        sys.exit(1)
+    except api.AiidaProjectError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
+    if not result.has_lock_file:
         print(
-            "[bold red]Error:[/bold red] The `conda` engine is currently disabled until we restore "
-            "support."
+            f"[bold yellow]Warning:[/bold yellow] Project '{name}' does not have a lock file, so "
+            "the packages will be resolved again when importing it."
         )
+    print(
+        f"✅ [bold green]Success:[/bold green] Exported '{name}' in "
+        f"{time.perf_counter() - start:.1f} s ({format_size(archive.stat().st_size)})."
+    )
+
+
+@app.command("import")
+def import_project(  # noqa: PLR0913, PLR0915
+    archive: Path,
+    name: Annotated[
+        Optional[str],
+        typer.Option("--name", help="Name of the imported project, by default the exported one."),
+    ] = None,
+    python: Annotated[
+        Optional[str],
+        typer.Option(
+            "--python",
+            help="Path to the Python interpreter to use, by default the exported Python version.",
+        ),
+    ] = None,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+) -> None:
+    """Import a project from an ARCHIVE created with `export`, recreating its environment."""
+    import asyncio
+    from collections.abc import Iterator
+    from contextlib import contextmanager
+
+    from rich import print
+
+    from .. import api
+    from ..archive import read_metadata
+    from ..config import get_config
+    from ..timing import Timings
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    try:
+        metadata = read_metadata(archive)
+    except (OSError, ValueError) as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_DATAERR if isinstance(e, ValueError) else os.EX_USAGE)
+    wheelhouse = _offline_wheelhouse(offline, wheelhouse, [EngineType(metadata["engine"])])
+
+    @contextmanager
+    def show_phase(phase: str) -> Iterator[None]:
+        if phase == "extraction":
+            typer.echo(f"📦 Extracting the project directory from {archive}")
+        elif phase == "venv creation":
+            typer.echo("✨ Creating the environment")
+        elif phase == "sync":
+            typer.echo("💾 Syncing the environment with the lock file of the project")
+        elif phase == "install":
+            typer.echo("💾 Installing the requested packages of the project")
+        yield
+
+    try:
+        result = asyncio.run(
+            api.import_project(
+                archive,
+                name=name,
+                python=python,
+                wheelhouse=wheelhouse,
+                compile_bytecode=compile_bytecode,
+                timings=Timings(on_span=show_phase),
+            )
+        )
+    except api.ProjectLockedError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_TEMPFAIL)
+    except api.PythonNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e} Use `--python` to select the interpreter.")
+        sys.exit(os.EX_USAGE)
+    except api.CommandError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        typer.echo(e.error)
+        typer.echo((e.error.stderr or b"").decode())
+        sys.exit(1)
+    except api.ArchiveError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(1)
+    except api.EngineNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
         sys.exit(os.EX_UNAVAILABLE)
+    except api.AiidaProjectError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
+    print(
+        f"✅ [bold green]Success:[/bold green] Project '{result.project.name}' imported, using the "
+        f"Python binary: {result.python_path.resolve()}"
+    )
+
+
+@app.command("list")
+def list_projects(
+    json_output: Annotated[
+        bool, typer.Option("--json", help="Print the projects as JSON, e.g. for dashboards.")
+    ] = False,
+) -> None:
+    """List all projects, with the versions of Python, AiiDA and its plugins they use."""
+    import asyncio
+    import json
+
+    from rich import print
+    from rich.table import Table
+
+    from .. import api
+    from ..config import get_config
+    from ..disk import format_size
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    projects = [info.model_dump(mode="json") for info in asyncio.run(api.list_projects())]
+
+    if json_output:
+        typer.echo(json.dumps(projects, indent=2))
+        return
+
+    table = Table("Name", "Engine", "Python", "aiida-core", "Plugins", "Size", "Last activation")
+    for entry in projects:
+        table.add_row(
+            entry["name"],
+            entry["engine"],
+            entry["python"] or "[red]missing[/]",
+            entry["aiida_core"] or "-",
+            ", ".join(f"{name} {version}" for name, version in entry["plugins"].items()),
+            "-" if entry["size"] is None else format_size(entry["size"]),
+            "never"
+            if entry["last_activation"] is None
+            else entry["last_activation"][:16].replace("T", " "),
+        )
+    print(table)
+
+
+@app.command()
+def doctor(
+    name: str,
+    perf: Annotated[
+        bool,
+        typer.Option("--perf", help="Profile the import time of `verdi` and the entry points."),
+    ] = False,
+    top: Annotated[
+        int, typer.Option("--top", help="Number of distributions and entry points to show.")
+    ] = 10,
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output",
+            "-o",
+            help="JSON report path, by default in the `.aiida/perf` directory of the project.",
+        ),
+    ] = None,
+) -> None:
+    """Check the environment of project NAME, and profile the startup of `verdi` with `--perf`."""
+    import json
+    import subprocess
+
+    from rich.console import Console
+    from rich.table import Table
+
+    from ..config import get_config
+    from ..profiling import profile_environment
+    from ..project import ProjectDict
+
+    console = Console()
+    print = console.print
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
 
-    project = load_project_class(engine.value)(
-        name=name,
-        project_path=project_path,
-        venv_path=venv_path,
-        dir_structure=config.aiida_project_structure,
+    project = ProjectDict().get(name)
+    if project is None:
+        print(f"[bold red]Error:[/bold red] No project named '{name}' found!")
+        sys.exit(os.EX_USAGE)
+
+    python_path = Path(project.venv_path, "bin", "python")
+    python_runs = (
+        python_path.exists()
+        and subprocess.run([python_path, "-c", ""], capture_output=True, check=False).returncode
+        == 0
     )
-    if python is None:
-        python_path = Path(sys.executable)
-    else:
-        python_path = Path(python)
-        if not python_path.exists():
-            python_which = shutil.which(python) or shutil.which(f"python{python}")
-            if python_which is None:
-                print("[bold red]Error:[/bold red] Could not resolve path to Python binary.")
-                sys.exit(os.EX_USAGE)
-            else:
-                python_path = Path(python_which)
+    checks = {
+        f"Project directory `{project.project_path}` exists": project.project_path.is_dir(),
+        f"Python of the environment `{project.venv_path}` runs": python_runs,
+        "`verdi` is installed": Path(project.venv_path, "bin", "verdi").exists(),
+        "Lock file exists": project.lock_file is not None and project.lock_file.exists(),
+    }
+    for check, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {check}")
+    if not all(checks.values()):
+        sys.exit(1)
+    if not perf:
+        return
+
+    with console.status("Profiling the imports"):
+        try:
+            profile = profile_environment(project.venv_path, project.project_path)
+        except CalledProcessError as e:
+            print(f"[bold red]Error:[/bold red] Profiling failed: {_error_summary(e)}")
+            sys.exit(1)
+    report = {"project": name, **profile}
 
+    verdi_import = report["verdi_import_s"]
     print(
-        "✨ Creating the project directory and environment using the Python binary:\n"
-        f"   [purple]{python_path.resolve()}[/]"
+        "\n⏱️  "
+        + ("" if verdi_import is None else f"Importing `verdi` took {verdi_import:.2f} s, ")
+        + f"all imports took {report['total_import_s']:.2f} s."
     )
+    table = Table("Distribution", "Import time (s)", "Modules", title="Slowest distributions")
+    for entry in report["distributions"][:top]:
+        label = f"{entry['name']} [yellow](plugin)[/]" if entry["plugin"] else entry["name"]
+        table.add_row(label, f"{entry['import_s']:.3f}", str(entry["modules"]))
+    print(table)
+    table = Table("Entry point", "Group", "Distribution", "Load time (s)")
+    table.title = "Slowest entry points"
+    for entry in report["entry_points"][:top]:
+        load_time = f"{entry['load_s']:.3f}" if entry["error"] is None else "[red]failed[/]"
+        table.add_row(entry["name"], entry["group"], entry["distribution"], load_time)
+    print(table)
+    failed = [entry for entry in report["entry_points"] if entry["error"] is not None]
+    for entry in failed:
+        print(f"❌ Loading `{entry['group']}:{entry['name']}` failed: {entry['error']}")
 
-    try:
-        project.create(python_path=python_path)
-    except CalledProcessError as e:
-        print("[bold red]Error:[/bold red] Python environment creation failed!")
-        typer.echo(e)
-        typer.echo(e.stdout.decode())
-        typer.echo(e.stderr.decode())
+    if output is None:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = Path(project.project_path, ".aiida", "perf", f"{timestamp}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"💾 Report written to `{output}`.")
+
+
+class _CommandAfterSeparator(TyperCommand):
+    """Command that takes the arguments after `--` as a command to run, stored in `ctx.meta`.
+
+    Click drops the `--` when parsing, so the arguments are split before that.
+    """
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if "--" in args:
+            index = args.index("--")
+            args, ctx.meta["command"] = args[:index], args[index + 1 :]
+        return super().parse_args(ctx, args)
+
+
+@app.command(cls=_CommandAfterSeparator)
+def run(
+    ctx: typer.Context,
+    names: Annotated[
+        Optional[list[str]],
+        typer.Argument(
+            metavar="[NAME]... -- COMMAND...",
+            help="Projects to run the command in.",
+            show_default=False,
+        ),
+    ] = None,
+    all_projects: Annotated[
+        bool, typer.Option("--all", help="Run the command in all projects.")
+    ] = False,
+    jobs: Annotated[
+        int, typer.Option("--jobs", "-j", min=1, help="Number of commands to run at the same time.")
+    ] = 8,
+    json_output: Annotated[
+        bool,
+        typer.Option("--json", help="Print the exit codes, durations and output as JSON."),
+    ] = False,
+) -> None:
+    """Run a command in the environments of several projects at once, e.g. `verdi status`."""
+    import json
+
+    from rich import print
+
+    from ..config import get_config
+    from ..project import ProjectDict
+    from ..runner import run_in_projects
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    command = ctx.meta.get("command", [])
+    if not command:
+        print("[bold red]Error:[/bold red] Pass the command to run after `--`.")
+        sys.exit(os.EX_USAGE)
+    if all_projects == bool(names):
+        print("[bold red]Error:[/bold red] Pass either the names of the projects or `--all`.")
+        sys.exit(os.EX_USAGE)
+
+    project_dict = ProjectDict()
+    projects = []
+    for name in names or project_dict.names():
+        project = project_dict.get(name)
+        if project is None:
+            print(f"[bold red]Error:[/bold red] No project named '{name}' found!")
+            sys.exit(os.EX_USAGE)
+        projects.append(project)
+
+    width = max((len(project.name) for project in projects), default=0)
+    colors = ["cyan", "magenta", "green", "yellow", "blue", "red"]
+    prefixes = {
+        project.name: typer.style(project.name.ljust(width), fg=colors[i % len(colors)])
+        for i, project in enumerate(projects)
+    }
+    results = run_in_projects(
+        projects,
+        command,
+        jobs=jobs,
+        on_line=None
+        if json_output
+        else lambda name, line: typer.echo(f"{prefixes[name]} | {line}"),
+    )
+
+    failed = [result for result in results if result["exit_code"] != 0]
+    if json_output:
+        typer.echo(json.dumps({"command": command, "projects": results}, indent=2))
+    else:
+        for result in failed:
+            reason = (
+                "could not be started"
+                if result["exit_code"] is None
+                else f"failed with exit code {result['exit_code']}"
+            )
+            print(f"[bold red]Error:[/bold red] The command {reason} in '{result['name']}'.")
+        if not failed:
+            n_projects = f"{len(results)} project{'' if len(results) == 1 else 's'}"
+            print(f"✅ [bold green]Success:[/bold green] The command succeeded in {n_projects}.")
+    if failed:
         sys.exit(1)
 
-    typer.echo("🔧 Adding the AiiDA environment variables to the activate script.")
-    shell = load_shell(config.aiida_project_shell)
-    project.append_activate_text(shell.activate.format(env_file_path=project_path))
-    project.append_deactivate_text(shell.deactivate)
 
-    project_dict.add_project(project)
-    print("✅ [bold green]Success:[/bold green] Project created.")
+@wheelhouse_app.command("build")
+def wheelhouse_build(
+    core_version: str = "latest",
+    plugins: Annotated[
+        list[str], typer.Option("--plugin", "-p", help="Extra plugins to add.")
+    ] = [],
+    python: Annotated[
+        Optional[str],
+        typer.Option(
+            "--python",
+            help="Path to the Python interpreter the wheels should be compatible with.",
+        ),
+    ] = None,
+    wheelhouse: Annotated[
+        Optional[Path],
+        typer.Option("--wheelhouse", help="Directory for the wheels, if not the configured one."),
+    ] = None,
+) -> None:
+    """Download or build the wheels for AiiDA and its plugins into the wheelhouse."""
+    from rich import print
+
+    from ..api import aiida_packages, resolve_python
+    from ..config import get_config
+    from ..wheelhouse import build_wheelhouse
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
 
-    aiida_spec = "aiida-core"
-    if core_version != "latest":
-        aiida_spec += f"=={core_version}"
+    python_path = resolve_python(python)
+    if python_path is None:
+        print("[bold red]Error:[/bold red] Could not resolve path to Python binary.")
+        sys.exit(os.EX_USAGE)
 
-    packages = [aiida_spec, *plugins]
-    typer.echo(f"💾 Installing `{' '.join(packages)}`")
+    wheelhouse = wheelhouse or config.aiida_wheelhouse_dir
+    packages = aiida_packages(core_version, plugins)
+    typer.echo(f"📦 Adding the wheels for `{' '.join(packages)}` to {wheelhouse}")
     try:
-        project.install(packages)
+        requirements = build_wheelhouse(wheelhouse, packages, python_path)
     except CalledProcessError as e:
-        print("[bold red]Error:[/bold red] Package installation failed!")
+        print("[bold red]Error:[/bold red] Building the wheelhouse failed!")
         typer.echo(e)
-        typer.echo(e.stdout.decode())
         typer.echo(e.stderr.decode())
         sys.exit(1)
+    print(
+        f"✅ [bold green]Success:[/bold green] Added {len(requirements)} packages to the "
+        "wheelhouse. Use `--offline` to install from it."
+    )
+
+
+@app.command()
+def du(
+    names: Annotated[
+        Optional[list[str]], typer.Argument(help="Projects to measure, all if not specified.")
+    ] = None,
+) -> None:
+    """Show the disk space used by the environment and directory of each project."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rich import print
+    from rich.table import Table
+
+    from ..config import get_config
+    from ..disk import TreeUsage, UsageCache, format_size, tree_usage
+    from ..project import ProjectDict
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    project_dict = ProjectDict()
+    projects = []
+    for name in names or project_dict.names():
+        project = project_dict.get(name)
+        if project is None:
+            print(f"[bold red]Error:[/bold red] No project named '{name}' found!")
+            sys.exit(os.EX_USAGE)
+        projects.append(project)
+
+    cache = UsageCache(Path(config.aiida_cache_dir, "du.json"))
+    with ThreadPoolExecutor() as executor:
+        usages = list(
+            executor.map(
+                lambda project: (
+                    tree_usage(project.venv_path, cache),
+                    # The data of AiiDA grows in place, so project directories are always scanned
+                    tree_usage(project.project_path),
+                ),
+                projects,
+            )
+        )
+    cache.save(prune=not names)
+
+    table = Table("Project", "Environment", "Project directory", "Total")
+    for project, (venv_usage, project_usage) in zip(projects, usages):
+        table.add_row(
+            project.name,
+            format_size(venv_usage.total),
+            format_size(project_usage.total),
+            format_size(TreeUsage.combine([venv_usage, project_usage]).total),
+        )
+    total = TreeUsage.combine(usage for project_usages in usages for usage in project_usages)
+    table.add_section()
+    table.add_row("[bold]total[/]", "", "", f"[bold]{format_size(total.total)}[/]")
+    print(table)
+    print("Files hardlinked between projects are only counted once in the total.")
+
+
+@app.command()
+def gc(
+    dry_run: Annotated[
+        bool, typer.Option("--dry-run", help="Only report what can be removed, don't remove it.")
+    ] = False,
+    max_cache_size: Annotated[
+        Optional[str],
+        typer.Option(
+            "--max-cache-size",
+            help="Maximum size of the environment cache, e.g. `5GiB`. Defaults to the configured "
+            "`aiida_cache_max_size`, if any. The package cache of uv is pruned as well, but not "
+            "limited to this size.",
+        ),
+    ] = None,
+    force: Annotated[
+        bool, typer.Option("--force", "-f", help="Do not ask for confirmation.")
+    ] = False,
+    wait: Annotated[
+        bool,
+        typer.Option("--wait", help="Delete the files right away, instead of in the background."),
+    ] = False,
+) -> None:
+    """Remove orphaned environments and directories, dangling projects and unused caches."""
+    from pydantic import ByteSize, TypeAdapter, ValidationError
+    from rich import print
+    from rich.table import Table
+
+    from .. import garbage
+    from ..config import get_config
+    from ..disk import TreeUsage, UsageCache, format_size
+    from ..process import run
+    from ..project import ProjectDict
+    from ..uv import find_uv
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    max_size = config.aiida_cache_max_size
+    if max_cache_size is not None:
+        try:
+            max_size = TypeAdapter(ByteSize).validate_python(max_cache_size)
+        except ValidationError:
+            print(f"[bold red]Error:[/bold red] Invalid cache size '{max_cache_size}'.")
+            sys.exit(os.EX_USAGE)
+
+    project_dict = ProjectDict()
+    cache = UsageCache(Path(config.aiida_cache_dir, "du.json"))
+    items, incomplete = garbage.collect(project_dict, max_size, cache)
+    cache.save(prune=False)
+
+    for name in incomplete:
+        print(
+            f"[bold yellow]Warning:[/bold yellow] Project '{name}' is missing its environment or "
+            "directory, use `aiida-project sync` or `destroy` to fix it."
+        )
+    if not items:
+        print("[bold blue]Info:[/bold blue] Nothing to remove.")
+        return
+
+    table = Table("Kind", "Path", "Size")
+    for item in items:
+        table.add_row(item.kind, str(item.path), format_size(item.usage.total))
+    reclaimable = TreeUsage.combine(item.usage for item in items).total
+    table.add_section()
+    table.add_row("[bold]total[/]", "", f"[bold]{format_size(reclaimable)}[/]")
+    print(table)
+    if dry_run:
+        print(f"[bold blue]Info:[/bold blue] {format_size(reclaimable)} can be reclaimed.")
+        return
+
+    if not force:
+        typer.confirm(f"❗️ Are you sure you want to remove these {len(items)} items?", abort=True)
+
+    removed = garbage.remove(project_dict, items, wait=wait)
+    if max_size is not None:
+        try:
+            run([find_uv(), "cache", "prune"])
+        except CalledProcessError as e:
+            print(
+                f"[bold yellow]Warning:[/bold yellow] Could not prune the uv cache: "
+                f"{_error_summary(e)}"
+            )
+    if len(removed) < len(items):
+        print(
+            f"[bold yellow]Warning:[/bold yellow] Skipped {len(items) - len(removed)} items that "
+            "are in use by another command."
+        )
+    freed = TreeUsage.combine(item.usage for item in removed).total
+    print(
+        f"✅ [bold green]Success:[/bold green] Removed {len(removed)} items, freeing "
+        f"{format_size(freed)}."
+    )
+
+
+@app.command()
+def dedupe(
+    dry_run: Annotated[
+        bool, typer.Option("--dry-run", help="Only report the duplicates, don't link them.")
+    ] = False,
+) -> None:
+    """Replace identical files in the environments of all projects by hardlinks."""
+    from rich import print
+
+    from ..cache import site_packages
+    from ..config import get_config
+    from ..disk import find_duplicates, format_size, link_duplicates
+    from ..project import ProjectDict
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    directories = []
+    for project in ProjectDict().projects.values():
+        try:
+            directories.append(site_packages(project.venv_path))
+        except StopIteration:
+            continue
+
+    typer.echo(f"🔍 Looking for identical files in {len(directories)} environments.")
+    groups = find_duplicates(directories)
+    n_files = sum(len(paths) for group in groups for _, paths in group.duplicates)
+    if dry_run:
+        n_bytes = sum(group.size * len(group.duplicates) for group in groups)
+        print(
+            f"[bold blue]Info:[/bold blue] Found {n_files} duplicate files, taking up "
+            f"{format_size(n_bytes)}."
+        )
+        return
+
+    replaced, freed = 0, 0
+    for group in groups:
+        group_replaced, group_freed = link_duplicates(group)
+        replaced += group_replaced
+        freed += group_freed
+    print(
+        f"✅ [bold green]Success:[/bold green] Replaced {replaced} files by hardlinks, freeing "
+        f"{format_size(freed)}."
+    )
 
 
 @app.command()
@@ -190,19 +1296,24 @@ def destroy(
     force: Annotated[
         bool, typer.Option("--force", "-f", help="Do not ask for confirmation.")
     ] = False,
+    wait: Annotated[
+        bool,
+        typer.Option("--wait", help="Delete the files right away, instead of in the background."),
+    ] = False,
 ) -> None:
     """Fully remove both the virtual environment and project directory."""
-    from ..config import ProjectConfig
+    import asyncio
+
+    from rich import print
+
+    from .. import api
+    from ..config import get_config
     from ..project import ProjectDict
 
-    if ProjectConfig().is_not_initialised():
+    if get_config().is_not_initialised():
         sys.exit(os.EX_CONFIG)
 
-    project_dict = ProjectDict()
-
-    try:
-        project = project_dict.projects[name]
-    except KeyError:
+    if name not in ProjectDict():
         print(f"[bold red]Error:[/bold red] No project named '{name}' found!")
         sys.exit(os.EX_USAGE)
 
@@ -213,6 +1324,226 @@ def destroy(
             abort=True,
         )
 
-    project.destroy()
-    project_dict.remove_project(name)
+    try:
+        asyncio.run(api.destroy(name, wait=wait))
+    except api.ProjectLockedError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_TEMPFAIL)
+    except api.ProjectNotFoundError as e:
+        print(f"[bold red]Error:[/bold red] {e}")
+        sys.exit(os.EX_USAGE)
     print(f"[bold green]Success:[/bold green] Project '{name}' has been destroyed.")
+
+
+def _trash_dirs() -> list[Path]:
+    """Return the trash directories of the configured project and environment directories."""
+    from ..config import get_config
+    from ..trash import TRASH_DIR_NAME
+
+    config = get_config()
+    return sorted(
+        {
+            Path(directory, TRASH_DIR_NAME)
+            for directory in (config.aiida_project_dir, config.aiida_venv_dir)
+        }
+    )
+
+
+@python_app.command("list")
+def python_list(
+    rescan: Annotated[
+        bool, typer.Option("--rescan", help="Probe all interpreters again, ignoring the cache.")
+    ] = False,
+) -> None:
+    """Show the Python interpreters on the `PATH` and installed by `pyenv` or `uv`."""
+    from rich import print
+    from rich.table import Table
+
+    from ..config import get_config
+    from ..interpreters import InterpreterInventory
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    cache_file = Path(config.aiida_cache_dir, "interpreters.json")
+    if rescan:
+        cache_file.unlink(missing_ok=True)
+    table = Table("Version", "Implementation", "Machine", "Source", "Path")
+    for interpreter in InterpreterInventory(cache_file).interpreters():
+        table.add_row(
+            interpreter["version"],
+            interpreter["implementation"],
+            interpreter["machine"],
+            interpreter["source"],
+            interpreter["path"],
+        )
+    print(table)
+
+
+@trash_app.command("status")
+def trash_status() -> None:
+    """Show the destroyed projects that are still being deleted."""
+    from rich import print
+    from rich.table import Table
+
+    from ..config import get_config
+    from ..trash import purge_pid, trash_entries
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    table = Table("Trash directory", "Entries", "Status")
+    for trash in _trash_dirs():
+        entries = trash_entries(trash)
+        pid = purge_pid(trash)
+        if pid is not None:
+            status = f"[yellow]deleting[/] (PID {pid})"
+        elif entries:
+            status = "[red]stopped[/], run `aiida-project trash purge` to resume"
+        else:
+            status = "[green]empty[/]"
+        table.add_row(str(trash), str(len(entries)), status)
+    print(table)
+
+
+@trash_app.command("purge")
+def trash_purge(
+    wait: Annotated[
+        bool,
+        typer.Option("--wait", help="Delete the files right away, instead of in the background."),
+    ] = False,
+) -> None:
+    """Resume deleting the destroyed projects."""
+    from rich import print
+
+    from ..config import get_config
+    from ..trash import purge, purge_pid, start_purge
+
+    if get_config().is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    if wait:
+        for trash in _trash_dirs():
+            if purge(trash):
+                print(f"[bold green]Success:[/bold green] '{trash}' has been emptied.")
+            else:
+                print(
+                    f"[bold blue]Info:[/bold blue] '{trash}' is already being deleted "
+                    f"(PID {purge_pid(trash)})."
+                )
+    else:
+        start_purge(_trash_dirs())
+        print("[bold blue]Info:[/bold blue] Deleting the trash in the background.")
+
+
+@pool_app.command("fill")
+def pool_fill(  # noqa: PLR0913
+    size: Annotated[
+        int, typer.Option("--size", "-n", help="Number of spare environments to keep.")
+    ] = 2,
+    core_version: str = "latest",
+    plugins: Annotated[
+        list[str], typer.Option("--plugin", "-p", help="Extra plugins to install.")
+    ] = [],
+    python: Annotated[
+        Optional[str],
+        typer.Option(
+            "--python",
+            help="Path, name or version (e.g. `3.11`) of the Python interpreter to use.",
+        ),
+    ] = None,
+    offline: OfflineOption = False,
+    wheelhouse: WheelhouseOption = None,
+    compile_bytecode: CompileBytecodeOption = True,
+    wait: Annotated[
+        bool,
+        typer.Option("--wait", help="Build the spares right away, instead of in the background."),
+    ] = False,
+) -> None:
+    """Keep spare environments with AiiDA and the plugins, to be claimed by `create`."""
+    from rich import print
+
+    from ..api import aiida_packages, resolve_python
+    from ..config import get_config
+    from ..pool import EnvironmentPool, pool_dir, pool_key
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    python_path = resolve_python(python)
+    if python_path is None:
+        print("[bold red]Error:[/bold red] Could not resolve path to Python binary.")
+        sys.exit(os.EX_USAGE)
+    wheelhouse = _offline_wheelhouse(offline, wheelhouse, [EngineType.venv])
+
+    packages = aiida_packages(core_version, plugins)
+    pool = EnvironmentPool(pool_dir(config.aiida_venv_dir))
+    key = pool_key(python_path, packages, wheelhouse, compile_bytecode)
+    pool.set_target(key, python_path, packages, size, wheelhouse, compile_bytecode)
+    if not wait:
+        pool.start_fill([key])
+        print(f"[bold blue]Info:[/bold blue] Preparing {size} spares in the background.")
+        return
+
+    pid = pool.fill_pid(key)
+    if pid is not None:
+        print(f"[bold blue]Info:[/bold blue] The spares are already being prepared (PID {pid}).")
+        return
+    try:
+        pool.fill(key)
+    except CalledProcessError as e:
+        print(f"[bold red]Error:[/bold red] Could not prepare a spare: {_error_summary(e)}")
+        sys.exit(1)
+    print(f"[bold green]Success:[/bold green] {len(pool.spares(key))} spare environments ready.")
+
+
+@pool_app.command("status")
+def pool_status() -> None:
+    """Show the spare environments in the pool."""
+    from rich import print
+    from rich.table import Table
+
+    from ..config import get_config
+    from ..pool import EnvironmentPool, pool_dir
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    pool = EnvironmentPool(pool_dir(config.aiida_venv_dir))
+    table = Table("Python", "Packages", "Spares", "Status")
+    for key, target in pool.targets().items():
+        pid = pool.fill_pid(key)
+        spares = len(pool.spares(key))
+        if pid is not None:
+            status = f"[yellow]filling[/] (PID {pid})"
+        elif spares < target["size"]:
+            status = "[red]stopped[/], run `aiida-project pool fill` to resume"
+        else:
+            status = "[green]ready[/]"
+        table.add_row(
+            target["python"], " ".join(target["packages"]), f"{spares}/{target['size']}", status
+        )
+    print(table)
+
+
+@pool_app.command("clear")
+def pool_clear() -> None:
+    """Remove all spare environments, and stop preparing new ones."""
+    from rich import print
+
+    from ..config import get_config
+    from ..pool import pool_dir
+    from ..trash import move_to_trash, start_purge, trash_dir
+
+    config = get_config()
+    if config.is_not_initialised():
+        sys.exit(os.EX_CONFIG)
+
+    pool_path = pool_dir(config.aiida_venv_dir)
+    # Processes filling the pool stop once its targets are gone
+    if move_to_trash(pool_path) is not None:
+        start_purge([trash_dir(pool_path)])
+    print("[bold green]Success:[/bold green] The pool has been cleared.")
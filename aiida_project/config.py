@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+from functools import cache
 from pathlib import Path
 from typing import Any
 
 import dotenv
+from pydantic import ByteSize
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from rich import print
 
@@ -21,15 +23,25 @@ class ProjectConfig(BaseSettings):
 
     aiida_venv_dir: Path = Path(Path.home(), ".aiida_venvs")
     aiida_project_dir: Path = Path(Path.home(), "project")
+    aiida_cache_dir: Path = Path(Path.home(), ".cache", "aiida-project")
+    aiida_cache_max_size: ByteSize | None = None
+    aiida_wheelhouse_dir: Path = Path(Path.home(), ".aiida_wheelhouse")
+    aiida_conda_channels: list[str] = ["conda-forge"]
     aiida_default_python_path: Path | None = None
+    aiida_python_mirror: str | None = None
     aiida_project_structure: dict[str, Any] = DEFAULT_PROJECT_STRUCTURE
     aiida_project_shell: str = "bash"
     model_config = SettingsConfigDict(
         env_file=Path.home() / Path(".aiida_project.env"), env_file_encoding="utf-8"
     )
 
+    @property
+    def initialised(self) -> bool:
+        """Whether `aiida-project init` has been run."""
+        return dotenv.get_key(self.model_config["env_file"], "aiida_project_shell") is not None  # type: ignore[arg-type]
+
     def is_not_initialised(self) -> bool:
-        if dotenv.get_key(self.model_config["env_file"], "aiida_project_shell") is None:  # type: ignore[arg-type]
+        if not self.initialised:
             print("[bold red]Error:[/bold red] The AiiDA project config has not been initialised.")
             print("[bold blue]Info:[/bold blue] Please run `aiida-project init` to get started.")
             return True
@@ -38,3 +50,31 @@ class ProjectConfig(BaseSettings):
 
     def set_key(self, key: str, value: Any) -> None:
         dotenv.set_key(self.model_config["env_file"], key, value)  # type: ignore[arg-type]
+        self.render_env_snippets()
+        get_config.cache_clear()
+
+    def env_snippet_path(self, shell: str) -> Path:
+        """Path to the snippet that exports the configuration values in the ``shell``."""
+        return Path(self.model_config["env_file"]).with_suffix(f".{shell}")  # type: ignore[arg-type]
+
+    def render_env_snippets(self) -> None:
+        """Render the configuration file as a snippet that can be sourced by each shell.
+
+        This way, starting a new shell doesn't require any processes to parse the configuration.
+        """
+        from .enums import ShellType
+        from .project.base import replace_text
+        from .shell import load_shell
+
+        values = dotenv.dotenv_values(self.model_config["env_file"])  # type: ignore[arg-type]
+        for shell_type in ShellType:
+            replace_text(
+                self.env_snippet_path(shell_type.value),
+                load_shell(shell_type.value).render_env(values),
+            )
+
+
+@cache
+def get_config() -> ProjectConfig:
+    """Return the `aiida-project` configuration, only reading it once per process."""
+    return ProjectConfig()
@@ -0,0 +1,265 @@
+"""Measuring and reducing the disk space used by projects."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+BLOCK_SIZE = 512
+"""Size of the blocks counted by `st_blocks`."""
+UNIT_FACTOR = 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 8
+
+
+def format_size(size: float) -> str:
+    """Format a number of bytes for humans, e.g. `1.5 GiB`."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < UNIT_FACTOR:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= UNIT_FACTOR
+    return f"{size:.1f} TiB"
+
+
+class UsageCache:
+    """Cache of the disk usage of the entries in each directory, keyed by its path.
+
+    The entries of a directory are only looked at again when its modification time changed, i.e.
+    when entries were added, removed or renamed. Files that are modified in place are not noticed,
+    so the cache is only meant for environments, in which installers replace files rather than
+    writing to them. Project directories hold e.g. databases and repositories that grow in place.
+    """
+
+    def __init__(self, cache_file: Path) -> None:
+        self.cache_file = cache_file
+        try:
+            self.entries: dict[str, dict[str, Any]] = json.loads(cache_file.read_text())
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        self.used: dict[str, dict[str, Any]] = {}
+
+    def get(self, directory: str, mtime_ns: int) -> dict[str, Any] | None:
+        entry = self.entries.get(directory)
+        if entry is None or entry["mtime_ns"] != mtime_ns:
+            return None
+        self.used[directory] = entry
+        return entry
+
+    def put(self, directory: str, entry: dict[str, Any]) -> None:
+        self.used[directory] = entry
+
+    def save(self, prune: bool = True) -> None:
+        """Write the cache to disk.
+
+        With ``prune``, only the entries used since loading the cache are kept, so those of
+        removed trees are dropped.
+        """
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{uuid.uuid4().hex}")
+        entries = self.used if prune else {**self.entries, **self.used}
+        tmp_file.write_text(json.dumps(entries))
+        os.replace(tmp_file, self.cache_file)
+
+
+class TreeUsage:
+    """Disk usage of a tree, where files with several hardlinks are only counted once."""
+
+    def __init__(self) -> None:
+        self.size = 0
+        """Disk usage of the directories and the files with a single link."""
+        self.linked: dict[str, int] = {}
+        """Disk usage of each file with several links, keyed by its device and inode."""
+
+    @property
+    def total(self) -> int:
+        return self.size + sum(self.linked.values())
+
+    @classmethod
+    def combine(cls, usages: Iterable[TreeUsage]) -> TreeUsage:
+        """Combine the usage of several trees, counting files linked between them once."""
+        combined = cls()
+        for usage in usages:
+            combined.size += usage.size
+            combined.linked.update(usage.linked)
+        return combined
+
+
+def tree_usage(path: Path, cache: UsageCache | None = None) -> TreeUsage:
+    """Measure the disk usage of the tree at ``path``, like `du` does.
+
+    Only pass a ``cache`` for trees of which the files are never modified in place.
+    """
+    usage = TreeUsage()
+    directories = [path.as_posix()]
+    while directories:
+        directory = directories.pop()
+        try:
+            stat = os.lstat(directory)
+        except FileNotFoundError:
+            continue
+        entry = None if cache is None else cache.get(directory, stat.st_mtime_ns)
+        if entry is None:
+            entry = _scan_directory(directory, stat.st_mtime_ns)
+            if cache is not None:
+                cache.put(directory, entry)
+        usage.size += stat.st_blocks * BLOCK_SIZE + entry["size"]
+        usage.linked.update(entry["linked"])
+        directories.extend(os.path.join(directory, name) for name in entry["dirs"])
+    return usage
+
+
+def _scan_directory(directory: str, mtime_ns: int) -> dict[str, Any]:
+    size = 0
+    linked: dict[str, int] = {}
+    dirs: list[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.name)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_nlink > 1:
+                    linked[f"{stat.st_dev}:{stat.st_ino}"] = stat.st_blocks * BLOCK_SIZE
+                else:
+                    size += stat.st_blocks * BLOCK_SIZE
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return {"mtime_ns": mtime_ns, "size": size, "linked": linked, "dirs": dirs}
+
+
+def walk_files(directory: Path) -> Iterator[os.DirEntry[str]]:
+    """Yield the regular files in the tree at ``directory``, without following symlinks."""
+    directories = [directory.as_posix()]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 hash of the contents of the file at ``path``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DuplicateGroup:
+    """Identical files of ``size`` bytes, as the number of links and found paths of each inode."""
+
+    def __init__(self, size: int, inodes: list[tuple[int, list[str]]]) -> None:
+        self.size = size
+        # Link to the inode with most links, so most paths already point to the right inode
+        self.inodes = sorted(inodes, key=lambda inode: len(inode[1]), reverse=True)
+
+    @property
+    def source(self) -> str:
+        return self.inodes[0][1][0]
+
+    @property
+    def duplicates(self) -> list[tuple[int, list[str]]]:
+        """The inodes to replace by links to the `source`."""
+        return self.inodes[1:]
+
+
+def find_duplicates(
+    directories: list[Path], workers: int = DEFAULT_WORKERS
+) -> list[DuplicateGroup]:
+    """Find the identical files in the ``directories``, first comparing sizes, then hashes.
+
+    Only files on the same device, with the same permissions, can be linked, so they are only
+    compared with each other.
+    """
+
+    def scan(directory: Path) -> list[tuple[tuple[int, int, int], int, int, str]]:
+        files = []
+        for entry in walk_files(directory):
+            stat = entry.stat(follow_symlinks=False)
+            key = (stat.st_dev, stat.st_size, stat.st_mode)
+            files.append((key, stat.st_ino, stat.st_nlink, entry.path))
+        return files
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Same size, device and mode -> inode -> (number of links, paths)
+        candidates: dict[tuple[int, int, int], dict[int, tuple[int, list[str]]]] = {}
+        for files in executor.map(scan, directories):
+            for key, inode, nlink, path in files:
+                candidates.setdefault(key, {}).setdefault(inode, (nlink, []))[1].append(path)
+        candidates = {key: inodes for key, inodes in candidates.items() if len(inodes) > 1}
+
+        to_hash = [
+            (key, inode, paths[0])
+            for key, inodes in candidates.items()
+            for inode, (_, paths) in inodes.items()
+        ]
+        digests = executor.map(lambda item: file_digest(item[2]), to_hash)
+        groups: dict[tuple[tuple[int, int, int], str], list[tuple[int, list[str]]]] = {}
+        for (key, inode, _), digest in zip(to_hash, digests):
+            nlink, paths = candidates[key][inode]
+            groups.setdefault((key, digest), []).append((nlink, paths))
+
+    return [
+        DuplicateGroup(key[1], inodes) for (key, _), inodes in groups.items() if len(inodes) > 1
+    ]
+
+
+def link_duplicates(group: DuplicateGroup) -> tuple[int, int]:
+    """Replace all duplicates in the ``group`` by hardlinks to the same file.
+
+    Returns the number of replaced files and the number of bytes freed, which only counts the
+    duplicates of which all links were found.
+    """
+    replaced, freed = 0, 0
+    for nlink, paths in group.duplicates:
+        for path in paths:
+            tmp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.tmp")
+            os.link(group.source, tmp_path)
+            os.replace(tmp_path, path)
+        replaced += len(paths)
+        if nlink == len(paths):
+            freed += group.size
+    return replaced, freed
+
+
+def copy_tree(source: Path, target: Path, exclude: Iterable[str] = ()) -> None:
+    """Copy the entries of the ``source`` directory into ``target``, except those in ``exclude``.
+
+    The files are copied rather than hardlinked, since they can be changed in place, e.g. SQLite
+    databases. On Linux, GNU `cp` makes reflinks instead, i.e. copy-on-write clones that don't
+    take extra space, on filesystems that support them (e.g. Btrfs or XFS).
+    """
+    target.mkdir(parents=True, exist_ok=True)
+    excluded = set(exclude)
+    entries = [entry for entry in os.scandir(source) if entry.name not in excluded]
+    if not entries:
+        return
+    if sys.platform == "linux":
+        try:
+            subprocess.run(
+                ["cp", "-a", "--reflink=auto", *(entry.path for entry in entries), str(target)],
+                capture_output=True,
+                check=True,
+            )
+            return
+        except (OSError, subprocess.CalledProcessError):
+            # E.g. the `cp` of BusyBox, which doesn't make reflinks
+            pass
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            shutil.copytree(entry.path, Path(target, entry.name), symlinks=True, dirs_exist_ok=True)
+        else:
+            shutil.copy2(entry.path, Path(target, entry.name), follow_symlinks=False)
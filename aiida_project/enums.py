@@ -0,0 +1,30 @@
+"""Enumerations used in the command line interface.
+
+These are kept in a separate module without any third-party imports, so the CLI can define its
+options without importing the (comparatively slow to import) project and shell modules.
+"""
+
+from enum import Enum
+
+
+class EngineType(str, Enum):
+    venv = "venv"
+    conda = "conda"
+
+
+class ShellType(str, Enum):
+    bash = "bash"
+    zsh = "zsh"
+    fish = "fish"
+
+
+class LogFormat(str, Enum):
+    text = "text"
+    json = "json"
+
+
+class Compression(str, Enum):
+    auto = "auto"
+    zstd = "zstd"
+    pigz = "pigz"
+    gzip = "gzip"
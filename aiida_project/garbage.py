@@ -0,0 +1,241 @@
+"""Finding what failed or interrupted commands left behind, and what the caches no longer need.
+
+Four kinds of garbage are collected:
+
+- Orphans: environments and project directories in the configured directories that were made for
+  a project that isn't registered anymore. Only directories with the owner file written by
+  `aiida-project` are considered, so other environments in a shared directory (e.g.
+  `$WORKON_HOME`) and directories created by hand are left alone.
+- Dangling entries: registered projects of which both the environment and directory are gone.
+- Pool builds: spare environments that were being built by a process that no longer runs.
+- Layers: the least recently used environment layers, once the layer cache exceeds its maximum
+  size, and layers that were never completely stored.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .cache import LayerCache
+from .config import get_config
+from .disk import DEFAULT_WORKERS, TreeUsage, UsageCache, tree_usage
+from .locking import ProjectLock
+from .pool import EnvironmentPool, pool_dir
+from .project import ProjectDict
+from .project.base import ENVIRONMENT_OWNER_FILE, PROJECT_OWNER_FILE, read_owner
+from .trash import move_to_trash, purge, start_purge, trash_dir
+
+ORPHAN_ENVIRONMENT = "orphaned environment"
+ORPHAN_PROJECT_DIR = "orphaned project directory"
+DANGLING_ENTRY = "dangling registry entry"
+POOL_BUILD = "stale pool build"
+LAYER = "cached layer"
+STALE_TMP_AGE_S = 3600
+"""Age after which an incomplete layer can't be stored by a running process anymore."""
+
+
+class Garbage:
+    """An item that can be removed: a tree at ``path``, or the registry entry of ``name``."""
+
+    def __init__(self, kind: str, path: Path, name: str | None = None) -> None:
+        self.kind = kind
+        self.path = path
+        self.name = name
+        self.usage = TreeUsage()
+
+
+def _is_held(lock: ProjectLock) -> bool:
+    """Check if another process holds the ``lock``, e.g. because it's creating a project."""
+    try:
+        lock.acquire()
+    except BlockingIOError:
+        return True
+    lock.release()
+    return False
+
+
+def find_orphans(project_dict: ProjectDict) -> list[Garbage]:
+    """Return the environments and project directories that don't belong to any project."""
+    config = get_config()
+    registered_paths: set[str] = set()
+    for name in project_dict.names():
+        project = project_dict.get(name)
+        if project is not None:
+            registered_paths.update(
+                os.path.realpath(path) for path in (project.venv_path, project.project_path)
+            )
+
+    orphans = []
+    for directory, owner_file, kind in (
+        (config.aiida_venv_dir, ENVIRONMENT_OWNER_FILE, ORPHAN_ENVIRONMENT),
+        (config.aiida_project_dir, PROJECT_OWNER_FILE, ORPHAN_PROJECT_DIR),
+    ):
+        if not directory.is_dir():
+            continue
+        for entry in os.scandir(directory):
+            # Dot directories hold the registry, trash and pool
+            if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                continue
+            owner = read_owner(Path(entry.path), owner_file)
+            if (
+                owner is None
+                or project_dict.registered(owner)
+                or os.path.realpath(entry.path) in registered_paths
+                or _is_held(project_dict.lock(owner))
+            ):
+                continue
+            orphans.append(Garbage(kind, Path(entry.path), owner))
+    return orphans
+
+
+def find_dangling(project_dict: ProjectDict) -> tuple[list[Garbage], list[str]]:
+    """Return the dangling registry entries, and the projects of which only one part is gone."""
+    dangling: list[Garbage] = []
+    incomplete: list[str] = []
+    for name in project_dict.names():
+        project = project_dict.get(name)
+        if project is None:
+            continue
+        missing = [not path.exists() for path in (project.venv_path, project.project_path)]
+        if all(missing):
+            dangling.append(Garbage(DANGLING_ENTRY, project.project_path, name))
+        elif any(missing):
+            incomplete.append(name)
+    return dangling, incomplete
+
+
+def find_pool_builds() -> list[Garbage]:
+    """Return the spare environments whose build was interrupted."""
+    pool = EnvironmentPool(pool_dir(get_config().aiida_venv_dir))
+    if not pool.path.is_dir() or any(_is_held(pool.lock(key)) for key in pool.targets()):
+        return []
+    return [Garbage(POOL_BUILD, path) for path in sorted(pool.path.glob(".build-*"))]
+
+
+def find_stale_layers() -> list[Garbage]:
+    """Return the layers that were never completely stored, e.g. because `create` was killed."""
+    layers_path = LayerCache(get_config().aiida_cache_dir).layers_path
+    cutoff = time.time() - STALE_TMP_AGE_S
+    return [
+        Garbage(LAYER, path)
+        for path in sorted(layers_path.glob(".tmp-*"))
+        if path.is_dir() and not path.is_symlink() and path.lstat().st_mtime < cutoff
+    ]
+
+
+def measure(items: list[Garbage], cache: UsageCache, workers: int = DEFAULT_WORKERS) -> None:
+    """Measure the disk usage of the trees of all ``items`` in parallel."""
+
+    def measure_item(item: Garbage) -> None:
+        if item.kind == ORPHAN_PROJECT_DIR:
+            # The data of AiiDA grows in place, so project directories are always scanned
+            item.usage = tree_usage(item.path)
+        elif item.kind != DANGLING_ENTRY:
+            item.usage = tree_usage(item.path, cache)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(measure_item, items))
+
+
+def evict_layers(max_size: int, cache: UsageCache, workers: int = DEFAULT_WORKERS) -> list[Garbage]:
+    """Return the least recently used layers to remove to bring the cache below ``max_size``.
+
+    Using a layer updates the modification time of its metadata file, so the layers are kept
+    from the most to the least recently used, until the next one would exceed the maximum size.
+    Files shared by several layers are only counted once.
+    """
+    layers_path = LayerCache(get_config().aiida_cache_dir).layers_path
+    layers = []
+    for entry in os.scandir(layers_path):
+        if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            last_used = Path(entry.path, "layer.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        layers.append((last_used, Garbage(LAYER, Path(entry.path))))
+    layers.sort(key=lambda layer: layer[0], reverse=True)
+    items = [item for _, item in layers]
+    measure(items, cache, workers)
+
+    kept = TreeUsage()
+    for i, item in enumerate(items):
+        combined = TreeUsage.combine([kept, item.usage])
+        if combined.total > max_size:
+            return items[i:]
+        kept = combined
+    return []
+
+
+def collect(
+    project_dict: ProjectDict, max_cache_size: int | None, cache: UsageCache
+) -> tuple[list[Garbage], list[str]]:
+    """Return all garbage, and the projects of which only the environment or directory is gone.
+
+    The layer cache is only pruned if a ``max_cache_size`` is given.
+    """
+    dangling, incomplete = find_dangling(project_dict)
+    items = [*find_orphans(project_dict), *dangling, *find_pool_builds(), *find_stale_layers()]
+    measure(items, cache)
+    if max_cache_size is not None:
+        items += evict_layers(max_cache_size, cache)
+    return items, incomplete
+
+
+def _remove_project_item(project_dict: ProjectDict, item: Garbage) -> bool:
+    """Remove an orphan or dangling entry while holding the lock of its project, if possible."""
+    assert item.name is not None
+    lock = project_dict.lock(item.name)
+    try:
+        lock.acquire()
+    except BlockingIOError:
+        return False
+    try:
+        # Check again, the project might have been created or restored in the meantime
+        if item.kind == DANGLING_ENTRY:
+            project = project_dict.get(item.name)
+            if project is None or project.venv_path.exists() or project.project_path.exists():
+                return False
+            project_dict.remove_project(item.name)
+            return True
+        if project_dict.registered(item.name):
+            return False
+        move_to_trash(item.path)
+        return True
+    finally:
+        # The project is not registered, so its lock file is not needed anymore
+        if not project_dict.registered(item.name):
+            lock.remove()
+        lock.release()
+
+
+def remove(project_dict: ProjectDict, items: list[Garbage], wait: bool = False) -> list[Garbage]:
+    """Remove the ``items``, moving their trees to the trash, and return the removed items.
+
+    Orphans and dangling entries are skipped if another command is working on their project.
+    The aliases of removed layers are removed as well. The trash is emptied in the background,
+    unless ``wait`` is set.
+    """
+    removed = []
+    for item in items:
+        if item.name is not None and not _remove_project_item(project_dict, item):
+            continue
+        if item.name is None:
+            move_to_trash(item.path)
+        removed.append(item)
+
+    if any(item.kind == LAYER for item in removed):
+        layers_path = LayerCache(get_config().aiida_cache_dir).layers_path
+        for alias in layers_path.iterdir():
+            if alias.is_symlink() and not alias.exists():
+                alias.unlink(missing_ok=True)
+    trash_dirs = sorted({trash_dir(item.path) for item in removed if item.kind != DANGLING_ENTRY})
+    if wait:
+        for trash in trash_dirs:
+            purge(trash)
+    else:
+        start_purge(trash_dirs)
+    return removed
@@ -0,0 +1,242 @@
+"""Inventory of the Python interpreters available to create environments with.
+
+Interpreters are looked for in the directories on the `PATH`, and in the installation directories
+of `pyenv` and `uv`. Probing an interpreter for its version means starting it, so the results
+are cached on disk per directory, and a directory is only scanned again when its modification
+time changed, i.e. when interpreters were added to or removed from it. An interpreter is probed
+again when its executable changes, e.g. when it's upgraded in place. Failed probes, e.g. that
+timed out on a slow filesystem, are retried when their directory is scanned again, or after
+`FAILED_PROBE_TTL_S`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+EXECUTABLE_PATTERN = re.compile(r"(python|pypy)(\d+(\.\d+)?)?")
+"""Names of the interpreter executables in the `bin` directories."""
+REQUEST_PATTERN = re.compile(r"(?:(cpython|pypy|graalpy)[@-]?)?(\d+(?:\.\d+){0,2})")
+"""Requested versions, e.g. `3.11`, `3.11.4`, `pypy3.10` or `cpython@3.12`."""
+PROBE_CODE = (
+    "import json, platform, sys; print(json.dumps({'version': platform.python_version(), "
+    "'implementation': sys.implementation.name, 'machine': platform.machine()}))"
+)
+PROBE_TIMEOUT = 10
+FAILED_PROBE_TTL_S = 3600
+DEFAULT_WORKERS = 8
+
+
+def search_directories() -> list[tuple[str, Path]]:
+    """Return the directories to look for interpreters in, with the source of each one.
+
+    The directories on the `PATH` contain executables directly, the installation directories of
+    `pyenv` and `uv` contain a directory with a `bin` directory for each installed version.
+    """
+    directories = []
+    pyenv_root = Path(os.environ.get("PYENV_ROOT", Path(Path.home(), ".pyenv")))
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        # The `pyenv` shims only run the currently selected version, if any
+        if directory and Path(directory) != Path(pyenv_root, "shims"):
+            directories.append(("path", Path(directory)))
+    directories.append(("pyenv", Path(pyenv_root, "versions")))
+    directories.append(("uv", uv_python_dir()))
+    return directories
+
+
+def uv_python_dir() -> Path:
+    """Return the directory `uv` installs Python versions in, like `uv python dir` does."""
+    if "UV_PYTHON_INSTALL_DIR" in os.environ:
+        return Path(os.environ["UV_PYTHON_INSTALL_DIR"])
+    data_home = os.environ.get("XDG_DATA_HOME") or Path(Path.home(), ".local", "share")
+    return Path(data_home, "uv", "python")
+
+
+def _scan_directory(source: str, directory: Path) -> list[str]:
+    """Return the interpreter executables in the ``directory``."""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return []
+    if source == "path":
+        return [
+            entry.path
+            for entry in entries
+            if EXECUTABLE_PATTERN.fullmatch(entry.name) and os.access(entry.path, os.X_OK)
+        ]
+    executables = []
+    for entry in entries:
+        for name in ("python3", "pypy3", "python"):
+            executable = os.path.join(entry.path, "bin", name)
+            if os.access(executable, os.X_OK):
+                executables.append(executable)
+                break
+    return executables
+
+
+def probe(executable: str) -> dict[str, Any] | None:
+    """Run the ``executable`` to find its version, implementation and architecture."""
+    try:
+        result = subprocess.run(
+            [executable, "-I", "-c", PROBE_CODE],
+            capture_output=True,
+            text=True,
+            timeout=PROBE_TIMEOUT,
+            check=True,
+        )
+        info: dict[str, Any] = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    return info
+
+
+def _file_stamp(path: str) -> list[int] | None:
+    """Return the modification time and size of the file at ``path``, to detect changes."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _is_outdated(probe_entry: Any, stamp: list[int] | None, retry_failed: bool) -> bool:
+    """Check if the cached probe of an interpreter has to be run again."""
+    if not isinstance(probe_entry, dict) or probe_entry.get("stamp") != stamp:
+        return True
+    if probe_entry["info"] is None:
+        return retry_failed or time.time() - probe_entry["probed"] > FAILED_PROBE_TTL_S
+    return False
+
+
+def parse_request(request: str) -> tuple[str | None, tuple[int, ...]] | None:
+    """Parse a requested version into the implementation (if any) and the version numbers."""
+    match = REQUEST_PATTERN.fullmatch(request.strip().lower())
+    if match is None:
+        return None
+    return match.group(1), tuple(int(part) for part in match.group(2).split("."))
+
+
+def version_tuple(version: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in re.findall(r"\d+", version)[:3])
+
+
+class InterpreterInventory:
+    """Interpreters found in the search directories, cached in the ``cache_file``."""
+
+    def __init__(self, cache_file: Path) -> None:
+        self.cache_file = cache_file
+        try:
+            self._cache: dict[str, Any] = json.loads(cache_file.read_text())
+        except (FileNotFoundError, ValueError):
+            self._cache = {}
+        self._cache.setdefault("directories", {})
+        self._cache.setdefault("interpreters", {})
+
+    def interpreters(self) -> list[dict[str, Any]]:
+        """Return all interpreters, in the order of the search directories.
+
+        Each interpreter is returned once, for the first executable that runs it, with the
+        ``path`` of that executable and the ``source`` of the directory it was found in.
+        """
+        updated = False
+        found: list[tuple[str, str, str]] = []
+        rescanned: set[str] = set()
+        directories: dict[str, Any] = {}
+        for source, directory in search_directories():
+            try:
+                mtime_ns = directory.stat().st_mtime_ns
+            except OSError:
+                continue
+            entry = self._cache["directories"].get(str(directory))
+            if entry is None or entry["mtime_ns"] != mtime_ns:
+                executables = _scan_directory(source, directory)
+                entry = {
+                    "mtime_ns": mtime_ns,
+                    "executables": {path: os.path.realpath(path) for path in executables},
+                }
+                rescanned.update(entry["executables"].values())
+                updated = True
+            directories[str(directory)] = entry
+            found.extend((source, path, real) for path, real in entry["executables"].items())
+
+        cached = self._cache["interpreters"]
+        probes: dict[str, dict[str, Any]] = {}
+        to_probe = []
+        for real in dict.fromkeys(real for _, _, real in found):
+            stamp = _file_stamp(real)
+            probes[real] = cached.get(real)
+            if _is_outdated(probes[real], stamp, retry_failed=real in rescanned):
+                probes[real] = {"stamp": stamp, "probed": time.time(), "info": None}
+                to_probe.append(real)
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=DEFAULT_WORKERS) as executor:
+                for real, info in zip(to_probe, executor.map(probe, to_probe)):
+                    probes[real]["info"] = info
+            updated = True
+
+        if updated or probes.keys() != cached.keys():
+            # Interpreters that could not be probed are cached as well, so they are not run on
+            # every call
+            self._cache = {"directories": directories, "interpreters": probes}
+            self._save()
+
+        results, seen = [], set()
+        for source, path, real in found:
+            info = probes[real]["info"]
+            if info is None or real in seen:
+                continue
+            seen.add(real)
+            results.append({"path": path, "source": source, **info})
+        return results
+
+    def find(self, request: str, machine: str | None = None) -> dict[str, Any] | None:
+        """Return the interpreter matching the requested version, e.g. `3.11` or `pypy3.10`.
+
+        Of all matching interpreters, the one with the highest version is returned, preferring
+        those for the architecture ``machine``.
+        """
+        parsed = parse_request(request)
+        if parsed is None:
+            return None
+        implementation, version = parsed
+        implementation = implementation or "cpython"
+        matches = [
+            interpreter
+            for interpreter in self.interpreters()
+            if interpreter["implementation"] == implementation
+            and version_tuple(interpreter["version"])[: len(version)] == version
+        ]
+        if not matches:
+            return None
+        # `max` returns the first of equal interpreters, i.e. in the order of the directories
+        return max(
+            matches,
+            key=lambda interpreter: (
+                machine is None or interpreter["machine"] == machine,
+                version_tuple(interpreter["version"]),
+            ),
+        )
+
+    def _save(self) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{uuid.uuid4().hex}")
+        tmp_file.write_text(json.dumps(self._cache))
+        os.replace(tmp_file, self.cache_file)
+
+
+def install_python(request: str, mirror: str | None = None) -> None:
+    """Install the requested Python version with `uv`, optionally from a (local) ``mirror``."""
+    from .process import run
+    from .uv import find_uv
+
+    command = [find_uv(), "python", "install", request]
+    if mirror is not None:
+        command.extend(["--mirror", mirror])
+    run(command)
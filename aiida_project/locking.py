@@ -0,0 +1,74 @@
+"""Advisory file locks, so concurrent processes don't modify the same project at once.
+
+Each project has its own lock file, so independent projects can be created, changed and
+destroyed in parallel. The same locks make sure only one process at a time empties a trash
+directory or fills the spares of a pool. A lock file is only removed by the process holding it,
+e.g. once its project is destroyed. Processes that locked the removed file in the meantime notice
+that it's gone and lock the new file with the same name instead.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+from pathlib import Path
+from types import TracebackType
+
+
+class ProjectLock:
+    """Exclusive lock on the project with lock file ``path``, held until it is released.
+
+    The lock is also released when the process exits, since it's held by an open file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self, wait: bool = False) -> None:
+        """Acquire the lock, raising a `BlockingIOError` if it's held, unless ``wait`` is set."""
+        while True:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                raise
+            if self._is_current(fd):
+                self._fd = fd
+                return
+            # The previous holder removed the lock file, so try again with the new one
+            os.close(fd)
+
+    def _is_current(self, fd: int) -> bool:
+        """Check if the file open as ``fd`` is still the lock file at ``path``."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        fd_stat = os.fstat(fd)
+        return (stat.st_dev, stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino)
+
+    def remove(self) -> None:
+        """Remove the lock file, which is only allowed while holding the lock."""
+        assert self._fd is not None
+        self.path.unlink(missing_ok=True)
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> ProjectLock:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.release()
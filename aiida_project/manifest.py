@@ -0,0 +1,62 @@
+"""Manifests that define several projects to be created in one go."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field, field_validator
+
+from .enums import EngineType
+
+
+class ProjectSpec(BaseModel):
+    """Specification of a single project in a manifest."""
+
+    name: str = Field(min_length=1)
+    engine: EngineType = EngineType.venv
+    core_version: str = "latest"
+    plugins: list[str] = []
+    python: str | None = None
+
+
+class Manifest(BaseModel):
+    """Manifest of projects.
+
+    Values in the optional `defaults` section are used for each project that doesn't specify them:
+
+    ```yaml
+    defaults:
+      core_version: "2.7"
+      plugins: [aiida-quantumespresso]
+    projects:
+      - name: course-01
+      - name: course-02
+        plugins: [aiida-cp2k]
+    ```
+    """
+
+    projects: list[ProjectSpec]
+
+    @field_validator("projects")
+    @classmethod
+    def check_unique_names(cls, value: list[ProjectSpec]) -> list[ProjectSpec]:
+        """Check that no two projects in the manifest have the same name."""
+        names = [spec.name for spec in value]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate project names: {', '.join(duplicates)}")
+        return value
+
+
+def load_manifest(manifest_file: Path) -> Manifest:
+    """Load the manifest from a YAML file."""
+    import yaml
+
+    with manifest_file.open("r") as handle:
+        contents: dict[str, Any] = yaml.safe_load(handle) or {}
+
+    defaults = contents.get("defaults", {})
+    return Manifest.model_validate(
+        {"projects": [{**defaults, **project} for project in contents.get("projects", [])]}
+    )
@@ -0,0 +1,112 @@
+"""Metadata of project environments, read from their files without starting their Python."""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Any
+
+from .cache import SEED_PACKAGES, read_pyvenv_cfg, site_packages
+
+
+def _normalise(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def read_distribution(dist_info: Path) -> tuple[str, str]:
+    """Return the name and version from the `METADATA` of the ``dist_info`` directory."""
+    name, version = "", ""
+    with Path(dist_info, "METADATA").open(encoding="utf-8", errors="replace") as handle:
+        # The name and version are at the top of the headers, which end at the first empty line
+        for line in handle:
+            if not line.strip() or (name and version):
+                break
+            key, _, value = line.partition(":")
+            if key == "Name":
+                name = value.strip()
+            elif key == "Version":
+                version = value.strip()
+    return name, version
+
+
+def read_dependencies(dist_info: Path) -> tuple[str, list[str]]:
+    """Return the name and the names of the required distributions of the ``dist_info`` directory.
+
+    Requirements that only apply to extras are left out, since they're not necessarily installed.
+    """
+    name, dependencies = "", []
+    with Path(dist_info, "METADATA").open(encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            if not line.strip():
+                break
+            key, _, value = line.partition(":")
+            if key == "Name":
+                name = value.strip()
+            elif key == "Requires-Dist" and "extra" not in value.partition(";")[2]:
+                match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", value)
+                if match is not None:
+                    dependencies.append(_normalise(match.group(1)))
+    return name, dependencies
+
+
+def top_level_distributions(venv_path: Path) -> list[str]:
+    """Return the installed distributions that no other installed distribution depends on.
+
+    These are the packages that were requested when the environment was created, plus any
+    installed later, e.g. for projects registered before the requested packages were recorded.
+    The seed packages of the environment are left out.
+    """
+    names, required = [], set()
+    for dist_info in sorted(site_packages(venv_path).glob("*.dist-info")):
+        try:
+            name, dependencies = read_dependencies(dist_info)
+        except FileNotFoundError:
+            continue
+        names.append(_normalise(name))
+        required.update(dependencies)
+    return [name for name in names if name not in required and name not in SEED_PACKAGES]
+
+
+def is_plugin(dist_info: Path) -> bool:
+    """Check if the distribution of the ``dist_info`` directory registers AiiDA entry points."""
+    try:
+        entry_points = Path(dist_info, "entry_points.txt").read_text(errors="replace")
+    except FileNotFoundError:
+        return False
+    return "[aiida." in entry_points
+
+
+def python_version(venv_path: Path) -> str | None:
+    """Return the Python version of the virtual or conda environment at ``venv_path``."""
+    try:
+        pyvenv_cfg = read_pyvenv_cfg(venv_path)
+    except FileNotFoundError:
+        # Conda environments record the installed packages in `conda-meta`
+        for meta_file in Path(venv_path, "conda-meta").glob("python-[0-9]*.json"):
+            return meta_file.name.split("-")[1]
+        return None
+    return pyvenv_cfg.get("version_info", pyvenv_cfg.get("version"))
+
+
+def environment_metadata(venv_path: Path) -> dict[str, Any]:
+    """Read the Python version and the versions of AiiDA and its plugins in the environment."""
+    metadata: dict[str, Any] = {
+        "python": python_version(venv_path),
+        "aiida_core": None,
+        "plugins": {},
+    }
+    with os.scandir(site_packages(venv_path)) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".dist-info"):
+                continue
+            try:
+                name, version = read_distribution(Path(entry.path))
+            except FileNotFoundError:
+                continue
+            if name.lower().replace("_", "-") == "aiida-core":
+                metadata["aiida_core"] = version
+            elif is_plugin(Path(entry.path)):
+                metadata["plugins"][name] = version
+    metadata["plugins"] = dict(sorted(metadata["plugins"].items()))
+    return metadata
@@ -0,0 +1,236 @@
+"""Pool of spare environments, prepared in advance so `create` only has to claim one.
+
+The pool directory is in the directory of the virtual environments, so claiming a spare is an
+atomic rename on the same filesystem. Spares are built in a temporary directory in the pool, and
+only renamed to `<key>-<id>` once they are complete, where the key identifies the interpreter and
+the requested packages. The target number of spares for each key is stored in `<key>.json`, and
+the pool is filled up to it by a detached process, which can be started again with
+`python -m aiida_project.pool`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+from typing import Any
+
+from .cache import replace_prefixes
+from .locking import ProjectLock
+from .trash import remove_tree
+
+POOL_DIR_NAME = ".aiida_pool"
+LOG_FILE_NAME = ".fill.log"
+SPARE_METADATA = Path("etc", "aiida-project", "spare.json")
+"""Metadata of a spare, relative to its environment, removed once the spare is claimed."""
+
+
+def pool_dir(venv_dir: Path) -> Path:
+    """Return the pool directory for the virtual environments in ``venv_dir``."""
+    return Path(venv_dir, POOL_DIR_NAME)
+
+
+def pool_key(
+    python_path: Path,
+    packages: list[str],
+    wheelhouse: Path | None = None,
+    compile_bytecode: bool = True,
+) -> str:
+    """Identify the spares for the interpreter at ``python_path`` and the requested ``packages``.
+
+    Spares installed from a different ``wheelhouse`` or with another ``compile_bytecode`` setting
+    get a different key, so they are only claimed by `create` calls with the same options.
+    """
+    contents = "\n".join(
+        [
+            os.path.realpath(python_path),
+            *sorted(packages),
+            f"wheelhouse={'' if wheelhouse is None else os.path.realpath(wheelhouse)}",
+            f"compile_bytecode={compile_bytecode}",
+        ]
+    )
+    return hashlib.sha256(contents.encode()).hexdigest()[:16]
+
+
+def relocate_environment(venv_path: Path, old_prefix: str) -> None:
+    """Replace ``old_prefix`` by the path of the environment in its scripts."""
+    for script in Path(venv_path, "bin").iterdir():
+        if not script.is_symlink() and script.is_file():
+            replace_prefixes(script, {old_prefix: str(venv_path)})
+
+
+class EnvironmentPool:
+    """Spare environments in the pool directory at ``path``."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def target_file(self, key: str) -> Path:
+        return Path(self.path, f"{key}.json")
+
+    def pid_file(self, key: str) -> Path:
+        return Path(self.path, f".{key}.pid")
+
+    def lock(self, key: str) -> ProjectLock:
+        """Return the lock held by the process filling the spares for the ``key``."""
+        return ProjectLock(Path(self.path, f".{key}.lock"))
+
+    def targets(self) -> dict[str, dict[str, Any]]:
+        """Return the interpreter, packages and number of spares to keep for each key."""
+        targets = {}
+        for target_file in sorted(self.path.glob("*.json")):
+            try:
+                targets[target_file.stem] = json.loads(target_file.read_text())
+            except (FileNotFoundError, ValueError):
+                continue
+        return targets
+
+    def set_target(  # noqa: PLR0913
+        self,
+        key: str,
+        python_path: Path,
+        packages: list[str],
+        size: int,
+        wheelhouse: Path | None = None,
+        compile_bytecode: bool = True,
+    ) -> None:
+        """Keep ``size`` spares with the ``packages`` for the interpreter at ``python_path``."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        target = {
+            "python": str(python_path),
+            "packages": packages,
+            "size": size,
+            "wheelhouse": None if wheelhouse is None else str(wheelhouse),
+            "compile_bytecode": compile_bytecode,
+        }
+        target_file = self.target_file(key)
+        tmp_file = target_file.with_name(f".{target_file.name}.{uuid.uuid4().hex}")
+        tmp_file.write_text(json.dumps(target))
+        os.replace(tmp_file, target_file)
+
+    def spares(self, key: str) -> list[Path]:
+        """Return the complete spares for the ``key``."""
+        if not self.path.is_dir():
+            return []
+        return sorted(
+            path for path in self.path.glob(f"{key}-*") if path.is_dir() and not path.is_symlink()
+        )
+
+    def claim(self, key: str, venv_path: Path) -> dict[str, Any] | None:
+        """Move a spare for the ``key`` to ``venv_path``, and return its metadata.
+
+        Returns `None` if there are no spares left. Since the spare is moved by a rename, only
+        one process can claim each spare.
+        """
+        for spare in self.spares(key):
+            try:
+                os.rename(spare, venv_path)
+            except FileNotFoundError:
+                # Claimed by another process in the meantime
+                continue
+            metadata_file = Path(venv_path, SPARE_METADATA)
+            metadata: dict[str, Any] = json.loads(metadata_file.read_text())
+            relocate_environment(venv_path, metadata["venv_path"])
+            metadata_file.unlink()
+            return metadata
+        return None
+
+    def fill_pid(self, key: str) -> int | None:
+        """Return the process ID of the process filling the spares for the ``key``, if any."""
+        try:
+            pid = int(self.pid_file(key).read_text())
+            os.kill(pid, 0)
+        except (FileNotFoundError, ValueError, ProcessLookupError):
+            return None
+        except PermissionError:
+            # The process exists, but belongs to another user
+            pass
+        return pid
+
+    def fill(self, key: str) -> None:
+        """Build spares for the ``key`` until its target is reached.
+
+        The target is read again after each spare, so the filling stops if it's lowered or
+        removed in the meantime. Returns right away if another process is filling the spares.
+        """
+        lock = self.lock(key)
+        try:
+            lock.acquire()
+        except BlockingIOError:
+            return
+        pid_file = self.pid_file(key)
+        pid_file.write_text(str(os.getpid()))
+        try:
+            while True:
+                target = self.targets().get(key)
+                if target is None or len(self.spares(key)) >= target["size"]:
+                    break
+                self.build(key, target)
+        finally:
+            pid_file.unlink(missing_ok=True)
+            lock.release()
+
+    def build(self, key: str, target: dict[str, Any]) -> Path:
+        """Build a spare for the ``key`` with the interpreter and packages of the ``target``."""
+        from .project.venv import VenvProject
+
+        build_path = Path(self.path, f".build-{uuid.uuid4().hex}")
+        project = VenvProject(
+            name=key,
+            project_path=Path(build_path, "project"),
+            venv_path=Path(build_path, "venv"),
+            dir_structure=[],
+        )
+        wheelhouse = None if target["wheelhouse"] is None else Path(target["wheelhouse"])
+        try:
+            project.create(Path(target["python"]), wheelhouse=wheelhouse)
+            project.install(
+                target["packages"],
+                wheelhouse=wheelhouse,
+                compile_bytecode=target.get("compile_bytecode", True),
+            )
+            assert project.lock_file is not None
+            metadata_file = Path(project.venv_path, SPARE_METADATA)
+            metadata_file.parent.mkdir(parents=True, exist_ok=True)
+            metadata_file.write_text(
+                json.dumps(
+                    {
+                        "venv_path": str(project.venv_path),
+                        "python": target["python"],
+                        "packages": project.packages,
+                        "lock": project.lock_file.read_text(),
+                    }
+                )
+            )
+            spare = Path(self.path, f"{key}-{uuid.uuid4().hex}")
+            os.rename(project.venv_path, spare)
+        finally:
+            remove_tree(build_path)
+        return spare
+
+    def start_fill(self, keys: list[str]) -> None:
+        """Fill the spares for the ``keys`` in a detached process, skipping those being filled."""
+        pending = [key for key in keys if key in self.targets() and self.fill_pid(key) is None]
+        if not pending:
+            return
+        with Path(self.path, LOG_FILE_NAME).open("ab") as log_file:
+            subprocess.Popen(
+                [sys.executable, "-m", "aiida_project.pool", self.path.as_posix(), *pending],
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=log_file,
+                start_new_session=True,
+            )
+
+
+if __name__ == "__main__":
+    pool = EnvironmentPool(Path(sys.argv[1]))
+    for key in sys.argv[2:]:
+        try:
+            pool.fill(key)
+        except (OSError, subprocess.CalledProcessError) as exception:
+            print(f"Could not fill the spares for {key}: {exception}", file=sys.stderr)
@@ -0,0 +1,250 @@
+"""Running subprocesses with their output streamed line by line.
+
+Commands are run with `run`, which blocks until the command is done, or with its asynchronous
+twin `run_async`. Code that runs in a worker thread on behalf of an event loop, like the
+operations of the API, can use `on_event_loop` so its calls of `run` start the commands with
+`run_async` on that loop, and only wait for the result in the thread.
+"""
+
+from __future__ import annotations
+
+import functools
+import subprocess
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from pathlib import Path
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+OutputHandler = Callable[[str], None]
+
+_output_handler: ContextVar[OutputHandler | None] = ContextVar("output_handler", default=None)
+_cancellation: ContextVar[Cancellation | None] = ContextVar("cancellation", default=None)
+# `asyncio` is only imported once it's needed, as it's slow to import for the commands of the CLI
+_event_loop: ContextVar[asyncio.AbstractEventLoop | None] = ContextVar("event_loop", default=None)
+
+ERROR_TAIL_LINES = 200
+"""Number of output lines that are kept to report when a command fails."""
+STREAM_LIMIT = 2**20
+"""Maximum length of a line of output read by `run_async`, in bytes."""
+
+
+class CommandCancelledError(Exception):
+    """Raised when a command is run or stopped after its `Cancellation` was cancelled."""
+
+
+class ExecutableNotFoundError(Exception):
+    """Raised when the executable to run a command with, e.g. `uv`, can't be found."""
+
+
+class Cancellation:
+    """Terminates the commands run in the context of `cancellable` once cancelled.
+
+    Commands run after the cancellation raise a `CommandCancelledError` right away, so an operation
+    that runs several commands stops at the next one.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._stops: set[Callable[[], object]] = set()
+
+    def cancel(self) -> None:
+        """Terminate the commands that are running, and cancel all later ones."""
+        with self._lock:
+            self.cancelled = True
+            for stop in self._stops:
+                stop()
+
+    def _add(self, stop: Callable[[], object]) -> None:
+        """Register the ``stop`` function of a running command."""
+        with self._lock:
+            self._stops.add(stop)
+            if self.cancelled:
+                stop()
+
+    def _discard(self, stop: Callable[[], object]) -> None:
+        with self._lock:
+            self._stops.discard(stop)
+
+
+@contextmanager
+def cancellable(cancellation: Cancellation) -> Iterator[None]:
+    """Run the commands in this context such that they are stopped by the ``cancellation``."""
+    token = _cancellation.set(cancellation)
+    try:
+        yield
+    finally:
+        _cancellation.reset(token)
+
+
+@contextmanager
+def stream_output(handler: OutputHandler) -> Iterator[None]:
+    """Pass each line of output of the commands run in this context to the ``handler``."""
+    token = _output_handler.set(handler)
+    try:
+        yield
+    finally:
+        _output_handler.reset(token)
+
+
+@contextmanager
+def on_event_loop(loop: asyncio.AbstractEventLoop) -> Iterator[None]:
+    """Run the commands started with `run` in this context with `run_async` on the ``loop``.
+
+    The ``loop`` must run in another thread than the commands are started from.
+    """
+    token = _event_loop.set(loop)
+    try:
+        yield
+    finally:
+        _event_loop.reset(token)
+
+
+def run(
+    command: Sequence[str | Path],
+    capture_stdout: bool = False,
+    env: Mapping[str, str] | None = None,
+) -> subprocess.CompletedProcess[bytes]:
+    """Run the ``command``, streaming its output to the current output handler.
+
+    Only the last `ERROR_TAIL_LINES` lines of the output are kept in memory, and are used as the
+    `stderr` of the `CalledProcessError` raised in case the command fails. If ``capture_stdout``
+    is set, only the standard error is streamed and the standard output is returned instead. The
+    ``env`` replaces the environment variables of the command, like for `subprocess.Popen`.
+    """
+    handler = _output_handler.get()
+    cancellation = _cancellation.get()
+    if cancellation is not None and cancellation.cancelled:
+        raise CommandCancelledError(command)
+    loop = _event_loop.get()
+    if loop is not None:
+        import asyncio
+        import concurrent.futures
+
+        future = asyncio.run_coroutine_threadsafe(
+            _run_async(command, capture_stdout, env, handler, cancellation), loop
+        )
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise CommandCancelledError(command) from None
+    tail: deque[bytes] = deque(maxlen=ERROR_TAIL_LINES)
+    stdout_chunks: list[bytes] = []
+
+    with subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if capture_stdout else subprocess.STDOUT,
+        env=env,
+    ) as process:
+        if cancellation is not None:
+            cancellation._add(process.terminate)
+        try:
+            stdout_pipe = process.stdout
+            assert stdout_pipe is not None
+            if capture_stdout:
+                assert process.stderr is not None
+                # Read the standard output in a separate thread, so neither pipe can fill up
+                reader = threading.Thread(target=lambda: stdout_chunks.append(stdout_pipe.read()))
+                reader.start()
+                _stream_lines(process.stderr, tail, handler)
+                reader.join()
+            else:
+                _stream_lines(stdout_pipe, tail, handler)
+            returncode = process.wait()
+        finally:
+            if cancellation is not None:
+                cancellation._discard(process.terminate)
+
+    if cancellation is not None and cancellation.cancelled:
+        raise CommandCancelledError(command)
+    stdout, output_tail = b"".join(stdout_chunks), b"".join(tail)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, output=stdout, stderr=output_tail)
+    return subprocess.CompletedProcess(command, returncode, stdout=stdout)
+
+
+def _stream_lines(pipe: IO[bytes], tail: deque[bytes], handler: OutputHandler | None) -> None:
+    for line in pipe:
+        tail.append(line)
+        if handler is not None:
+            handler(line.decode(errors="replace").rstrip())
+
+
+async def run_async(
+    command: Sequence[str | Path],
+    capture_stdout: bool = False,
+    env: Mapping[str, str] | None = None,
+) -> subprocess.CompletedProcess[bytes]:
+    """Asynchronous twin of `run`, which runs the ``command`` as an `asyncio` subprocess.
+
+    Cancelling the task terminates the command, and only returns once it has stopped.
+    """
+    return await _run_async(
+        command, capture_stdout, env, _output_handler.get(), _cancellation.get()
+    )
+
+
+async def _run_async(
+    command: Sequence[str | Path],
+    capture_stdout: bool,
+    env: Mapping[str, str] | None,
+    handler: OutputHandler | None,
+    cancellation: Cancellation | None,
+) -> subprocess.CompletedProcess[bytes]:
+    import asyncio
+
+    tail: deque[bytes] = deque(maxlen=ERROR_TAIL_LINES)
+    stdout = b""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if capture_stdout else subprocess.STDOUT,
+        limit=STREAM_LIMIT,
+        env=env,
+    )
+    stop = None
+    if cancellation is not None:
+        # The cancellation can come from any thread, so the task is cancelled in its own loop
+        task = asyncio.current_task()
+        assert task is not None
+        stop = functools.partial(asyncio.get_running_loop().call_soon_threadsafe, task.cancel)
+        cancellation._add(stop)
+    try:
+        assert process.stdout is not None
+        if capture_stdout:
+            assert process.stderr is not None
+            stdout, _ = await asyncio.gather(
+                process.stdout.read(), _stream_lines_async(process.stderr, tail, handler)
+            )
+        else:
+            await _stream_lines_async(process.stdout, tail, handler)
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        with suppress(ProcessLookupError):
+            process.terminate()
+        await process.wait()
+        raise
+    finally:
+        if cancellation is not None and stop is not None:
+            cancellation._discard(stop)
+
+    output_tail = b"".join(tail)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, output=stdout, stderr=output_tail)
+    return subprocess.CompletedProcess(command, returncode, stdout=stdout)
+
+
+async def _stream_lines_async(
+    stream: AsyncIterator[bytes], tail: deque[bytes], handler: OutputHandler | None
+) -> None:
+    async for line in stream:
+        tail.append(line)
+        if handler is not None:
+            handler(line.decode(errors="replace").rstrip())
@@ -0,0 +1,196 @@
+"""Profiling the import time of `verdi` and the AiiDA entry points in a project environment.
+
+The imports are run in the Python of the environment under `-X importtime`, and the time spent in
+each imported module is attributed to the distribution that provides it. Loading each AiiDA
+entry point is timed separately, which only includes the imports not done by `verdi` or earlier
+entry points.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .metadata import environment_metadata
+
+STDLIB = "(stdlib)"
+OTHER = "(other)"
+MARKER = "aiida-project: start of the profile"
+
+PROBE_CODE = (
+    f"MARKER = {MARKER!r}\n"
+    + """
+import importlib.metadata as metadata
+import json
+import sys
+import time
+
+
+def all_entry_points():
+    entry_points = metadata.entry_points()
+    if isinstance(entry_points, dict):
+        return [entry_point for group in entry_points.values() for entry_point in group]
+    return list(entry_points)
+
+
+def load(entry_point):
+    # Unlike `entry_point.load()`, which uses `importlib`, `__import__` is traced by `importtime`
+    module_name, _, attributes = entry_point.value.partition(":")
+    module_name = module_name.strip()
+    __import__(module_name)
+    value = sys.modules[module_name]
+    for attribute in attributes.split("[")[0].strip().split("."):
+        if attribute:
+            value = getattr(value, attribute)
+    return value
+
+
+def top_level_names(dist):
+    names = (dist.read_text("top_level.txt") or "").split()
+    if not names:
+        for path in dist.files or []:
+            top = path.parts[0]
+            if top.endswith(".py"):
+                names.append(top[:-3])
+            elif "." not in top and not top.startswith("__"):
+                names.append(top)
+    return names
+
+
+distributions = {}
+for dist in metadata.distributions():
+    for name in top_level_names(dist):
+        distributions.setdefault(name, dist.metadata["Name"])
+
+entry_points = all_entry_points()
+results = {
+    "distributions": distributions,
+    "stdlib": sorted(getattr(sys, "stdlib_module_names", sys.builtin_module_names)),
+    "verdi_s": None,
+    "entry_points": [],
+}
+# Only the imports after this marker are part of the profile
+print(MARKER, file=sys.stderr, flush=True)
+for entry_point in entry_points:
+    if entry_point.group == "console_scripts" and entry_point.name == "verdi":
+        start = time.perf_counter()
+        load(entry_point)
+        results["verdi_s"] = time.perf_counter() - start
+        break
+
+seen = set()
+for entry_point in entry_points:
+    key = (entry_point.group, entry_point.name)
+    if not entry_point.group.startswith("aiida.") or key in seen:
+        continue
+    seen.add(key)
+    error = None
+    start = time.perf_counter()
+    try:
+        load(entry_point)
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    results["entry_points"].append(
+        {
+            "group": entry_point.group,
+            "name": entry_point.name,
+            "value": entry_point.value,
+            "load_s": time.perf_counter() - start,
+            "error": error,
+        }
+    )
+print(json.dumps(results))
+"""
+)
+
+
+def parse_importtime(output: str) -> list[tuple[str, int]]:
+    """Return the imported modules and the time spent in each one (in µs), excluding submodules.
+
+    Parses the lines written by `-X importtime` after the `MARKER` line, which look like
+    `import time:  640 |  52475 |   typer`.
+    """
+    modules = []
+    lines = output.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1 :]
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, rest = line[len("import time:") :].partition("|")
+        _, _, module = rest.partition("|")
+        try:
+            modules.append((module.strip(), int(self_time)))
+        except ValueError:
+            # The header line
+            continue
+    return modules
+
+
+def profile_environment(venv_path: Path, project_path: Path) -> dict[str, Any]:
+    """Profile the imports of `verdi` and the AiiDA entry points in the environment.
+
+    Returns the report, with the import time of each distribution and the load time of each
+    entry point, both sorted from slow to fast.
+    """
+    result = subprocess.run(
+        [
+            Path(venv_path, "bin", "python"),
+            "-X",
+            "importtime",
+            "-W",
+            "ignore::DeprecationWarning",
+            "-c",
+            PROBE_CODE,
+        ],
+        env={**os.environ, "AIIDA_PATH": str(project_path)},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        # Leave out the import times, to only keep the actual error
+        stderr = [line for line in result.stderr.splitlines() if not line.startswith("import time")]
+        raise subprocess.CalledProcessError(
+            result.returncode, result.args, result.stdout, "\n".join(stderr).encode()
+        )
+    probe = json.loads(result.stdout)
+    stdlib = set(probe["stdlib"])
+
+    def distribution(module: str) -> str:
+        top_level = module.split(".")[0]
+        if top_level in probe["distributions"]:
+            return str(probe["distributions"][top_level])
+        return STDLIB if top_level in stdlib or top_level.startswith("_") else OTHER
+
+    import_times: dict[str, list[int]] = {}
+    for module, self_time in parse_importtime(result.stderr):
+        import_times.setdefault(distribution(module), []).append(self_time)
+
+    metadata = environment_metadata(venv_path)
+    plugins = {name.lower().replace("_", "-") for name in metadata["plugins"]}
+    distributions = [
+        {
+            "name": name,
+            "import_s": sum(times) / 1e6,
+            "modules": len(times),
+            "plugin": name.lower().replace("_", "-") in plugins,
+        }
+        for name, times in import_times.items()
+    ]
+    entry_points = [
+        {**entry_point, "distribution": distribution(entry_point["value"].split(":")[0])}
+        for entry_point in probe["entry_points"]
+    ]
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        **metadata,
+        "verdi_import_s": probe["verdi_s"],
+        "total_import_s": sum(entry["import_s"] for entry in distributions),
+        "distributions": sorted(distributions, key=lambda entry: -entry["import_s"]),
+        "entry_points": sorted(entry_points, key=lambda entry: -entry["load_s"]),
+    }
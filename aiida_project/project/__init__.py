@@ -1,4 +1,5 @@
-from .core import EngineType, ProjectDict, load_project_class
+from ..enums import EngineType
+from .core import ProjectDict, load_project_class
 
 __all__ = [
     "EngineType",
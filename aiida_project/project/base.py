@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import json
+import os
+import re
 import shutil
+import subprocess
+import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from pathlib import Path
+from typing import ClassVar
 
 from pydantic import BaseModel
 
+from aiida_project.process import run
+from aiida_project.trash import move_to_trash, trash_dir
+
+ENVIRONMENT_OWNER_FILE = Path("etc", "aiida-project", "owner")
+"""File in an environment that records the project it was made for."""
+PROJECT_OWNER_FILE = Path(".aiida", "aiida-project")
+"""File in a project directory that records the project it was made for."""
+
 
 def recursive_mkdir(project_path: Path, structure: dict | list | Path) -> None:  # type: ignore[type-arg]
     """Recursively make the provided directory structure."""
@@ -18,28 +33,163 @@ def recursive_mkdir(project_path: Path, structure: dict | list | Path) -> None:
             Path(project_path, value).mkdir(exist_ok=True, parents=True)
 
 
+def requirement_name(requirement: str) -> str:
+    """Return the normalised name of the package in a ``requirement``.
+
+    Requirements without a name, e.g. direct URLs, are returned as is.
+    """
+    match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:[\[<>=!~;@ ]|$)", requirement)
+    if match is None:
+        return requirement.strip()
+    return re.sub(r"[-_.]+", "-", match.group(1)).lower()
+
+
+def replace_text(path: Path, text: str) -> None:
+    """Replace the contents of the file at ``path`` by ``text``, keeping its permissions.
+
+    The text is written to a temporary file first, which is then moved in place, so the file is
+    never partially written and files hardlinked to the layer cache are left alone.
+    """
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp_path.write_text(text)
+    if path.exists():
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_owner(path: Path, owner_file: Path, name: str) -> None:
+    """Mark the directory at ``path`` as made for the project ``name``."""
+    owner_path = Path(path, owner_file)
+    owner_path.parent.mkdir(parents=True, exist_ok=True)
+    replace_text(owner_path, json.dumps({"name": name, "path": str(path)}))
+
+
+def read_owner(path: Path, owner_file: Path) -> str | None:
+    """Return the name of the project the directory at ``path`` was made for, if it's marked.
+
+    Directories that were copied or moved elsewhere are not considered to be made for any project.
+    """
+    try:
+        owner = json.loads(Path(path, owner_file).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(owner, dict) or owner.get("path") != str(path):
+        return None
+    name = owner.get("name")
+    return name if isinstance(name, str) else None
+
+
+def merge_requirements(current: list[str], new: list[str]) -> list[str]:
+    """Merge the ``new`` requirements into the ``current`` ones, replacing those of a package."""
+    merged = {requirement_name(requirement): requirement for requirement in current}
+    merged.update({requirement_name(requirement): requirement for requirement in new})
+    return list(merged.values())
+
+
 class BaseProject(BaseModel, ABC):
     name: str
     project_path: Path
     venv_path: Path
     dir_structure: dict[str, dict | list | Path] | list[Path] | Path  # type: ignore[type-arg]
+    packages: list[str] = []
+    """Packages requested for the project, i.e. before resolving the dependencies."""
+    lock_file: Path | None = None
+    """Lock file with the exact versions of all packages installed in the environment."""
 
     _engine: str = ""
 
+    creates_from_lock: ClassVar[bool] = False
+    """Whether `create` already installs the packages of the lock file, if there is one."""
+
     @property
     def engine(self) -> str:
         return self._engine
 
+    def requested_packages(self) -> list[str]:
+        """Return the packages requested for the project, which `upgrade` resolves again."""
+        return self.packages
+
+    def completion_file(self, shell: str) -> Path:
+        """Path to the generated `verdi` completion script for the ``shell``."""
+        return Path(self.venv_path, "etc", "aiida-project", f"verdi-completion.{shell}")
+
+    def activation_file(self) -> Path:
+        """Path to the file that is touched each time the environment is activated."""
+        return Path(self.venv_path, "etc", "aiida-project", "last-activation")
+
+    def environment(self, environ: Mapping[str, str]) -> dict[str, str]:
+        """Return the ``environ`` variables as they are after activating the environment.
+
+        Only the variables set by the activate script and the AiiDA hooks are changed, so commands
+        can be run in the environment without sourcing any shell script.
+        """
+        env = {key: value for key, value in environ.items() if key != "PYTHONHOME"}
+        path = environ.get("PATH")
+        bin_path = str(Path(self.venv_path, "bin"))
+        env["PATH"] = bin_path if not path else os.pathsep.join([bin_path, path])
+        env["AIIDA_PATH"] = str(self.project_path)
+        return env
+
+    def mark_environment(self) -> None:
+        """Mark the environment as made for this project, see `write_owner`."""
+        write_owner(self.venv_path, ENVIRONMENT_OWNER_FILE, self.name)
+
+    def mark_project_dir(self) -> None:
+        """Mark the project directory as made for this project, see `write_owner`."""
+        write_owner(self.project_path, PROJECT_OWNER_FILE, self.name)
+
+    def write_completion(self, shell: str) -> None:
+        """Generate the `verdi` completion script for the ``shell``, if `verdi` is installed."""
+        verdi_path = Path(self.venv_path, "bin", "verdi")
+        if not verdi_path.exists():
+            return
+        try:
+            result = run(
+                [verdi_path],
+                capture_stdout=True,
+                env={**os.environ, "_VERDI_COMPLETE": f"{shell}_source"},
+            )
+        except subprocess.CalledProcessError:
+            return
+        completion_file = self.completion_file(shell)
+        completion_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = completion_file.with_name(f".{completion_file.name}.{uuid.uuid4().hex}")
+        tmp_file.write_bytes(result.stdout)
+        os.replace(tmp_file, completion_file)
+
     @abstractmethod
-    def create(self, python_path: Path) -> None:
+    def create(self, python_path: Path, wheelhouse: Path | None = None) -> None:
         """Create the project."""
         Path(self.project_path, ".aiida").mkdir(parents=True, exist_ok=True)
+        self.mark_project_dir()
         recursive_mkdir(self.project_path, self.dir_structure)
 
+    @abstractmethod
+    def clone_environment(self, source: BaseProject) -> None:
+        """Create the environment as a copy of the one of the ``source`` project.
+
+        The copy includes the AiiDA lines added to the activate scripts, with the paths of the
+        ``source`` project replaced by those of this one.
+        """
+
+    def relocation_prefixes(self, source: BaseProject) -> dict[str, str]:
+        """Return the paths of the ``source`` project, mapped to the ones of this project."""
+        return {
+            str(source.venv_path): str(self.venv_path),
+            str(source.project_path): str(self.project_path),
+        }
+
     @abstractmethod
     def destroy(self) -> None:
-        """Destroy the project."""
-        shutil.rmtree(self.project_path, ignore_errors=True)
+        """Destroy the project.
+
+        The project directory is moved into its trash directory, to be deleted in the background.
+        """
+        move_to_trash(self.project_path)
+
+    def trash_dirs(self) -> list[Path]:
+        """Return the trash directories the trees of the project are moved into on `destroy`."""
+        return sorted({trash_dir(self.project_path), trash_dir(self.venv_path)})
 
     @abstractmethod
     def append_activate_text(self, text: str) -> None:
@@ -50,5 +200,35 @@ class BaseProject(BaseModel, ABC):
         """Append a text to the deactivate script."""
 
     @abstractmethod
-    def install(self, packages: list[str]) -> None:
-        """Install a list of packages from the PyPI or a GitHub repository."""
+    def install(
+        self,
+        packages: list[str],
+        use_cache: bool = True,
+        wheelhouse: Path | None = None,
+        compile_bytecode: bool = True,
+    ) -> None:
+        """Install a list of packages from the PyPI or a GitHub repository.
+
+        With a ``wheelhouse``, the packages are only installed from that local directory of wheels.
+        With ``compile_bytecode``, the Python files are compiled to bytecode during the install,
+        so the first run of e.g. `verdi` doesn't have to.
+        """
+
+    @abstractmethod
+    def upgrade(
+        self,
+        packages: list[str],
+        wheelhouse: Path | None = None,
+        refresh: bool = True,
+        compile_bytecode: bool = True,
+    ) -> None:
+        """Upgrade the ``packages`` to the newest versions that satisfy them.
+
+        The ``packages`` replace the requested packages with the same name, after which all
+        requested packages are resolved again, unless ``refresh`` is disabled and the cached
+        resolution is used.
+        """
+
+    @abstractmethod
+    def sync(self, wheelhouse: Path | None = None, compile_bytecode: bool = True) -> None:
+        """Install exactly the packages in the lock file of the project."""
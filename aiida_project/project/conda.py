@@ -1,49 +1,259 @@
-# import json
-# import os
-# import subprocess
+from __future__ import annotations
 
-# import py  # type: ignore
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from collections.abc import Mapping
+from functools import cache
+from pathlib import Path
+from typing import ClassVar
 
-from aiida_project.project.base import BaseProject
+from aiida_project.cache import ResolutionCache, replace_prefixes
+from aiida_project.config import get_config
+from aiida_project.metadata import python_version
+from aiida_project.process import ExecutableNotFoundError, run
+from aiida_project.project.base import BaseProject, merge_requirements, replace_text
+from aiida_project.trash import move_to_trash
+
+__all__ = ["CondaProject", "find_conda"]
+
+CONDA_FRONTENDS = ("micromamba", "mamba", "conda")
+"""Executables that can manage conda environments, in order of preference."""
+
+
+@cache
+def find_conda() -> str:
+    """Return the path to the conda frontend to use, preferring the faster `micromamba`."""
+    for name in CONDA_FRONTENDS:
+        if (path := shutil.which(name)) is not None:
+            return path
+    # When the frontend is only available as a shell function, its executable is exported
+    for variable in ("MAMBA_EXE", "CONDA_EXE"):
+        path = os.environ.get(variable)
+        if path is not None and Path(path).is_file():
+            return path
+    raise ExecutableNotFoundError(
+        "Could not find `micromamba`, `mamba` or `conda` to create the environment."
+    )
 
 
 class CondaProject(BaseProject):
-    """Conda environment."""
+    """An AiiDA environment based on `conda`.
+
+    Packages are installed from the configured channels, and resolved environments are cached
+    as explicit specifications: the URLs of all packages. Installing the same packages again then
+    skips the solver, and the packages are hardlinked from the package cache of the frontend.
+    The frontends always compile the bytecode of the installed Python packages themselves.
+    """
 
     _engine = "conda"
 
+    creates_from_lock = True
+
+    hook_extensions: ClassVar[dict[str, str]] = {
+        "bash": "sh",
+        "zsh": "sh",
+        "fish": "fish",
+    }
+
+    def create(self, python_path: Path, wheelhouse: Path | None = None) -> None:
+        super().create(python_path)
+        if self.lock_file is not None and self.lock_file.exists():
+            # Recreate the locked environment, e.g. of an imported project, without solving
+            self._create_from_lock(offline=wheelhouse is not None)
+            self.mark_environment()
+            self.write_completion(get_config().aiida_project_shell)
+            return
+        version = (
+            run(
+                [python_path, "-c", "import sys; print('%d.%d' % sys.version_info[:2])"],
+                capture_stdout=True,
+            )
+            .stdout.decode()
+            .strip()
+        )
+        self._install_specs("create", [f"python={version}"], True, wheelhouse is not None)
+        # Only marked once created, since the frontend replaces the directory of the environment
+        self.mark_environment()
+
+    def environment(self, environ: Mapping[str, str]) -> dict[str, str]:
+        env = super().environment(environ)
+        env.update(CONDA_PREFIX=str(self.venv_path), CONDA_DEFAULT_ENV=str(self.venv_path))
+        return env
+
+    def clone_environment(self, source: BaseProject) -> None:
+        """Create the environment with the packages of ``source``, and copy its hooks.
+
+        The packages are hardlinked from the package cache of the frontend, which has them since
+        they are installed in ``source``, so nothing is downloaded or solved.
+        """
+        assert isinstance(source, CondaProject)
+        lock_file = Path(self.project_path, ".aiida", "conda.lock")
+        replace_text(lock_file, "\n".join(source._explicit()) + "\n")
+        self.lock_file = lock_file
+        self._create_from_lock(offline=True)
+        self.mark_environment()
+        prefixes = self.relocation_prefixes(source)
+        for hook_file in Path(source.venv_path, "etc", "conda").glob("*.d/aiida-project.*"):
+            target = Path(self.venv_path, hook_file.relative_to(source.venv_path))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(hook_file, target)
+            replace_prefixes(target, prefixes)
+        self.write_completion(get_config().aiida_project_shell)
+
+    def destroy(self) -> None:
+        """Destroy the project."""
+        super().destroy()
+        move_to_trash(self.venv_path)
+
+    def _hook_file(self, kind: str) -> Path:
+        extension = self.hook_extensions[get_config().aiida_project_shell]
+        return Path(self.venv_path, "etc", "conda", f"{kind}.d", f"aiida-project.{extension}")
+
+    def append_activate_text(self, text: str) -> None:
+        self._append_hook("activate", text)
+
+    def append_deactivate_text(self, text: str) -> None:
+        self._append_hook("deactivate", text)
+
+    def _append_hook(self, kind: str, text: str) -> None:
+        hook_file = self._hook_file(kind)
+        hook_file.parent.mkdir(parents=True, exist_ok=True)
+        contents = hook_file.read_text() if hook_file.exists() else ""
+        replace_text(hook_file, contents + text)
+
+    def install(
+        self,
+        packages: list[str],
+        use_cache: bool = True,
+        wheelhouse: Path | None = None,
+        compile_bytecode: bool = True,
+    ) -> None:
+        requested = merge_requirements(self.packages, packages)
+        self._install_specs(
+            "install", [self._python_spec(), *requested], use_cache, wheelhouse is not None
+        )
+        self.packages = requested
+        self.write_lock()
+        # Regenerate the completion script, since the `verdi` CLI might have changed
+        self.write_completion(get_config().aiida_project_shell)
+
+    def upgrade(
+        self,
+        packages: list[str],
+        wheelhouse: Path | None = None,
+        refresh: bool = True,
+        compile_bytecode: bool = True,
+    ) -> None:
+        requested = merge_requirements(self.requested_packages(), packages)
+        # Already installed packages are only updated when asked for explicitly
+        command = "update" if Path(find_conda()).name == "micromamba" else "install"
+        extra_args = [] if command == "update" else ["--update-specs"]
+        self._install_specs(
+            command,
+            [self._python_spec(), *requested],
+            not refresh,
+            wheelhouse is not None,
+            extra_args,
+        )
+        self.packages = requested
+        self.write_lock()
+        self.write_completion(get_config().aiida_project_shell)
+
+    def _install_specs(
+        self,
+        command: str,
+        specs: list[str],
+        use_cache: bool,
+        offline: bool,
+        extra_args: list[str] | None = None,
+    ) -> None:
+        """Run the conda ``command`` for the ``specs``.
+
+        If the ``specs`` were resolved before, the cached explicit specification is installed
+        instead, which skips the solver.
+        """
+        resolution_cache = ResolutionCache(get_config().aiida_cache_dir)
+        resolution_key = self._resolution_key()
+        explicit = resolution_cache.get(resolution_key, specs) if use_cache else None
+        # Also pass the channels for explicit specifications, so `conda` doesn't contact the default
+        # channels, e.g. for their terms of service
+        conda_args = ["-y", "-p", str(self.venv_path), *self._channel_args()]
+        if offline:
+            conda_args.append("--offline")
+
+        if explicit is not None:
+            explicit_command = "create" if command == "create" else "install"
+            with tempfile.NamedTemporaryFile("w", suffix=".txt") as handle:
+                handle.write("\n".join(explicit) + "\n")
+                handle.flush()
+                run([find_conda(), explicit_command, *conda_args, "--file", handle.name])
+            return
+
+        run([find_conda(), command, *conda_args, *(extra_args or []), *specs])
+        resolution_cache.put(resolution_key, specs, self._explicit())
+
+    @staticmethod
+    def _channel_args() -> list[str]:
+        channel_args = ["--override-channels"]
+        for channel in get_config().aiida_conda_channels:
+            channel_args.extend(["-c", channel])
+        return channel_args
+
+    @staticmethod
+    def _resolution_key() -> str:
+        """Identify the platform and channels the packages are resolved for."""
+        return "|".join(
+            ["conda", sys.platform, platform.machine(), *get_config().aiida_conda_channels]
+        )
+
+    def _python_spec(self) -> str:
+        """Return the specification of the Python version installed in the environment."""
+        version = python_version(self.venv_path)
+        if version is None:
+            raise FileNotFoundError(f"No Python installed in the environment of `{self.name}`.")
+        return "python=" + ".".join(version.split(".")[:2])
+
+    def _explicit(self) -> list[str]:
+        """Return the explicit specification of the environment, i.e. the URLs of all packages."""
+        list_args = (
+            ["env", "export", "--explicit"]
+            if Path(find_conda()).name == "micromamba"
+            else ["list", "--explicit", "--md5"]
+        )
+        result = run([find_conda(), *list_args, "-p", str(self.venv_path)], capture_stdout=True)
+        return [
+            line.strip()
+            for line in result.stdout.decode().splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+
+    def _create_from_lock(self, offline: bool) -> None:
+        """Create the environment from the explicit specification in the lock file."""
+        create_command = [find_conda(), "create", "-y", "-p", str(self.venv_path)]
+        if offline:
+            create_command.append("--offline")
+        run([*create_command, *self._channel_args(), "--file", str(self.lock_file)])
+
+    def write_lock(self) -> None:
+        """Write the explicit specification of the environment to the lock file of the project."""
+        lock_file = Path(self.project_path, ".aiida", "conda.lock")
+        replace_text(lock_file, "\n".join(self._explicit()) + "\n")
+        self.lock_file = lock_file
 
-#     def __init__(self, project_path):
-#         super().__init__(project_path)
-#         self.conda_info = json.loads(
-#             subprocess.check_output(["conda", "info", "-a", "--json"])
-#         )
-
-#     @property
-#     def conda_path(self):
-#         return py.path.local(self.conda_info["conda_prefix"])
-
-#     @property
-#     def venv_path(self):
-#         for path in self.conda_info["envs_dirs"]:
-#             env_collection_path = py.path.local(path)
-#             env_path = env_collection_path.join(self.venv_name)
-#             if env_path.exists():
-#                 return env_path
-#         return None
-
-#     def create(self, name, python=None):
-#         self._venv_name = name
-#         if not self.venv_path:
-#             conda_command = ["conda", "create", "-y", "-n", name, "python=2"]
-#             subprocess.check_call(conda_command)
-
-#     def add_activate_script(self, path):
-#         activate_d_path = self.venv_path.join("etc", "conda", "activate.d")
-#         activate_d_path.ensure_dir()
-#         os.symlink(path.strpath, activate_d_path.join(path.basename).strpath)
-
-#     def add_deactivate_scritp(self, path):
-#         deactivate_d_path = self.venv_path.join("etc", "conda", "deactivate.d")
-#         deactivate_d_path.ensure_dir()
-#         os.symlink(path.strpath, deactivate_d_path.join(path.basename).strpath)
+    def sync(self, wheelhouse: Path | None = None, compile_bytecode: bool = True) -> None:
+        if self.lock_file is None:
+            raise FileNotFoundError(f"Project `{self.name}` does not have a lock file.")
+        # Recreating the environment removes it first, including the activation hooks
+        hooks = {
+            hook_file: hook_file.read_text()
+            for hook_file in Path(self.venv_path, "etc", "conda").glob("*.d/aiida-project.*")
+        }
+        self._create_from_lock(offline=wheelhouse is not None)
+        self.mark_environment()
+        for hook_file, text in hooks.items():
+            hook_file.parent.mkdir(parents=True, exist_ok=True)
+            replace_text(hook_file, text)
+        self.write_completion(get_config().aiida_project_shell)
@@ -1,13 +1,26 @@
 from __future__ import annotations
 
-from enum import Enum
+import json
+import os
+import time
+import uuid
+from collections.abc import Iterator, Mapping
 from pathlib import Path
+from typing import Any, ClassVar
 
-from ..config import ProjectConfig
+from ..cache import site_packages
+from ..config import get_config
+from ..disk import UsageCache, tree_usage
+from ..enums import EngineType
+from ..locking import ProjectLock
+from ..metadata import environment_metadata
 from .base import BaseProject
 from .conda import CondaProject
 from .venv import VenvProject
 
+RACY_WINDOW_NS = 2_000_000_000
+"""Modification times more recent than this might not reflect all changes in the same tick."""
+
 
 def load_project_class(engine_type: str) -> type[BaseProject]:
     """Load the project class corresponding the engine type."""
@@ -18,34 +31,235 @@ def load_project_class(engine_type: str) -> type[BaseProject]:
     return engine_project_dict[engine_type]
 
 
-class EngineType(str, Enum):
-    venv = "venv"
-    conda = "conda"
+class ProjectDict:
+    """Registry of all projects, stored as one JSON file per project.
 
+    Looking up projects is done via a single index file that maps each project name to its engine
+    and raw JSON contents. The index is only a cache of the project files: an engine directory is
+    rescanned whenever its modification time differs from the one recorded in the index, and full
+    `BaseProject` models are only validated when a project is actually requested.
 
-class ProjectDict:
-    _projects_path = Path(ProjectConfig().aiida_project_dir, ".aiida_projects")
+    Project files are written to a temporary file and moved in place, so other processes never
+    read a partially written project. Concurrent processes can each write the index, in which
+    case the last one wins, but changes it misses are picked up by the next rescan. Processes
+    that modify a project should hold its `lock`.
+    """
+
+    _index_version = 2
+    # NOTE: Older versions of `aiida-project` load every `*.json` file in the projects directory,
+    # so the index should not have a `.json` suffix.
+    _index_name = "registry.index"
+    _legacy_engine_names: ClassVar[dict[str, str]] = {"virtualenv": "venv"}
 
     def __init__(self) -> None:
-        if not self._projects_path.exists():
-            self._projects_path.joinpath("venv").mkdir(parents=True, exist_ok=True)
-            self._projects_path.joinpath("conda").mkdir(parents=True, exist_ok=True)
+        for engine in EngineType:
+            self._projects_path.joinpath(engine.value).mkdir(parents=True, exist_ok=True)
+        self._migrate_legacy_layout()
+        self._index = self._load_index()
+        self._models: dict[str, BaseProject] = {}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index["projects"]
 
     @property
-    def projects(self) -> dict[str, BaseProject]:
-        projects = {}
-        for project_file in self._projects_path.glob("**/*.json"):
-            engine = load_project_class(str(project_file.parent.name))
-            project = engine.parse_file(project_file)
-            projects[project.name] = project
-        return projects
+    def _projects_path(self) -> Path:
+        return Path(get_config().aiida_project_dir, ".aiida_projects")
+
+    @property
+    def projects(self) -> Mapping[str, BaseProject]:
+        """Mapping of all project names to their `BaseProject`, loaded on access."""
+        return _LazyProjects(self)
+
+    def lock(self, name: str) -> ProjectLock:
+        """Return the lock of the project ``name``, which doesn't have to exist yet."""
+        return ProjectLock(Path(self._projects_path, ".locks", f"{name}.lock"))
+
+    def registered(self, name: str) -> bool:
+        """Check whether the project ``name`` exists on disk, which the index might not reflect yet.
+
+        Only reliable while holding the `lock` of the project.
+        """
+        return any(self._project_file(engine.value, name).exists() for engine in EngineType)
+
+    def names(self, engine: str | None = None) -> list[str]:
+        """Return the names of all projects, optionally only those of a certain ``engine``."""
+        return [
+            name
+            for name, entry in self._index["projects"].items()
+            if engine is None or entry["engine"] == engine
+        ]
+
+    def get(self, name: str) -> BaseProject | None:
+        """Return the project named ``name``, or `None` if there is no such project."""
+        entry = self._index["projects"].get(name)
+        if entry is None:
+            return None
+
+        project_file = self._project_file(entry["engine"], name)
+        try:
+            stamp = _file_stamp(project_file.stat())
+            if stamp != entry["stamp"]:
+                self._models.pop(name, None)
+                entry.update(stamp=stamp, data=json.loads(project_file.read_text()))
+        except FileNotFoundError:
+            return None
+
+        if name not in self._models:
+            engine = load_project_class(entry["engine"])
+            self._models[name] = engine.model_validate(entry["data"])
+        return self._models[name]
 
     def add_project(self, project: BaseProject) -> None:
         """Add a project to the configuration files."""
-        with Path(self._projects_path, project.engine, f"{project.name}.json").open("w") as handle:
-            handle.write(project.json())
+        project_file = self._project_file(project.engine, project.name)
+        tmp_file = project_file.with_name(f".{project_file.name}.{uuid.uuid4().hex}")
+        tmp_file.write_text(project.model_dump_json())
+        os.replace(tmp_file, project_file)
+        self._index["projects"][project.name] = {
+            "engine": project.engine,
+            "stamp": _file_stamp(project_file.stat()),
+            "data": json.loads(project.model_dump_json()),
+        }
+        self._models[project.name] = project
+        self._write_index(self._index)
 
     def remove_project(self, project: str | BaseProject) -> None:
         """Remove a project from the configuration files."""
-        project = self.projects[project] if isinstance(project, str) else project
-        Path(self._projects_path, project.engine, f"{project.name}.json").unlink()
+        name = project if isinstance(project, str) else project.name
+        entry = self._index["projects"].pop(name)
+        self._models.pop(name, None)
+        self._project_file(entry["engine"], name).unlink(missing_ok=True)
+        self._write_index(self._index)
+
+    def environment_metadata(self, names: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        """Return the metadata of the environments of the projects ``names``, by default all.
+
+        The metadata is cached in the index and only read again from the environment when the
+        modification time of its `site-packages` changed, i.e. when packages were installed or
+        removed. Projects of which the environment is missing have empty metadata.
+        """
+        usage_cache = UsageCache(Path(get_config().aiida_cache_dir, "du.json"))
+        results: dict[str, dict[str, Any]] = {}
+        updated = False
+        for name in self.names() if names is None else names:
+            entry = self._index["projects"][name]
+            venv_path = Path(entry["data"]["venv_path"])
+            try:
+                mtime_ns = site_packages(venv_path).stat().st_mtime_ns
+            except (FileNotFoundError, StopIteration):
+                results[name] = {}
+                continue
+            metadata = entry.get("metadata")
+            if metadata is None or metadata["site_packages_mtime_ns"] != mtime_ns:
+                metadata = environment_metadata(venv_path)
+                metadata["size"] = tree_usage(venv_path, usage_cache).total
+                metadata["site_packages_mtime_ns"] = mtime_ns
+                entry["metadata"] = metadata
+                updated = True
+            results[name] = metadata
+
+        if updated:
+            self._write_index(self._index)
+            usage_cache.save(prune=False)
+        return results
+
+    def _project_file(self, engine: str, name: str) -> Path:
+        return Path(self._projects_path, engine, f"{name}.json")
+
+    def _migrate_legacy_layout(self) -> None:
+        """Move project files from legacy engine directories to the current ones."""
+        for legacy_name, engine in self._legacy_engine_names.items():
+            legacy_path = Path(self._projects_path, legacy_name)
+            if not legacy_path.is_dir():
+                continue
+            for project_file in legacy_path.glob("*.json"):
+                project_file.rename(Path(self._projects_path, engine, project_file.name))
+            legacy_path.rmdir()
+
+    def _load_index(self) -> dict[str, Any]:
+        """Load the index, rescanning the engine directories that have changed since."""
+        index_file = Path(self._projects_path, self._index_name)
+        try:
+            index: dict[str, Any] = json.loads(index_file.read_text())
+        except (FileNotFoundError, ValueError):
+            index = {}
+        if index.get("version") != self._index_version:
+            index = {"version": self._index_version, "engines": {}, "projects": {}}
+
+        updated = False
+        for engine in EngineType:
+            engine_path = Path(self._projects_path, engine.value)
+            # Record the modification time *before* scanning, so any change during the scan
+            # triggers another one next time.
+            mtime_ns = engine_path.stat().st_mtime_ns
+            if index["engines"].get(engine.value) == mtime_ns:
+                continue
+            self._scan_engine(index, engine.value)
+            # Changes in the same tick of the filesystem clock don't change the modification
+            # time, so the directory is scanned again until its last change is old enough
+            racy = time.time_ns() - mtime_ns < RACY_WINDOW_NS
+            index["engines"][engine.value] = None if racy else mtime_ns
+            updated = True
+
+        if updated:
+            self._write_index(index)
+        return index
+
+    def _scan_engine(self, index: dict[str, Any], engine: str) -> None:
+        """Update the ``index`` entries of the ``engine``, only reading files that have changed."""
+        projects = index["projects"]
+        found = set()
+        with os.scandir(Path(self._projects_path, engine)) as entries:
+            for dir_entry in entries:
+                if not dir_entry.name.endswith(".json"):
+                    continue
+                name = dir_entry.name[: -len(".json")]
+                try:
+                    stamp = _file_stamp(dir_entry.stat())
+                    entry = projects.get(name)
+                    if entry is None or (entry["engine"], entry["stamp"]) != (engine, stamp):
+                        with open(dir_entry.path) as handle:
+                            data = json.load(handle)
+                        projects[name] = {"engine": engine, "stamp": stamp, "data": data}
+                except FileNotFoundError:
+                    # Removed by another process in the meantime
+                    continue
+                found.add(name)
+
+        for name in [name for name, entry in projects.items() if entry["engine"] == engine]:
+            if name not in found:
+                del projects[name]
+
+    def _write_index(self, index: dict[str, Any]) -> None:
+        """Write the ``index`` to a temporary file and move it in place."""
+        index_file = Path(self._projects_path, self._index_name)
+        tmp_file = index_file.with_name(f".{self._index_name}.{uuid.uuid4().hex}")
+        tmp_file.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp_file, index_file)
+
+
+def _file_stamp(stat: os.stat_result) -> list[int]:
+    """Identify the version of a project file, which gets a new inode each time it's written."""
+    return [stat.st_mtime_ns, stat.st_ino, stat.st_size]
+
+
+class _LazyProjects(Mapping[str, BaseProject]):
+    """Read-only view of the projects in a `ProjectDict` that only loads requested projects."""
+
+    def __init__(self, project_dict: ProjectDict) -> None:
+        self._project_dict = project_dict
+
+    def __getitem__(self, name: str) -> BaseProject:
+        project = self._project_dict.get(name)
+        if project is None:
+            raise KeyError(name)
+        return project
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._project_dict
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._project_dict.names())
+
+    def __len__(self) -> int:
+        return len(self._project_dict.names())
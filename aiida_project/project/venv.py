@@ -1,23 +1,31 @@
-import shutil
-import subprocess
-import sys
+from __future__ import annotations
+
+import tempfile
+from collections.abc import Mapping
 from pathlib import Path
+from subprocess import CalledProcessError
 from typing import ClassVar
 
-from aiida_project.config import ProjectConfig
-from aiida_project.project.base import BaseProject
+from aiida_project.cache import (
+    EnvironmentLayer,
+    LayerCache,
+    ResolutionCache,
+    is_direct_reference,
+    is_pristine,
+    link_tree,
+    replace_prefixes,
+    site_packages,
+)
+from aiida_project.config import get_config
+from aiida_project.metadata import top_level_distributions
+from aiida_project.pool import EnvironmentPool
+from aiida_project.process import run
+from aiida_project.project.base import BaseProject, merge_requirements, replace_text
+from aiida_project.trash import move_to_trash
+from aiida_project.uv import bytecode_args, find_uv, index_args
 
 __all__ = ["VenvProject"]
 
-# uv should be installed in the same place as aiida-project itself
-# NOTE: We convert Path to str here for type-checking purposes. :-/
-UV_EXE = (Path(sys.executable).parent / "uv").as_posix()
-if not Path(UV_EXE).is_file():
-    if (which_uv := shutil.which("uv")) is None:
-        sys.exit("ERROR: Could not find uv executable. Maybe try re-installing aiida-project?")
-    else:
-        UV_EXE = which_uv
-
 
 class VenvProject(BaseProject):
     """An AiiDA environment based on `venv`."""
@@ -35,52 +43,313 @@ class VenvProject(BaseProject):
         "fish": 'function deactivate -d "Exit virtual environment"',
     }
 
-    def create(self, python_path: Path) -> None:
+    def create(self, python_path: Path, wheelhouse: Path | None = None) -> None:
         super().create(python_path)
         self.venv_path.mkdir(
             exist_ok=True,
             parents=True,
         )
+        # Marked first, so `gc` can remove the environment if its creation fails
+        self.mark_environment()
         venv_command = [
-            UV_EXE,
+            find_uv(),
             "venv",
             "--no-project",
             "--allow-existing",
             "--seed",
+            *index_args(wheelhouse),
             "-p",
             f"{python_path.resolve()}",
             str(self.venv_path),
         ]
-        subprocess.run(venv_command, check=True, capture_output=True)
+        run(venv_command)
+
+    def environment(self, environ: Mapping[str, str]) -> dict[str, str]:
+        env = super().environment(environ)
+        env["VIRTUAL_ENV"] = str(self.venv_path)
+        return env
+
+    def create_from_pool(self, pool: EnvironmentPool, key: str) -> bool:
+        """Create the project with a spare environment from the ``pool``, if there is one left.
+
+        The packages installed in the spare are recorded as those of the project, along with
+        their lock file.
+        """
+        if self.venv_path.exists():
+            return False
+        spare = pool.claim(key, self.venv_path)
+        if spare is None:
+            return False
+        self.mark_environment()
+        super().create(Path(spare["python"]))
+        lock_file = Path(self.project_path, ".aiida", "requirements.lock")
+        replace_text(lock_file, spare["lock"])
+        self.lock_file = lock_file
+        self.packages = spare["packages"]
+        return True
+
+    def clone_environment(self, source: BaseProject) -> None:
+        """Hardlink all files of the environment of ``source``, and relocate its scripts.
+
+        Only the scripts in `bin`, `pyvenv.cfg` and the files of `aiida-project` in `etc` contain
+        the paths of the environment or project. They are replaced by relocated copies, so the
+        files of ``source`` are left alone.
+        """
+        link_tree(source.venv_path, self.venv_path)
+        self.activation_file().unlink(missing_ok=True)
+        self.mark_environment()
+        prefixes = self.relocation_prefixes(source)
+        for path in [
+            Path(self.venv_path, "pyvenv.cfg"),
+            *Path(self.venv_path, "bin").iterdir(),
+            *Path(self.venv_path, "etc", "aiida-project").glob("*"),
+        ]:
+            if path.is_file() and not path.is_symlink():
+                replace_prefixes(path, prefixes)
 
     def destroy(self) -> None:
         """Destroy the project."""
         super().destroy()
-        shutil.rmtree(self.venv_path, ignore_errors=True)
+        move_to_trash(self.venv_path)
 
     def append_activate_text(self, text: str) -> None:
-        activate_file = self.shell_activate_mapping[ProjectConfig().aiida_project_shell]
-        with Path(self.venv_path, "bin", activate_file).open("a") as handle:
-            handle.write(text)
+        activate_path = self._activate_path()
+        replace_text(activate_path, activate_path.read_text() + text)
 
     def append_deactivate_text(self, text: str) -> None:
-        activate_file = self.shell_activate_mapping[ProjectConfig().aiida_project_shell]
-        with Path(self.venv_path, "bin", activate_file).open("r") as handle:
-            contents = handle.read()
+        activate_path = self._activate_path()
+        contents = activate_path.read_text()
 
         # Make sure the content has the right indent - Required to satisfy Python-OCD
         text = "\n".join([" " * 4 + line.lstrip(" ") for line in text.splitlines()])
-        replace_line = self.shell_deactivate_mapping[ProjectConfig().aiida_project_shell]
-
-        with Path(self.venv_path, "bin", activate_file).open("w") as handle:
-            handle.write(
-                contents.replace(
-                    replace_line,
-                    replace_line + f"\n{text}\n",
-                )
-            )
+        replace_line = self.shell_deactivate_mapping[get_config().aiida_project_shell]
+
+        replace_text(activate_path, contents.replace(replace_line, replace_line + f"\n{text}\n"))
+
+    def _activate_path(self) -> Path:
+        activate_file = self.shell_activate_mapping[get_config().aiida_project_shell]
+        return Path(self.venv_path, "bin", activate_file)
+
+    def install(
+        self,
+        packages: list[str],
+        use_cache: bool = True,
+        wheelhouse: Path | None = None,
+        compile_bytecode: bool = True,
+    ) -> None:
+        current = self.requested_packages()
+        layer = self._install_packages(packages, use_cache, wheelhouse, compile_bytecode)
+        self.packages = merge_requirements(current, packages)
+        self.write_lock()
+        lock_layer = self._lock_layer()
+        if layer is not None and lock_layer is not None:
+            # Environments synced with the lock file, e.g. of an imported project, can then use
+            # the same layer
+            layer.link(lock_layer)
+        # Regenerate the completion script, since the `verdi` CLI might have changed
+        self.write_completion(get_config().aiida_project_shell)
+
+    def requested_packages(self) -> list[str]:
+        """Return the packages requested for the project.
+
+        For projects registered before these were recorded, they're derived from the installed
+        distributions, see `top_level_distributions`.
+        """
+        if self.packages or is_pristine(self.venv_path):
+            return self.packages
+        return top_level_distributions(self.venv_path)
+
+    def _install_packages(
+        self,
+        packages: list[str],
+        use_cache: bool,
+        wheelhouse: Path | None,
+        compile_bytecode: bool,
+    ) -> EnvironmentLayer | None:
+        """Install the ``packages``, and return the layer of the environment if it is cached."""
+        python_path = Path(self.venv_path, "bin", "python").as_posix()
+        uv_pip_install = [
+            find_uv(),
+            "pip",
+            "install",
+            *index_args(wheelhouse),
+            *bytecode_args(compile_bytecode),
+            "-p",
+            python_path,
+        ]
+        # The layer cache only applies to fresh environments, else it would discard packages
+        if (
+            not use_cache
+            or not is_pristine(self.venv_path)
+            or any(is_direct_reference(package) for package in packages)
+        ):
+            run([*uv_pip_install, *packages])
+            return None
+
+        requirements = self.resolve(packages, wheelhouse)
+        layer = self._layer(requirements)
+        if layer is not None and layer.exists():
+            layer.materialise(self.venv_path)
+            if compile_bytecode and not layer.has_bytecode():
+                self._compile_bytecode()
+                layer.add_bytecode(self.venv_path)
+            return layer
+
+        base_scripts = {script.name for script in Path(self.venv_path, "bin").iterdir()}
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as handle:
+            handle.write("\n".join(requirements))
+            handle.flush()
+            run([*uv_pip_install, "-r", handle.name])
+        if layer is not None:
+            layer.store(self.venv_path, base_scripts, requirements, bytecode=compile_bytecode)
+        return layer
+
+    def _compile_bytecode(self) -> None:
+        """Compile the Python files in the environment, using all cores.
 
-    def install(self, packages: list[str]) -> None:
+        `uv` only compiles the files if it installed any packages, which isn't the case for an
+        environment materialised from a layer stored without bytecode.
+        """
         python_path = Path(self.venv_path, "bin", "python").as_posix()
-        install_command = [UV_EXE, "pip", "install", "-p", python_path, *packages]
-        subprocess.run(install_command, capture_output=True, check=True)
+        compile_command = [python_path, "-m", "compileall", "-qq", "-j", "0"]
+        try:
+            run([*compile_command, site_packages(self.venv_path).as_posix()])
+        except CalledProcessError:
+            # Like `uv`, leave the files that can't be compiled, e.g. templates, as they are
+            pass
+
+    def upgrade(
+        self,
+        packages: list[str],
+        wheelhouse: Path | None = None,
+        refresh: bool = True,
+        compile_bytecode: bool = True,
+    ) -> None:
+        requested = merge_requirements(self.requested_packages(), packages)
+        requirements = self.resolve(requested, wheelhouse, refresh=refresh)
+        python_path = Path(self.venv_path, "bin", "python").as_posix()
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as handle:
+            handle.write("\n".join(requirements))
+            handle.flush()
+            install_command = [
+                find_uv(),
+                "pip",
+                "install",
+                *index_args(wheelhouse),
+                *bytecode_args(compile_bytecode),
+                "-p",
+                python_path,
+                "-r",
+                handle.name,
+            ]
+            run(install_command)
+        self.packages = requested
+        self.write_lock()
+        self.write_completion(get_config().aiida_project_shell)
+
+    def resolve(
+        self, packages: list[str], wheelhouse: Path | None = None, refresh: bool = False
+    ) -> list[str]:
+        """Resolve the ``packages`` into the pinned requirements for this environment.
+
+        Resolutions are cached per Python version and set of requested packages, so projects
+        with the same specifications skip the dependency resolution and get the same versions.
+        With a ``wheelhouse``, only the wheels in that directory are considered, and the
+        resolution is cached separately. Use ``refresh`` to resolve the packages again, e.g. to
+        pick up new releases, and update the cache. Packages with a path or URL are always
+        resolved again, see `is_direct_reference`.
+        """
+        resolution_cache = ResolutionCache(get_config().aiida_cache_dir)
+        python_key = ResolutionCache.python_key(self.venv_path)
+        if wheelhouse is not None:
+            python_key += f"|{wheelhouse.resolve()}"
+        if any(is_direct_reference(package) for package in packages):
+            return self._compile(packages, wheelhouse)
+        requirements = None if refresh else resolution_cache.get(python_key, packages)
+        if requirements is None:
+            requirements = self._compile(packages, wheelhouse)
+            resolution_cache.put(python_key, packages, requirements)
+        return requirements
+
+    def _compile(self, packages: list[str], wheelhouse: Path | None) -> list[str]:
+        python_path = Path(self.venv_path, "bin", "python").as_posix()
+        with tempfile.NamedTemporaryFile("w", suffix=".in") as handle:
+            handle.write("\n".join(packages))
+            handle.flush()
+            compile_command = [
+                find_uv(),
+                "pip",
+                "compile",
+                "--no-header",
+                "--no-annotate",
+                *index_args(wheelhouse),
+                "-p",
+                python_path,
+                handle.name,
+            ]
+            result = run(compile_command, capture_stdout=True)
+        return [
+            line.strip()
+            for line in result.stdout.decode().splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+
+    def write_lock(self) -> None:
+        """Write the exact versions of all installed packages to the lock file of the project."""
+        python_path = Path(self.venv_path, "bin", "python").as_posix()
+        freeze_command = [find_uv(), "pip", "freeze", "-p", python_path]
+        result = run(freeze_command, capture_stdout=True)
+        lock_file = Path(self.project_path, ".aiida", "requirements.lock")
+        replace_text(lock_file, result.stdout.decode())
+        self.lock_file = lock_file
+
+    def _lock_requirements(self) -> list[str]:
+        if self.lock_file is None:
+            raise FileNotFoundError(f"Project `{self.name}` does not have a lock file.")
+        return [
+            line.strip()
+            for line in self.lock_file.read_text().splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+
+    def _layer(self, requirements: list[str]) -> EnvironmentLayer | None:
+        """Return the layer for the resolved ``requirements``, if it can be cached."""
+        if any(is_direct_reference(requirement) for requirement in requirements):
+            return None
+        return LayerCache(get_config().aiida_cache_dir).layer(
+            LayerCache.interpreter_key(self.venv_path), requirements
+        )
+
+    def _lock_layer(self) -> EnvironmentLayer | None:
+        """Return the layer for the packages in the lock file, if it can be cached."""
+        return self._layer(self._lock_requirements())
+
+    def sync(self, wheelhouse: Path | None = None, compile_bytecode: bool = True) -> None:
+        if self.lock_file is None:
+            raise FileNotFoundError(f"Project `{self.name}` does not have a lock file.")
+        # Fresh environments, e.g. of imported projects, are synced from the layer cache if possible
+        layer = self._lock_layer() if is_pristine(self.venv_path) else None
+        base_scripts = {script.name for script in Path(self.venv_path, "bin").iterdir()}
+        materialised = layer is not None and layer.exists()
+        if layer is not None and materialised:
+            layer.materialise(self.venv_path)
+        python_path = Path(self.venv_path, "bin", "python").as_posix()
+        sync_command = [
+            find_uv(),
+            "pip",
+            "sync",
+            *index_args(wheelhouse),
+            *bytecode_args(compile_bytecode),
+            "-p",
+            python_path,
+            str(self.lock_file),
+        ]
+        run(sync_command)
+        if layer is not None and materialised and compile_bytecode and not layer.has_bytecode():
+            self._compile_bytecode()
+            layer.add_bytecode(self.venv_path)
+        if layer is not None and not layer.exists():
+            layer.store(
+                self.venv_path, base_scripts, self._lock_requirements(), bytecode=compile_bytecode
+            )
+        self.write_completion(get_config().aiida_project_shell)
@@ -0,0 +1,80 @@
+"""Running a command in the environments of several projects at once.
+
+The environments aren't activated by sourcing their activate scripts: the command is started
+directly, with the variables the activation would set and in the project directory, like `cda`.
+At most ``jobs`` commands run at the same time, each in its own process.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .project.base import BaseProject
+
+DEFAULT_JOBS = 8
+
+
+def run_in_projects(
+    projects: list[BaseProject],
+    command: list[str],
+    jobs: int = DEFAULT_JOBS,
+    on_line: Callable[[str, str], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Run the ``command`` in the environment of each of the ``projects``.
+
+    The standard output and error of each command are passed line by line to ``on_line``, with
+    the name of the project, and the lines of different commands are never mixed. Without
+    ``on_line``, the output is returned as part of the result instead.
+    Returns the exit code, duration and output of the command for each project, in order. The exit
+    code is `None` if the command could not be started, in which case the output is the error.
+    """
+    output_lock = threading.Lock()
+
+    def run_project(project: BaseProject) -> dict[str, Any]:
+        lines: list[str] = []
+
+        def add_line(line: str) -> None:
+            if on_line is None:
+                lines.append(line)
+            else:
+                with output_lock:
+                    on_line(project.name, line)
+
+        exit_code = None
+        start = time.perf_counter()
+        missing = [path for path in (project.venv_path, project.project_path) if not path.is_dir()]
+        if missing:
+            add_line(f"Directory '{missing[0]}' of the project does not exist.")
+        else:
+            try:
+                process = subprocess.Popen(
+                    command,
+                    cwd=project.project_path,
+                    env=project.environment(os.environ),
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+            except OSError as exception:
+                add_line(f"{command[0]}: {exception.strerror}")
+            else:
+                with process:
+                    assert process.stdout is not None
+                    for line in process.stdout:
+                        add_line(line.decode(errors="replace").rstrip("\r\n"))
+                exit_code = process.returncode
+        return {
+            "name": project.name,
+            "exit_code": exit_code,
+            "duration_s": time.perf_counter() - start,
+            "output": None if on_line is not None else "\n".join(lines),
+        }
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_project, projects))
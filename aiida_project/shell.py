@@ -2,18 +2,17 @@
 
 from __future__ import annotations
 
-from enum import Enum
+import shlex
+from functools import cache
 from importlib import resources
 from pathlib import Path
+from typing import Literal
 
-import yaml
 from pydantic import BaseModel, field_validator
 
+from .enums import ShellType
 
-class ShellType(str, Enum):
-    bash = "bash"
-    zsh = "zsh"
-    fish = "fish"
+__all__ = ["Shell", "ShellType", "load_shell"]
 
 
 class Shell(BaseModel):
@@ -21,8 +20,16 @@ class Shell(BaseModel):
     """Path to shell configuration relative to home directory."""
     init_lines: str
     """Lines to add to the shell configuration files when using `aiida-project init`."""
+    env_line: str
+    """Line that exports a configuration value as an environment variable."""
+    quoting: Literal["posix", "fish"]
+    """Quoting rules used for the values in the `env_line`."""
     activate: str
-    """AiiDA-specific lines to add to the environment's activate script."""
+    """AiiDA-specific lines to add to the environment's activate script.
+
+    Besides setting the `AIIDA_PATH`, these source the `verdi` completion script generated when
+    installing packages, and only regenerate it in case `verdi` has been reinstalled since.
+    """
     deactivate: str
     """AiiDA-specific lines to add to the environment's deactivate script."""
 
@@ -32,9 +39,28 @@ class Shell(BaseModel):
         """Resolve the shell configuration file."""
         return Path.home() / value
 
+    def quote(self, value: str) -> str:
+        """Quote the ``value`` so the shell interprets it literally."""
+        if self.quoting == "fish":
+            return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+        return shlex.quote(value)
+
+    def render_env(self, values: dict[str, str | None]) -> str:
+        """Render the configuration ``values`` as a snippet that exports them in this shell."""
+        lines = ["# Generated by `aiida-project` from its configuration file, do not edit."]
+        lines.extend(
+            self.env_line.format(key=key, value=self.quote(value))
+            for key, value in values.items()
+            if value is not None
+        )
+        return "\n".join(lines) + "\n"
 
+
+@cache
 def load_shell(shell_str: str) -> Shell:
     """Load the project class corresponding the engine type."""
+    import yaml
+
     from . import data
 
     with (resources.files(data) / "shell_fields.yaml").open("r") as handle:
@@ -0,0 +1,35 @@
+"""Timing instrumentation for the phases of a command."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+
+
+class Timings:
+    """Records the duration of each named phase, in the order they are run.
+
+    The context returned by ``on_span`` for the name of each phase, if given, is entered around
+    the phase, e.g. to report its progress.
+    """
+
+    def __init__(
+        self, on_span: Callable[[str], AbstractContextManager[object]] | None = None
+    ) -> None:
+        self.spans: dict[str, float] = {}
+        self.on_span = on_span
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the code run in this context as the phase ``name``."""
+        start = time.perf_counter()
+        try:
+            with nullcontext() if self.on_span is None else self.on_span(name):
+                yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - start
+
+    @property
+    def total(self) -> float:
+        return sum(self.spans.values())
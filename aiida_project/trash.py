@@ -0,0 +1,158 @@
+"""Moving destroyed project trees out of the way, so they can be deleted in the background.
+
+Trees are renamed into a trash directory next to them, which is on the same filesystem, so the
+rename is atomic and instant. The trash directories are then emptied by a detached process,
+which can be started again with `python -m aiida_project.trash` in case it was interrupted.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from uuid import uuid4
+
+from .locking import ProjectLock
+
+TRASH_DIR_NAME = ".aiida_trash"
+PID_FILE_NAME = ".purge.pid"
+LOCK_FILE_NAME = ".purge.lock"
+LOG_FILE_NAME = ".purge.log"
+DEFAULT_WORKERS = 8
+
+
+def trash_dir(path: Path) -> Path:
+    """Return the trash directory for the tree at ``path``."""
+    return Path(path.parent, TRASH_DIR_NAME)
+
+
+def move_to_trash(path: Path) -> Path | None:
+    """Atomically move the tree at ``path`` into its trash directory.
+
+    Returns the new path of the tree, or `None` if there was nothing to move. If the tree is on
+    another filesystem than its parent directory, e.g. a mount point, it is deleted right away.
+    """
+    trash = trash_dir(path)
+    trash.mkdir(parents=True, exist_ok=True)
+    trashed_path = Path(trash, f"{path.name}-{uuid4().hex}")
+    try:
+        os.rename(path, trashed_path)
+    except FileNotFoundError:
+        return None
+    except OSError as exception:
+        if exception.errno != errno.EXDEV:
+            raise
+        remove_tree(path)
+        return None
+    return trashed_path
+
+
+def trash_entries(trash: Path) -> list[Path]:
+    """Return the trees in the ``trash`` directory that still have to be deleted."""
+    if not trash.is_dir():
+        return []
+    return sorted(path for path in trash.iterdir() if not path.name.startswith("."))
+
+
+def remove_tree(path: Path, workers: int = DEFAULT_WORKERS) -> None:
+    """Remove the tree at ``path``, walking and emptying its directories in parallel.
+
+    The directories are walked level by level, removing the files of all directories in each
+    level concurrently. The then empty directories are removed from the deepest level up.
+    """
+    if path.is_symlink() or not path.is_dir():
+        path.unlink(missing_ok=True)
+        return
+    levels = [[path.as_posix()]]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while levels[-1]:
+            levels.append(
+                [
+                    subdirectory
+                    for subdirectories in executor.map(_empty_directory, levels[-1])
+                    for subdirectory in subdirectories
+                ]
+            )
+        for level in reversed(levels):
+            list(executor.map(_remove_directory, level))
+
+
+def _empty_directory(directory: str) -> list[str]:
+    """Remove all files in the ``directory`` and return its subdirectories."""
+    subdirectories = []
+    with suppress(FileNotFoundError), os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            else:
+                with suppress(FileNotFoundError):
+                    os.unlink(entry.path)
+    return subdirectories
+
+
+def _remove_directory(directory: str) -> None:
+    with suppress(FileNotFoundError):
+        os.rmdir(directory)
+
+
+def purge_pid(trash: Path) -> int | None:
+    """Return the process ID of the process emptying the ``trash``, if it's still running."""
+    try:
+        pid = int(Path(trash, PID_FILE_NAME).read_text())
+        os.kill(pid, 0)
+    except (FileNotFoundError, ValueError, ProcessLookupError):
+        return None
+    except PermissionError:
+        # The process exists, but belongs to another user
+        pass
+    return pid
+
+
+def purge(trash: Path, workers: int = DEFAULT_WORKERS) -> bool:
+    """Delete all trees in the ``trash`` directory.
+
+    Returns `False` without deleting anything if another process is already emptying the trash.
+    """
+    if not trash.is_dir():
+        return True
+    lock = ProjectLock(Path(trash, LOCK_FILE_NAME))
+    try:
+        lock.acquire()
+    except BlockingIOError:
+        return False
+    pid_file = Path(trash, PID_FILE_NAME)
+    pid_file.write_text(str(os.getpid()))
+    try:
+        for path in trash_entries(trash):
+            try:
+                remove_tree(path, workers)
+            except OSError as exception:
+                print(f"Could not delete {path}: {exception}", file=sys.stderr)
+    finally:
+        pid_file.unlink(missing_ok=True)
+        lock.release()
+    return True
+
+
+def start_purge(trash_dirs: list[Path]) -> None:
+    """Empty the ``trash_dirs`` in a detached process, skipping those already being emptied."""
+    pending = [trash for trash in trash_dirs if trash_entries(trash) and purge_pid(trash) is None]
+    if not pending:
+        return
+    with Path(pending[0], LOG_FILE_NAME).open("ab") as log_file:
+        subprocess.Popen(
+            [sys.executable, "-m", "aiida_project.trash", *(trash.as_posix() for trash in pending)],
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=log_file,
+            start_new_session=True,
+        )
+
+
+if __name__ == "__main__":
+    for trash_path in sys.argv[1:]:
+        purge(Path(trash_path))
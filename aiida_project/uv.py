@@ -0,0 +1,44 @@
+"""Discovery of the `uv` executable."""
+
+from __future__ import annotations
+
+import shutil
+import sys
+from functools import cache
+from pathlib import Path
+
+from .process import ExecutableNotFoundError
+
+
+@cache
+def find_uv() -> str:
+    """Return the path to the `uv` executable, only looking it up the first time it's needed."""
+    # uv should be installed in the same place as aiida-project itself
+    # NOTE: We convert Path to str here for type-checking purposes. :-/
+    uv_exe = (Path(sys.executable).parent / "uv").as_posix()
+    if not Path(uv_exe).is_file():
+        if (which_uv := shutil.which("uv")) is None:
+            raise ExecutableNotFoundError(
+                "Could not find the `uv` executable. Maybe try re-installing aiida-project?"
+            )
+        else:
+            uv_exe = which_uv
+    return uv_exe
+
+
+def index_args(wheelhouse: Path | None) -> list[str]:
+    """Arguments for `uv` to only install from the ``wheelhouse``, without any index lookups.
+
+    Without a wheelhouse, `uv` uses the package index as usual.
+    """
+    if wheelhouse is None:
+        return []
+    return ["--offline", "--no-index", "--find-links", wheelhouse.as_posix()]
+
+
+def bytecode_args(compile_bytecode: bool) -> list[str]:
+    """Arguments for `uv` to compile the Python files in the environment after installing.
+
+    `uv` compiles all files in `site-packages` in parallel, using all cores by default.
+    """
+    return ["--compile-bytecode"] if compile_bytecode else []
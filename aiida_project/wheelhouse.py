@@ -0,0 +1,51 @@
+"""Local directories of wheels, so environments can be created without access to an index."""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+from .process import run
+from .project.venv import VenvProject
+from .uv import find_uv
+
+
+def build_wheelhouse(wheelhouse: Path, packages: list[str], python_path: Path) -> list[str]:
+    """Download or build the wheels for the ``packages`` and their dependencies.
+
+    The dependencies are resolved for the ``python_path`` interpreter in a temporary environment,
+    where `pip wheel` then puts the wheels of all resolved requirements in the ``wheelhouse``. The
+    seed packages of the environment are added as well, so `uv venv --seed` also works offline.
+
+    Returns the resolved requirements.
+    """
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="aiida-project-wheelhouse-") as tmp_dir:
+        builder = VenvProject(
+            name="wheelhouse",
+            project_path=Path(tmp_dir, "project"),
+            venv_path=Path(tmp_dir, "venv"),
+            dir_structure=[],
+        )
+        builder.create(python_path)
+        builder_python = Path(builder.venv_path, "bin", "python").as_posix()
+        seed_requirements = run(
+            [find_uv(), "pip", "freeze", "-p", builder_python], capture_stdout=True
+        ).stdout.decode()
+        requirements = builder.resolve(packages)
+
+        requirements_file = Path(tmp_dir, "requirements.txt")
+        requirements_file.write_text(seed_requirements + "\n".join(requirements) + "\n")
+        wheel_command = [
+            builder_python,
+            "-m",
+            "pip",
+            "wheel",
+            "--no-deps",
+            "--wheel-dir",
+            wheelhouse.as_posix(),
+            "-r",
+            requirements_file.as_posix(),
+        ]
+        run(wheel_command)
+    return requirements
@@ -0,0 +1,81 @@
+"""Benchmark the `verdi` completion part of activating a project, for each supported shell.
+
+Compares the legacy activation lines, which `eval` the output of `verdi` on every activation, with
+the current ones that source the completion script generated at install time. Only shells that
+are installed on the system are measured.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from aiida_project.enums import ShellType
+from aiida_project.project import load_project_class
+from aiida_project.shell import load_shell
+
+LEGACY_ACTIVATE = {
+    ShellType.bash: 'eval "$(_VERDI_COMPLETE=bash_source verdi)"',
+    ShellType.zsh: 'eval "$(_VERDI_COMPLETE=zsh_source verdi)"',
+    ShellType.fish: "eval (env _VERDI_COMPLETE=fish_source verdi)",
+}
+
+
+def time_snippet(shell: str, snippet: str, env: dict[str, str], repeat: int) -> float:
+    """Return the median time in ms to run the ``snippet`` in a new ``shell``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([shell, "-c", snippet], env=env, check=True, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("venv", type=Path, help="Environment of a project with `verdi` installed.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of measurements.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    venv_path = args.venv.resolve()
+    project = load_project_class("venv")(
+        name=venv_path.name, project_path=venv_path, venv_path=venv_path, dir_structure=[]
+    )
+    env = {
+        **os.environ,
+        "VIRTUAL_ENV": str(venv_path),
+        "PATH": f"{venv_path / 'bin'}{os.pathsep}{os.environ['PATH']}",
+    }
+
+    results = {}
+    for shell_type in ShellType:
+        if shutil.which(shell_type.value) is None:
+            continue
+        project.write_completion(shell_type.value)
+        snippet = load_shell(shell_type.value).activate.format(
+            env_file_path=venv_path,
+            venv_path=venv_path,
+            completion_file=project.completion_file(shell_type.value),
+            activation_file=project.activation_file(),
+        )
+        results[shell_type.value] = {
+            "before_ms": time_snippet(
+                shell_type.value, LEGACY_ACTIVATE[shell_type], env, args.repeat
+            ),
+            "after_ms": time_snippet(shell_type.value, snippet, env, args.repeat),
+            "shell_only_ms": time_snippet(shell_type.value, "true", env, args.repeat),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for shell, timings in results.items():
+            print(
+                f"{shell:>5}: {timings['before_ms']:8.1f} ms -> {timings['after_ms']:8.1f} ms "
+                f"(shell start-up: {timings['shell_only_ms']:.1f} ms)"
+            )
@@ -0,0 +1,155 @@
+"""Build a local conda channel of tiny stand-in packages, so the conda engine can run offline.
+
+The `python` package only contains a wrapper script around the interpreter running this script,
+which adds the `site-packages` of the environment to the path. Next to it, the channel
+provides `aiida-core` (with a `verdi` script) and plugin packages, like `wheels.py` does.
+"""
+
+import hashlib
+import io
+import json
+import sys
+import tarfile
+import time
+from pathlib import Path
+
+from wheels import CORE_VERSIONS, VERDI_MODULE, plugin_name
+
+SUBDIR = {"linux": "linux-64", "darwin": "osx-64"}.get(sys.platform, "linux-64")
+PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+SITE_PACKAGES = f"lib/python{PYTHON_VERSION}/site-packages"
+
+PYTHON_WRAPPER = f"""\
+#!/bin/sh
+PYTHONPATH="$(dirname "$0")/../{SITE_PACKAGES}" exec {Path(sys.executable).resolve()} "$@"
+"""
+
+VERDI_SCRIPT = """\
+#!/bin/sh
+exec "$(dirname "$0")/python" -c "from aiida.cmdline import verdi; verdi()" "$@"
+"""
+
+
+def build_package(  # noqa: PLR0913
+    directory: Path,
+    name: str,
+    version: str,
+    files: dict[str, str],
+    depends: tuple[str, ...] = (),
+    executables: tuple[str, ...] = (),
+) -> dict[str, object]:
+    """Build the conda package ``name`` with the ``files`` and return its repodata record."""
+    build = "0"
+    index = {
+        "name": name,
+        "version": version,
+        "build": build,
+        "build_number": 0,
+        "depends": list(depends),
+        "subdir": SUBDIR,
+    }
+    paths = [
+        {
+            "_path": path,
+            "path_type": "hardlink",
+            "sha256": hashlib.sha256(content.encode()).hexdigest(),
+            "size_in_bytes": len(content.encode()),
+        }
+        for path, content in files.items()
+    ]
+    contents = {
+        **files,
+        "info/index.json": json.dumps(index),
+        "info/files": "".join(f"{path}\n" for path in files),
+        "info/paths.json": json.dumps({"paths": paths, "paths_version": 1}),
+    }
+
+    file_name = f"{name}-{version}-{build}.tar.bz2"
+    package_path = Path(directory, SUBDIR, file_name)
+    with tarfile.open(package_path, "w:bz2") as package:
+        for path, content in contents.items():
+            info = tarfile.TarInfo(path)
+            info.size = len(content.encode())
+            info.mode = 0o755 if path in executables else 0o644
+            package.addfile(info, io.BytesIO(content.encode()))
+
+    data = package_path.read_bytes()
+    return {
+        file_name: {
+            **index,
+            "md5": hashlib.md5(data).hexdigest(),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+            "timestamp": int(time.time() * 1000),
+        }
+    }
+
+
+def build_channel(directory: Path, n_plugins: int = 0) -> Path:
+    """Build the stand-in packages in the channel ``directory``, with ``n_plugins`` plugins."""
+    for subdir in (SUBDIR, "noarch"):
+        Path(directory, subdir).mkdir(parents=True, exist_ok=True)
+
+    packages: dict[str, object] = {}
+    python_files = {
+        f"bin/python{PYTHON_VERSION}": PYTHON_WRAPPER,
+        "bin/python": PYTHON_WRAPPER,
+        f"{SITE_PACKAGES}/README.txt": "Stand-in Python package.\n",
+    }
+    packages.update(
+        build_package(
+            directory,
+            "python",
+            f"{PYTHON_VERSION}.0",
+            python_files,
+            executables=tuple(path for path in python_files if path.startswith("bin/")),
+        )
+    )
+
+    python_dependency = f"python >={PYTHON_VERSION},<{PYTHON_VERSION}.999"
+    # By default, conda adds `pip` as a dependency of `python`
+    pip_files = {f"{SITE_PACKAGES}/pip-99.0.dist-info/METADATA": "Name: pip\nVersion: 99.0\n"}
+    packages.update(build_package(directory, "pip", "99.0", pip_files))
+
+    for version in CORE_VERSIONS:
+        dist_info = f"{SITE_PACKAGES}/aiida_core-{version}.dist-info"
+        files = {
+            "bin/verdi": VERDI_SCRIPT,
+            f"{SITE_PACKAGES}/aiida/__init__.py": f"__version__ = '{version}'\n",
+            f"{SITE_PACKAGES}/aiida/cmdline.py": VERDI_MODULE,
+            f"{dist_info}/METADATA": f"Name: aiida-core\nVersion: {version}\n",
+        }
+        packages.update(
+            build_package(
+                directory,
+                "aiida-core",
+                version,
+                files,
+                depends=(python_dependency,),
+                executables=("bin/verdi",),
+            )
+        )
+
+    for index in range(n_plugins):
+        name = plugin_name(index)
+        module = name.replace("-", "_")
+        dist_info = f"{SITE_PACKAGES}/{module}-1.0.0.dist-info"
+        files = {
+            f"{SITE_PACKAGES}/{module}/__init__.py": "import aiida\n",
+            f"{dist_info}/METADATA": f"Name: {name}\nVersion: 1.0.0\n",
+            f"{dist_info}/entry_points.txt": f"[aiida.calculations]\n{module} = {module}:Calc\n",
+        }
+        packages.update(
+            build_package(
+                directory, name, "1.0.0", files, depends=(python_dependency, "aiida-core >=2.6")
+            )
+        )
+
+    for subdir, subdir_packages in ((SUBDIR, packages), ("noarch", {})):
+        repodata = {"info": {"subdir": subdir}, "packages": subdir_packages, "packages.conda": {}}
+        Path(directory, subdir, "repodata.json").write_text(json.dumps(repodata))
+    return directory
+
+
+if __name__ == "__main__":
+    print(build_channel(Path(sys.argv[1]), n_plugins=int(sys.argv[2]) if len(sys.argv) > 2 else 1))  # noqa: PLR2004
@@ -0,0 +1,85 @@
+"""Benchmark the start-up time of the `aiida-project` CLI and check it against a budget.
+
+The import time of the CLI module is measured with `python -X importtime`, which is also what
+determines the latency of shell completion and `--help`. Next to the time budget, the script
+checks that none of the modules that are only needed by the commands themselves are imported.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+CLI_MODULE = "aiida_project.commands.main"
+
+LAZY_MODULES = [
+    "dotenv",
+    "pydantic",
+    "pydantic_settings",
+    "rich",
+    "yaml",
+    "aiida_project.config",
+    "aiida_project.project",
+    "aiida_project.shell",
+]
+"""Modules that should only be imported once a command is executed."""
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """Return the cumulative import time of ``module`` in ms and all modules it imports."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    for line in result.stderr.splitlines():
+        _, _, fields = line.partition("import time:")
+        try:
+            _, cumulative, name = (field.strip() for field in fields.split("|"))
+        except ValueError:
+            continue
+        if name == module:
+            return int(cumulative) / 1000, result.stdout.split()
+    raise RuntimeError(f"Could not find the import time of `{module}`.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=150, help="Import time budget in ms.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.repeat):
+        import_time, modules = measure_import(CLI_MODULE)
+        timings.append(import_time)
+
+    eager_modules = sorted(
+        lazy
+        for lazy in LAZY_MODULES
+        if any(module == lazy or module.startswith(f"{lazy}.") for module in modules)
+    )
+    results = {
+        "module": CLI_MODULE,
+        "import_time_ms": min(timings),
+        "budget_ms": args.budget,
+        "eager_modules": eager_modules,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Import time of `{CLI_MODULE}`: {min(timings):.1f} ms (budget: {args.budget} ms)")
+
+    if eager_modules:
+        sys.exit(f"ERROR: Modules imported at start-up that should be lazy: {eager_modules}")
+    if min(timings) > args.budget:
+        sys.exit(f"ERROR: Import time exceeds the budget of {args.budget} ms.")
@@ -0,0 +1,145 @@
+"""Stress test for concurrent `create` and `destroy` commands on the same registry.
+
+Many projects are created and destroyed at the same time, including several processes creating
+or destroying the same project, in the offline sandbox of the benchmark suite (see `suite.py`).
+Afterwards the registry has to match the environments on disk, each activate script has to
+contain the AiiDA hooks exactly once, and no temporary files can be left behind. Finally, a
+project registered without its requested packages, like those of older versions, is upgraded,
+which has to keep the constraints of its plugins. Exits with a non-zero status if any check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from suite import CLI_CODE, Sandbox
+from wheels import CORE_VERSIONS, LEGACY_PLUGIN, build_wheelhouse
+
+REGISTRY_CODE = """
+import json
+from aiida_project.project import ProjectDict
+
+print(json.dumps(ProjectDict().names()))
+"""
+
+
+def run_concurrently(sandbox: Sandbox, commands: list[list[str]]) -> list[int]:
+    """Run all CLI ``commands`` at the same time and return their exit codes."""
+
+    def run(args: list[str]) -> int:
+        return subprocess.run(
+            [sys.executable, "-c", CLI_CODE, *args],
+            env=sandbox.env,
+            capture_output=True,
+            check=False,
+        ).returncode
+
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        return list(executor.map(run, commands))
+
+
+def check_registry(sandbox: Sandbox, expected: set[str]) -> list[str]:
+    """Compare the registry and the environments on disk with the ``expected`` projects."""
+    failures = []
+    names = set(sandbox.python(REGISTRY_CODE))
+    if names != expected:
+        failures.append(f"registry has {sorted(names ^ expected)} wrong")
+    venv_dir = Path(sandbox.home, ".aiida_venvs")
+    venvs = {path.name for path in venv_dir.iterdir() if not path.name.startswith(".")}
+    if venvs != expected:
+        failures.append(f"environments {sorted(venvs ^ expected)} don't match the registry")
+    for name in sorted(expected & venvs):
+        activate = Path(venv_dir, name, "bin", "activate").read_text()
+        for hook in ("export AIIDA_PATH=", "unset AIIDA_PATH"):
+            if activate.count(hook) != 1:
+                failures.append(
+                    f"`{hook}` is in the activate script of {name} {activate.count(hook)} times"
+                )
+    registry = Path(sandbox.project_dir, ".aiida_projects")
+    leftovers = [
+        path.relative_to(sandbox.home).as_posix()
+        for path in [*registry.rglob(".*"), *Path(venv_dir).glob("*/bin/.*")]
+        if path.is_file() and path.parent.name != ".locks"
+    ]
+    if leftovers:
+        failures.append(f"temporary files left behind: {leftovers}")
+    return failures
+
+
+def check_legacy_upgrade(sandbox: Sandbox) -> list[str]:
+    """Upgrade a project without requested packages in the registry, and check its plugin."""
+    sandbox.cli("create", "legacy", "--core-version", CORE_VERSIONS[0], "-p", LEGACY_PLUGIN)
+    project_file = Path(sandbox.project_dir, ".aiida_projects", "venv", "legacy.json")
+    project = json.loads(project_file.read_text())
+    del project["packages"]
+    project_file.write_text(json.dumps(project))
+
+    sandbox.cli("upgrade", "legacy")
+    failures = []
+    site_packages = next(
+        Path(sandbox.home, ".aiida_venvs", "legacy", "lib").glob("*/site-packages")
+    )
+    core_versions = [path.name for path in site_packages.glob("aiida_core-*.dist-info")]
+    if core_versions != [f"aiida_core-{CORE_VERSIONS[0]}.dist-info"]:
+        failures.append(f"upgrading a legacy project ignored its plugin, installed {core_versions}")
+    packages = sandbox.python(
+        "import json\nfrom aiida_project.project import ProjectDict\n"
+        "print(json.dumps(ProjectDict().get('legacy').packages))"
+    )
+    if LEGACY_PLUGIN not in packages:
+        failures.append(f"upgrading a legacy project recorded the packages {packages}")
+    return failures
+
+
+def stress(sandbox: Sandbox, n_projects: int, n_duplicates: int) -> list[str]:
+    # Fill the environment cache first, so the concurrent creates mostly touch the registry
+    sandbox.cli("create", "warm")
+    expected = {"warm"}
+    failures = []
+
+    names = [f"stress-{i}" for i in range(n_projects)]
+    commands = [["create", name] for name in names] + [["create", "dup"]] * n_duplicates
+    codes = run_concurrently(sandbox, commands)
+    if any(codes[:n_projects]):
+        failures.append(f"creating distinct projects failed: {codes[:n_projects]}")
+    if codes[n_projects:].count(0) != 1:
+        failures.append(f"{codes[n_projects:].count(0)} creates of the same project succeeded")
+    expected.update(names, ["dup"])
+
+    # Destroy half of the projects, each several times, while creating new ones
+    destroyed = names[::2]
+    created = [f"new-{i}" for i in range(n_projects // 2)]
+    commands = [["destroy", "--force", "--wait", name] for name in destroyed] * 2
+    commands += [["create", name] for name in created]
+    codes = run_concurrently(sandbox, commands)
+    for i, name in enumerate(destroyed):
+        if [codes[i], codes[i + len(destroyed)]].count(0) != 1:
+            failures.append(f"destroying {name} twice did not succeed exactly once")
+    if any(codes[2 * len(destroyed) :]):
+        failures.append(f"creating projects during destroys failed: {codes[2 * len(destroyed) :]}")
+    expected.difference_update(destroyed)
+    expected.update(created)
+
+    failures += check_registry(sandbox, expected)
+    return failures + check_legacy_upgrade(sandbox)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=8, help="Projects to create at once.")
+    parser.add_argument("--duplicates", type=int, default=4, help="Creates of the same project.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="aiida-project-stress-") as tmp_dir:
+        root = Path(tmp_dir)
+        sandbox = Sandbox(Path(root, "main"), build_wheelhouse(Path(root, "wheelhouse")))
+        failures = stress(sandbox, args.projects, args.duplicates)
+
+    print(json.dumps({"success": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
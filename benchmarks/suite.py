@@ -0,0 +1,285 @@
+"""Offline benchmark suite for the hot paths of `aiida-project`.
+
+All benchmarks run in a temporary home directory, with `uv` restricted to a local directory of
+tiny stand-in wheels (see `wheels.py`) and its own cache, so no network access is needed. The
+results are written as JSON, so they can be compared between revisions. When a conda frontend
+is available, the `conda` engine is benchmarked as well, against a local channel (see `channel.py`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from channel import build_channel
+from startup import CLI_MODULE, measure_import
+from wheels import build_wheelhouse, plugin_name
+
+import aiida_project
+from aiida_project.project.conda import CONDA_FRONTENDS
+
+CLI_CODE = f"from {CLI_MODULE} import app; app()"
+
+
+def summarise(timings: list[float]) -> dict[str, float]:
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def timed(function: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+class Sandbox:
+    """An initialised `aiida-project` setup in its own home directory, installing offline."""
+
+    def __init__(self, root: Path, wheelhouse: Path) -> None:
+        self.home = Path(root, "home")
+        self.home.mkdir(parents=True)
+        self.env = {
+            key: value
+            for key, value in os.environ.items()
+            if key not in ("WORKON_HOME", "VIRTUAL_ENV")
+        }
+        self.env.update(
+            HOME=str(self.home),
+            UV_OFFLINE="1",
+            UV_NO_INDEX="1",
+            UV_FIND_LINKS=str(wheelhouse),
+            UV_CACHE_DIR=str(Path(root, "uv-cache")),
+        )
+        self.cli("init", "--shell", "bash")
+
+    def cli(self, *args: str) -> subprocess.CompletedProcess[str]:
+        """Run the `aiida-project` CLI with ``args``."""
+        return subprocess.run(
+            [sys.executable, "-c", CLI_CODE, *args],
+            env=self.env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    def python(self, code: str) -> Any:
+        """Run the Python ``code`` in the sandbox and return the JSON it prints."""
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=self.env, capture_output=True, text=True, check=True
+        )
+        return json.loads(result.stdout)
+
+    @property
+    def project_dir(self) -> Path:
+        return Path(self.home, "project")
+
+
+def bench_create(sandbox: Sandbox, repeat: int) -> dict[str, Any]:
+    """Create projects end to end, without and with the environment cache, and from the pool."""
+    cold = [timed(lambda: sandbox.cli("create", f"cold-{i}", "--no-cache")) for i in range(repeat)]
+    sandbox.cli("create", "warm-fill")
+    warm = [timed(lambda: sandbox.cli("create", f"warm-{i}")) for i in range(repeat)]
+    # The time spent in `create` itself is reported as well, since it's mostly the CLI startup
+    sandbox.cli("pool", "fill", "--size", str(repeat), "--wait")
+    pooled, pooled_totals = [], []
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = sandbox.cli("create", f"pooled-{i}", "--log-format", "json")
+        pooled.append(time.perf_counter() - start)
+        pooled_totals.append(json.loads(result.stdout)["total"])
+    sandbox.cli("pool", "clear")
+    return {
+        "cold_s": summarise(cold),
+        "cached_s": summarise(warm),
+        "pooled_s": summarise(pooled),
+        "pooled_create_s": summarise(pooled_totals),
+    }
+
+
+def bench_first_run(sandbox: Sandbox, repeat: int) -> dict[str, Any]:
+    """Time the first `verdi --version` in new environments, with and without compiled bytecode.
+
+    The environments are created without the cache, so they only have bytecode if compiled.
+    """
+    results = {}
+    for key, options in (("compiled_s", []), ("source_s", ["--no-compile-bytecode"])):
+        timings = []
+        for i in range(repeat):
+            name = f"first-run-{i}{'-'.join(['', *options])}"
+            sandbox.cli("create", name, "--no-cache", *options)
+            verdi = Path(sandbox.home, ".aiida_venvs", name, "bin", "verdi")
+            timings.append(
+                timed(lambda: subprocess.run([verdi, "--version"], capture_output=True, check=True))
+            )
+        results[key] = summarise(timings)
+    return results
+
+
+def bench_install(sandbox: Sandbox, plugin_counts: list[int]) -> dict[str, Any]:
+    """Time the install phase of `create` for a number of plugins."""
+    results = {}
+    for n_plugins in plugin_counts:
+        plugins = [option for i in range(n_plugins) for option in ("-p", plugin_name(i))]
+        result = sandbox.cli(
+            "create", f"install-{n_plugins}", "--no-cache", "--log-format", "json", *plugins
+        )
+        results[str(n_plugins)] = json.loads(result.stdout)["timings"]["install"]
+    return {"install_s": results}
+
+
+def bench_destroy(sandbox: Sandbox, file_counts: list[int]) -> dict[str, Any]:
+    """Destroy projects with a file repository of a certain number of files.
+
+    Both the time until the command returns and until all files are deleted (`--wait`) are
+    measured.
+    """
+    results: dict[str, dict[str, float]] = {"destroy_s": {}, "destroy_wait_s": {}}
+    for n_files in file_counts:
+        for key, options in (("destroy_s", []), ("destroy_wait_s", ["--wait"])):
+            name = f"destroy-{n_files}{'-'.join(['', *options])}"
+            sandbox.cli("create", name)
+            fill_repository(Path(sandbox.project_dir, name), n_files)
+            results[key][str(n_files)] = timed(
+                lambda: sandbox.cli("destroy", "--force", *options, name)
+            )
+    return results
+
+
+def bench_archive(sandbox: Sandbox, root: Path, file_counts: list[int]) -> dict[str, Any]:
+    """Export projects with a file repository of a certain number of files and import them."""
+    results: dict[str, dict[str, float]] = {"export_s": {}, "import_s": {}}
+    for n_files in file_counts:
+        name = f"archive-{n_files}"
+        archive = Path(root, f"{name}.tar")
+        sandbox.cli("create", name)
+        fill_repository(Path(sandbox.project_dir, name), n_files)
+        results["export_s"][str(n_files)] = timed(
+            lambda: sandbox.cli("export", name, "--output", str(archive))
+        )
+        results["import_s"][str(n_files)] = timed(
+            lambda: sandbox.cli("import", str(archive), "--name", f"{name}-imported")
+        )
+    return results
+
+
+def fill_repository(project_path: Path, n_files: int) -> None:
+    """Write ``n_files`` small files to the file repository of the project at ``project_path``."""
+    repository = Path(project_path, ".aiida", "repository")
+    for i in range(n_files):
+        file_path = Path(repository, f"{i // 100:04d}", f"{i % 100:02d}")
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(str(i))
+
+
+REGISTRY_CODE = """
+import json, time
+from aiida_project.project import ProjectDict
+
+start = time.perf_counter()
+project = ProjectDict().get("project-0")
+first = time.perf_counter() - start
+
+start = time.perf_counter()
+project = ProjectDict().get("project-{last}")
+second = time.perf_counter() - start
+
+start = time.perf_counter()
+projects = list(ProjectDict().projects.values())
+load_all = time.perf_counter() - start
+
+print(json.dumps({{"first_lookup": first, "lookup": second, "load_all": load_all}}))
+"""
+
+
+def bench_registry(root: Path, wheelhouse: Path, project_counts: list[int]) -> dict[str, Any]:
+    """Look up projects in a registry with a certain number of projects."""
+    results = {}
+    for n_projects in project_counts:
+        sandbox = Sandbox(Path(root, f"registry-{n_projects}"), wheelhouse)
+        registry = Path(sandbox.project_dir, ".aiida_projects", "venv")
+        registry.mkdir(parents=True, exist_ok=True)
+        for i in range(n_projects):
+            name = f"project-{i}"
+            project = {
+                "name": name,
+                "project_path": str(Path(sandbox.project_dir, name)),
+                "venv_path": str(Path(sandbox.home, ".aiida_venvs", name)),
+                "dir_structure": {"setup": ["profile", "computer", "code"]},
+            }
+            Path(registry, f"{name}.json").write_text(json.dumps(project))
+        results[str(n_projects)] = sandbox.python(REGISTRY_CODE.format(last=n_projects - 1))
+    return {"registry_s": results}
+
+
+def bench_conda(root: Path, wheelhouse: Path, repeat: int) -> dict[str, Any]:
+    """Create `conda` projects from a local channel, without and with a cached resolution."""
+    sandbox = Sandbox(Path(root, "conda"), wheelhouse)
+    channel = build_channel(Path(root, "conda-channel"), n_plugins=1)
+    sandbox.env.update(
+        AIIDA_CONDA_CHANNELS=json.dumps([channel.as_uri()]),
+        CONDA_PKGS_DIRS=str(Path(root, "conda-pkgs")),
+    )
+    args = ["--engine", "conda", "--python", sys.executable, "-p", plugin_name(0)]
+    cold = timed(lambda: sandbox.cli("create", "conda-cold", *args))
+    cached = [timed(lambda: sandbox.cli("create", f"conda-{i}", *args)) for i in range(repeat)]
+    return {"cold_s": cold, "cached_s": summarise(cached)}
+
+
+def bench_startup(sandbox: Sandbox, repeat: int) -> dict[str, Any]:
+    """Measure the import time of the CLI and the time to show the help."""
+    import_times = [measure_import(CLI_MODULE)[0] / 1000 for _ in range(repeat)]
+    help_times = [timed(lambda: sandbox.cli("--help")) for _ in range(repeat)]
+    return {"import_s": summarise(import_times), "help_s": summarise(help_times)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of timed commands.")
+    parser.add_argument("--plugins", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--files", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--projects", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="aiida-project-bench-") as tmp_dir:
+        root = Path(tmp_dir)
+        wheelhouse = build_wheelhouse(Path(root, "wheelhouse"), n_plugins=max(args.plugins))
+        sandbox = Sandbox(Path(root, "main"), wheelhouse)
+
+        benchmarks: dict[str, Any] = {}
+        benchmarks["startup"] = bench_startup(sandbox, args.repeat)
+        benchmarks["create"] = bench_create(sandbox, args.repeat)
+        benchmarks["install"] = bench_install(sandbox, args.plugins)
+        benchmarks["first_run"] = bench_first_run(sandbox, args.repeat)
+        benchmarks["destroy"] = bench_destroy(sandbox, args.files)
+        benchmarks["archive"] = bench_archive(sandbox, root, args.files)
+        benchmarks["registry"] = bench_registry(root, wheelhouse, args.projects)
+        if os.environ.get("CONDA_EXE") or any(map(shutil.which, CONDA_FRONTENDS)):
+            benchmarks["conda"] = bench_conda(root, wheelhouse, args.repeat)
+
+    results = {
+        "environment": {
+            "aiida_project": aiida_project.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "benchmarks": benchmarks,
+    }
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
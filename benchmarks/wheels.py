@@ -0,0 +1,143 @@
+"""Build a directory of tiny stand-in wheels, so the benchmarks can run fully offline.
+
+Next to `aiida-core` (with a `verdi` script that supports `--version` and shell completion) and
+plugin packages, this also provides stand-ins for the seed packages installed by `uv venv --seed`.
+"""
+
+import base64
+import hashlib
+import zipfile
+from pathlib import Path
+
+CORE_VERSIONS = ["2.6.0", "2.7.0"]
+
+SEED_PACKAGES = ["pip", "setuptools", "wheel"]
+
+LEGACY_PLUGIN = "aiida-bench-legacy"
+"""Plugin that doesn't support the latest `aiida-core` yet, to check that upgrades respect it."""
+
+VERDI_MODULE = """\
+import os
+
+
+def verdi():
+    shell_source = os.environ.get("_VERDI_COMPLETE")
+    if shell_source:
+        print(f"# {shell_source} completion for verdi")
+        return
+    import importlib
+    import pkgutil
+
+    import aiida
+
+    # Like the actual `verdi`, import (a stand-in for) a good part of `aiida-core`
+    for module in pkgutil.iter_modules(aiida.__path__):
+        importlib.import_module(f"aiida.{module.name}")
+    print(f"AiiDA version {aiida.__version__}")
+"""
+
+MODULE_FUNCTION = """
+
+def function_{index}(values, factor={index}):
+    \"\"\"Stand-in function, so compiling the module takes some time.\"\"\"
+    results = {{}}
+    for key, value in enumerate(values):
+        if isinstance(value, (int, float)) and value > factor:
+            results[key] = value * factor
+        else:
+            results[key] = [str(value), repr(value), factor]
+    return results
+"""
+
+
+def module_source(value: int, n_functions: int = 50) -> str:
+    """Return the source of a stand-in module with ``n_functions`` functions."""
+    functions = "".join(MODULE_FUNCTION.format(index=index) for index in range(n_functions))
+    return f"VALUE = {value}\n{functions}"
+
+
+def build_wheel(  # noqa: PLR0913
+    directory: Path,
+    name: str,
+    version: str,
+    files: dict[str, str],
+    entry_points: str = "",
+    requires: tuple[str, ...] = (),
+) -> Path:
+    """Build a pure Python wheel for the package ``name`` with the given ``files``."""
+    dist_name = name.replace("-", "_")
+    dist_info = f"{dist_name}-{version}.dist-info"
+    metadata = [f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"]
+    metadata.extend(f"Requires-Dist: {requirement}\n" for requirement in requires)
+
+    contents = dict(files)
+    contents[f"{dist_info}/METADATA"] = "".join(metadata)
+    contents[f"{dist_info}/WHEEL"] = (
+        "Wheel-Version: 1.0\nGenerator: aiida-project-benchmarks\n"
+        "Root-Is-Purelib: true\nTag: py3-none-any\n"
+    )
+    if entry_points:
+        contents[f"{dist_info}/entry_points.txt"] = entry_points
+
+    record = []
+    for path, content in contents.items():
+        digest = hashlib.sha256(content.encode()).digest()
+        encoded = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+        record.append(f"{path},sha256={encoded},{len(content.encode())}")
+    record.append(f"{dist_info}/RECORD,,")
+    contents[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+
+    wheel_path = Path(directory, f"{dist_name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(wheel_path, "w") as wheel:
+        for path, content in contents.items():
+            wheel.writestr(path, content)
+    return wheel_path
+
+
+def plugin_name(index: int) -> str:
+    return f"aiida-bench-plugin-{index}"
+
+
+def build_wheelhouse(directory: Path, n_plugins: int = 0, n_modules: int = 20) -> Path:
+    """Build the stand-in wheels in ``directory``, with ``n_plugins`` plugin packages.
+
+    Each package contains ``n_modules`` modules, so installing them has some files to link.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for seed_package in SEED_PACKAGES:
+        build_wheel(directory, seed_package, "99.0", {f"{seed_package}/__init__.py": ""})
+
+    for version in CORE_VERSIONS:
+        files = {
+            "aiida/__init__.py": f"__version__ = '{version}'\n",
+            "aiida/cmdline.py": VERDI_MODULE,
+        }
+        files.update({f"aiida/module_{i}.py": module_source(i) for i in range(n_modules)})
+        build_wheel(
+            directory,
+            "aiida-core",
+            version,
+            files,
+            entry_points="[console_scripts]\nverdi = aiida.cmdline:verdi\n",
+        )
+
+    build_wheel(
+        directory,
+        LEGACY_PLUGIN,
+        "1.0.0",
+        {f"{LEGACY_PLUGIN.replace('-', '_')}/__init__.py": "import aiida\n"},
+        requires=(f"aiida-core<{CORE_VERSIONS[-1]}",),
+    )
+    for index in range(n_plugins):
+        package = plugin_name(index).replace("-", "_")
+        files = {f"{package}/__init__.py": "import aiida\n"}
+        files.update({f"{package}/module_{i}.py": f"VALUE = {i}\n" for i in range(n_modules)})
+        build_wheel(
+            directory,
+            plugin_name(index),
+            "1.0.0",
+            files,
+            entry_points=f"[aiida.calculations]\n{package} = {package}:Calculation\n",
+            requires=("aiida-core>=2.6",),
+        )
+    return directory